@@ -0,0 +1,87 @@
+"""Сравнение задержки записи с предварительным чтением (find_one + insert/delete) и без него."""
+
+import statistics
+import time
+import uuid
+
+import pymongo  # type: ignore
+from config import mongo_cfg
+from pymongo.errors import DuplicateKeyError  # type: ignore
+
+COLLECTION_NAME = 'write_roundtrips_benchmark'
+NUM_OPERATIONS = 1000
+
+
+def measure_latency(operation, documents):
+    latencies = []
+    for document in documents:
+        start_time = time.perf_counter()
+        operation(document)
+        latencies.append(time.perf_counter() - start_time)
+    latencies.sort()
+    return {
+        'avg_ms': statistics.mean(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def insert_with_read(collection):
+    def operation(document):
+        if collection.find_one(document):
+            return None
+        return collection.insert_one(document)
+
+    return operation
+
+
+def insert_without_read(collection):
+    def operation(document):
+        try:
+            return collection.insert_one(document)
+        except DuplicateKeyError:
+            return None
+
+    return operation
+
+
+def delete_with_read(collection):
+    def operation(document):
+        if collection.find_one(document):
+            return collection.delete_one(document).deleted_count
+        return None
+
+    return operation
+
+
+def delete_without_read(collection):
+    def operation(document):
+        return collection.delete_one(document).deleted_count
+
+    return operation
+
+
+def create_documents():
+    return [{'film_id': str(uuid.uuid4()), 'user_id': str(uuid.uuid4())} for _ in range(NUM_OPERATIONS)]
+
+
+def main():
+    client = pymongo.MongoClient(mongo_cfg.mongo_connection_string)
+    collection = client[mongo_cfg.db_name][COLLECTION_NAME]
+    collection.drop()
+    collection.create_index([('film_id', 1), ('user_id', 1)], unique=True)
+
+    for name, insert_operation, delete_operation in (
+        ('find_one + write', insert_with_read(collection), delete_with_read(collection)),
+        ('single write', insert_without_read(collection), delete_without_read(collection)),
+    ):
+        documents = create_documents()
+        # insert_one дописывает _id в документ, поэтому запросы строятся по копиям
+        insert_stats = measure_latency(insert_operation, [dict(document) for document in documents])
+        delete_stats = measure_latency(delete_operation, [dict(document) for document in documents])
+        print(f'{name}: insert {insert_stats}, delete {delete_stats}')
+
+    collection.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Сравнение времени CPU на сериализацию страницы отзывов через pydantic-модели и напрямую через orjson."""
+
+import datetime
+import statistics
+import time
+import uuid
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel, Field, TypeAdapter
+
+PAGE_SIZE = 100
+NUM_PAGES = 1000
+
+
+class FilmReviewResponse(BaseModel):
+    """Копия модели ответа api.utils.response_models.FilmReviewResponse."""
+
+    review_id: str
+    user_id: uuid.UUID
+    review_text: str
+    film_score: float | None = Field(..., ge=1, le=10)
+    create_at: datetime.datetime
+    update_at: datetime.datetime
+
+
+reviews_adapter = TypeAdapter(list[FilmReviewResponse])
+
+
+def create_reviews():
+    return [
+        {
+            '_id': ObjectId(),
+            'film_id': str(uuid.uuid4()),
+            'user_id': str(uuid.uuid4()),
+            'review_text': 'Отличный фильм, ' * 20,
+            'film_score': '7.5',
+            'create_at': datetime.datetime.now(),
+            'update_at': datetime.datetime.now(),
+        }
+        for _ in range(PAGE_SIZE)
+    ]
+
+
+def serialize_with_models(reviews):
+    # Так FastAPI обрабатывает список моделей при заданном response_model: построение моделей,
+    # повторная валидация по response_model и преобразование в json-совместимые значения
+    models = [FilmReviewResponse(review_id=str(review.get('_id')), **review) for review in reviews]
+    validated = reviews_adapter.validate_python([model.model_dump() for model in models])
+    return orjson.dumps(reviews_adapter.dump_python(validated, mode='json'))
+
+
+def serialize_directly(reviews):
+    # Повторяет api.utils.serializers.review_to_response
+    return orjson.dumps(
+        [
+            {
+                'review_id': str(review['_id']),
+                'user_id': review['user_id'],
+                'review_text': review['review_text'],
+                'film_score': float(review['film_score']),
+                'create_at': review['create_at'],
+                'update_at': review['update_at'],
+            }
+            for review in reviews
+        ],
+    )
+
+
+def measure_cpu_time(serialize, pages):
+    timings = []
+    for reviews in pages:
+        start_time = time.process_time()
+        serialize(reviews)
+        timings.append(time.process_time() - start_time)
+    return {'avg_ms': statistics.mean(timings) * 1000, 'total_s': sum(timings)}
+
+
+def main():
+    pages = [create_reviews() for _ in range(NUM_PAGES)]
+    assert orjson.loads(serialize_with_models(pages[0])) == orjson.loads(serialize_directly(pages[0]))
+    for name, serialize in (('pydantic models', serialize_with_models), ('orjson dicts', serialize_directly)):
+        print(f'{name}: {measure_cpu_time(serialize, pages)}')
+
+
+if __name__ == '__main__':
+    main()
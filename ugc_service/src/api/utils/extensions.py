@@ -1,32 +1,23 @@
 """Вспомогательный модуль для аутентификации и пагинации."""
 
-import json
-from http import HTTPStatus
-
-import httpx
-import jwt
 from core.config import settings
-from fastapi import Depends, HTTPException, Query
+from fastapi import Depends, Query
 from fastapi.security import HTTPBearer
+from services.auth import AuthService, get_auth_service
 
 bearer = HTTPBearer()
 
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
 
-async def is_authenticated(token: HTTPBearer = Depends(bearer)) -> dict[str, str]:
-    """Аутентифицирует пользователя."""
-    url = f'{settings.auth_server_url}/is_authenticated'
-    headers = {'Authorization': f'Bearer {token.credentials}'}
-    return {'user_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'}  # type: ignore
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        status_code = response.status_code
-    if status_code == HTTPStatus.UNAUTHORIZED:
-        raise HTTPException(status_code=401, detail='You are not authenticated')
-    if status_code != HTTPStatus.OK:
-        raise HTTPException(status_code=500, detail='Something was broke')
 
-    token_inf = jwt.decode(token.credentials, options={'verify_signature': False})
-    return json.loads(token_inf['sub'])  # type: ignore[no-any-return]
+async def is_authenticated(
+    token: HTTPBearer = Depends(bearer),
+    auth_service: AuthService = Depends(get_auth_service),
+) -> dict[str, str]:
+    """Аутентифицирует пользователя."""
+    if settings.auth_stub_user_id:
+        return {'user_id': settings.auth_stub_user_id}
+    return await auth_service.authenticate(token.credentials)
 
 
 class PaginateQueryParams:
@@ -47,7 +38,46 @@ class PaginateQueryParams:
             gt=0,
             le=100,
         ),
+        cursor: str | None = Query(
+            None,
+            title='Page cursor.',
+            description=f'Курсор следующей страницы из заголовка {NEXT_CURSOR_HEADER} (заменяет номер страницы)',
+        ),
     ):
         """Инициализирует класс пагинации ответов."""
         self.page_number = page_number
         self.page_size = page_size
+        self.cursor = cursor
+
+
+class SearchQueryParams:
+    """Класс параметров поиска с ограниченным количеством страниц результатов."""
+
+    def __init__(
+        self,
+        query: str = Query(
+            ...,
+            title='Search query.',
+            description='Слова для поиска в тексте отзывов',
+            min_length=2,
+            max_length=200,
+        ),
+        page_number: int = Query(
+            1,
+            title='Page number.',
+            description=f'Номер страницы (от 1 до {settings.review_search_max_page})',
+            gt=0,
+            le=settings.review_search_max_page,
+        ),
+        page_size: int = Query(
+            20,
+            title='Size of page.',
+            description='Количество записей на странице (от 1 до 100)',
+            gt=0,
+            le=100,
+        ),
+    ):
+        """Инициализирует класс параметров поиска."""
+        self.query = query
+        self.page_number = page_number
+        self.page_size = page_size
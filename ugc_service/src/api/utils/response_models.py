@@ -7,8 +7,10 @@
 """Модуль с моделями ответов api."""
 
 import datetime
+import typing
 import uuid
 
+from core.config import settings
 from pydantic import BaseModel, Field
 
 
@@ -18,6 +20,13 @@ class FilmFormBookmarks(BaseModel):
     film_id: uuid.UUID
 
 
+class FilmBookmarkMembership(BaseModel):
+    """Модель ответа пользователю о наличии фильма в закладках."""
+
+    film_id: uuid.UUID
+    is_bookmarked: bool
+
+
 class FilmReviewResponse(BaseModel):
     """Модель ответа пользователю о рецензии и оценке фильма."""
 
@@ -27,6 +36,14 @@ class FilmReviewResponse(BaseModel):
     film_score: float | None = Field(..., ge=1, le=10)
     create_at: datetime.datetime
     update_at: datetime.datetime
+    likes: int = 0
+    dislikes: int = 0
+
+
+class FilmReviewSearchResult(FilmReviewResponse):
+    """Модель ответа пользователю об отзыве, найденном по тексту, с оценкой релевантности."""
+
+    text_score: float
 
 
 class FilmReviewRequest(BaseModel):
@@ -36,6 +53,12 @@ class FilmReviewRequest(BaseModel):
     film_score: float = Field(..., ge=1, le=10)
 
 
+class ReviewReactionRequest(BaseModel):
+    """Модель для реакции на отзыв фильма."""
+
+    reaction: typing.Literal['like', 'dislike']
+
+
 class ReviewUpdate(BaseModel):
     """Модель для обновления отзыва и оценки фильма."""
 
@@ -47,6 +70,17 @@ class FilmAverageScore(BaseModel):
     """Модель ответа пользователю средней оценки фильма."""
 
     average_film_score: float
+    scores_count: int
+    scores_sum: float
+
+
+class FilmsAverageScore(BaseModel):
+    """Модель ответа пользователю средней оценки фильма из списка фильмов (у неоцененного фильма нет оценки)."""
+
+    film_id: uuid.UUID
+    average_film_score: float | None = None
+    scores_count: int = 0
+    scores_sum: float = 0
 
 
 class FilmScore(BaseModel):
@@ -54,3 +88,37 @@ class FilmScore(BaseModel):
 
     film_id: uuid.UUID
     film_score: float = Field(..., ge=1, le=10)
+
+
+class FilmScoresBatch(BaseModel):
+    """Модель для пакетного добавления оценок фильмов."""
+
+    scores: list[FilmScore] = Field(..., min_length=1, max_length=settings.bulk_max_items)
+
+
+class FilmBookmarksBatch(BaseModel):
+    """Модель для пакетного добавления фильмов в закладки."""
+
+    film_ids: list[uuid.UUID] = Field(..., min_length=1, max_length=settings.bulk_max_items)
+
+
+class TopRatedFilm(BaseModel):
+    """Модель ответа пользователю о фильме из рейтинга по средней оценке."""
+
+    film_id: uuid.UUID
+    average_film_score: float
+    scores_count: int
+
+
+class MostBookmarkedFilm(BaseModel):
+    """Модель ответа пользователю о фильме из рейтинга по добавлениям в закладки."""
+
+    film_id: uuid.UUID
+    bookmarks_count: int
+
+
+class BulkItemStatus(BaseModel):
+    """Модель ответа пользователю о результате записи одного элемента пакета."""
+
+    film_id: uuid.UUID
+    status: str
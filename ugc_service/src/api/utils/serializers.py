@@ -0,0 +1,40 @@
+"""
+Модуль быстрой сериализации ответов api.
+
+Документы MongoDB преобразуются сразу в словари, которые ORJSONResponse сериализует без построения
+и повторной валидации pydantic-моделей. UUID и datetime сериализует orjson, ObjectId приводится к строке.
+Поля словарей совпадают с моделями ответов из response_models, которые остаются схемой OpenAPI.
+"""
+
+import typing
+
+
+def review_to_response(review: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """Преобразует отзыв из MongoDB в ответ FilmReviewResponse."""
+    film_score = review.get('film_score')
+    return {
+        'review_id': str(review['_id']),
+        'user_id': review['user_id'],
+        'review_text': review['review_text'],
+        'film_score': None if film_score is None else float(film_score),
+        'create_at': review['create_at'],
+        'update_at': review['update_at'],
+        'likes': review.get('likes', 0),
+        'dislikes': review.get('dislikes', 0),
+    }
+
+
+def review_to_search_result(review: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """Преобразует найденный по тексту отзыв из MongoDB в ответ FilmReviewSearchResult."""
+    return {**review_to_response(review), 'text_score': review['text_score']}
+
+
+def review_to_export(review: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    """Преобразует отзыв из MongoDB в запись NDJSON-выгрузки отзывов пользователя."""
+    review['review_id'] = str(review.pop('_id'))
+    return review
+
+
+def bookmark_to_response(film_id: str) -> dict[str, typing.Any]:
+    """Преобразует id фильма из закладок в ответ FilmFormBookmarks."""
+    return {'film_id': film_id}
@@ -0,0 +1,26 @@
+"""Вспомогательный модуль для потоковой выгрузки записей в формате NDJSON."""
+
+import typing
+
+import orjson
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Строки накапливаются до этого размера, чтобы не отправлять клиенту отдельный фрагмент на каждую запись
+NDJSON_CHUNK_SIZE = 64 * 1024
+
+
+async def iter_ndjson(
+    entries: typing.AsyncIterator[dict[str, typing.Any]],
+    convert: typing.Callable[[dict[str, typing.Any]], dict[str, typing.Any]] | None = None,
+) -> typing.AsyncIterator[bytes]:
+    """Преобразует поток записей в поток фрагментов NDJSON (одна запись - одна строка JSON)."""
+    chunk = bytearray()
+    async for entry in entries:
+        chunk += orjson.dumps(convert(entry) if convert else entry, default=str)
+        chunk += b'\n'
+        if len(chunk) >= NDJSON_CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
@@ -4,25 +4,96 @@ import typing
 import uuid
 
 import orjson
-from api.utils.extensions import is_authenticated
-from api.utils.response_models import FilmFormBookmarks
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from api.utils.extensions import NEXT_CURSOR_HEADER, PaginateQueryParams, is_authenticated
+from api.utils.response_models import (
+    BulkItemStatus,
+    FilmBookmarkMembership,
+    FilmBookmarksBatch,
+    FilmFormBookmarks,
+)
+from api.utils.serializers import bookmark_to_response
+from api.utils.streaming import NDJSON_MEDIA_TYPE, iter_ndjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from services.film_bookmarks import BookmarksService, get_bookmark_service
+from services.ugc_events import UgcEventsService, get_ugc_events_service
 
 router = APIRouter()
 
 
 @router.get('/', response_model=list[FilmFormBookmarks])
 async def get_film_bookmarks(
+    pqp: PaginateQueryParams = Depends(PaginateQueryParams),
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
     bookmark_service: BookmarksService = Depends(get_bookmark_service),
-) -> list[FilmFormBookmarks] | dict[str, str]:
-    """Возвращает закладки фильмов пользователя."""
+) -> ORJSONResponse:
+    """
+    Возвращает страницу закладок фильмов пользователя, начиная с последних добавленных.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Закладки сериализуются без построения моделей ответа для каждой закладки.
+    """
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    films_ids = await bookmark_service.get_bookmark_films(user_id)
+    films_ids, next_cursor = await bookmark_service.get_bookmark_films(
+        user_id,
+        page_number=pqp.page_number,
+        page_size=pqp.page_size,
+        cursor=pqp.cursor,
+    )
     if not films_ids:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='bookmarks not found')
-    return [FilmFormBookmarks(film_id=film_id) for film_id in films_ids]
+    response = ORJSONResponse([bookmark_to_response(film_id) for film_id in films_ids])
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@router.get('/membership', response_model=list[FilmBookmarkMembership])
+async def get_films_membership(
+    film_ids: list[uuid.UUID] = Query(
+        alias='film_id',
+        title='UUID фильмов',
+        description='UUID фильмов (параметр повторяется для каждого фильма, не больше 100)',
+        min_length=1,
+        max_length=100,
+    ),
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+    bookmark_service: BookmarksService = Depends(get_bookmark_service),
+) -> list[FilmBookmarkMembership]:
+    """Проверяет, какие из фильмов добавлены пользователем в закладки."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    bookmarked_films = await bookmark_service.get_bookmarked_films(film_ids, user_id)
+    if bookmarked_films is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='bookmarks are unavailable')
+    return [
+        FilmBookmarkMembership(film_id=film_id, is_bookmarked=is_bookmarked)
+        for film_id, is_bookmarked in bookmarked_films.items()
+    ]
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_film_bookmarks(
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+    bookmark_service: BookmarksService = Depends(get_bookmark_service),
+) -> StreamingResponse:
+    """Выгружает все закладки пользователя потоком в формате NDJSON."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    bookmarks = await bookmark_service.iter_bookmark_films(user_id)
+    return StreamingResponse(iter_ndjson(bookmarks), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post('/batch', response_model=list[BulkItemStatus])
+async def add_films_to_bookmarks(
+    bookmarks_batch: FilmBookmarksBatch,
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+    bookmark_service: BookmarksService = Depends(get_bookmark_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
+) -> list[BulkItemStatus]:
+    """Добавляет несколько фильмов в закладки и возвращает статус добавления каждого фильма."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    # В режиме приема событий запись публикуется в журнал событий
+    statuses = await (ugc_events_service or bookmark_service).add_films_to_bookmarks(bookmarks_batch.film_ids, user_id)
+    return [BulkItemStatus(film_id=film_id, status=item_status) for film_id, item_status in statuses.items()]
 
 
 @router.post('/{film_id}')
@@ -30,10 +101,11 @@ async def add_film_to_bookmark(
     film_id: uuid.UUID,
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
     bookmark_service: BookmarksService = Depends(get_bookmark_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
 ) -> str | dict[str, str]:
     """Добавляет фильм в закладки."""
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    result = await bookmark_service.add_film_to_bookmarks(film_id, user_id)
+    result = await (ugc_events_service or bookmark_service).add_film_to_bookmarks(film_id, user_id)
     if not result:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='entry not added')
     return Response(  # type: ignore[no-any-return]
@@ -48,10 +120,11 @@ async def delete_film_from_bookmark(
     film_id: uuid.UUID,
     token_sub: dict[str, str] = Depends(is_authenticated),
     bookmark_service: BookmarksService = Depends(get_bookmark_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
 ) -> str | dict[str, typing.Any]:
     """Удаляет фильм из закладки."""
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    result = await bookmark_service.delete_film_from_bookmarks(film_id, user_id)
+    result = await (ugc_events_service or bookmark_service).delete_film_from_bookmarks(film_id, user_id)
     if not result:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='bookmarks not found')
     return Response(  # type: ignore[no-any-return]
@@ -0,0 +1,44 @@
+"""Модуль рейтингов фильмов."""
+
+from api.utils.response_models import MostBookmarkedFilm, TopRatedFilm
+from core.config import settings
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from services.film_leaderboards import (
+    MOST_BOOKMARKED,
+    TOP_RATED,
+    FilmLeaderboardsService,
+    get_film_leaderboards_service,
+)
+
+router = APIRouter()
+
+
+@router.get('/top_rated', response_model=list[TopRatedFilm])
+async def get_top_rated_films(
+    limit: int = Query(100, title='Number of films.', description='Количество фильмов (от 1 до 100)', gt=0, le=100),
+    min_votes: int = Query(
+        settings.leaderboard_min_votes,
+        title='Minimum votes.',
+        description='Минимальное количество оценок фильма (не меньше LEADERBOARD_MIN_VOTES)',
+        ge=settings.leaderboard_min_votes,
+    ),
+    leaderboards_service: FilmLeaderboardsService = Depends(get_film_leaderboards_service),
+) -> ORJSONResponse:
+    """Возвращает фильмы с лучшей средней оценкой из периодически пересчитываемого рейтинга."""
+    films = await leaderboards_service.get_leaderboard(TOP_RATED, limit, min_votes=min_votes)
+    if films is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='leaderboard not found')
+    return ORJSONResponse(films)
+
+
+@router.get('/most_bookmarked', response_model=list[MostBookmarkedFilm])
+async def get_most_bookmarked_films(
+    limit: int = Query(100, title='Number of films.', description='Количество фильмов (от 1 до 100)', gt=0, le=100),
+    leaderboards_service: FilmLeaderboardsService = Depends(get_film_leaderboards_service),
+) -> ORJSONResponse:
+    """Возвращает фильмы, чаще всего добавляемые в закладки за последние LEADERBOARD_BOOKMARKS_WINDOW_DAYS дней."""
+    films = await leaderboards_service.get_leaderboard(MOST_BOOKMARKED, limit)
+    if films is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='leaderboard not found')
+    return ORJSONResponse(films)
@@ -5,29 +5,76 @@ import typing
 import uuid
 
 import orjson
-from api.utils.extensions import PaginateQueryParams, is_authenticated
-from api.utils.response_models import FilmReviewRequest, FilmReviewResponse, ReviewUpdate
-from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
-from services.film_reviews import FilmReviewsService, get_film_review_service
+from api.utils.extensions import NEXT_CURSOR_HEADER, PaginateQueryParams, SearchQueryParams, is_authenticated
+from api.utils.response_models import FilmReviewRequest, FilmReviewResponse, FilmReviewSearchResult, ReviewUpdate
+from api.utils.serializers import review_to_export, review_to_response, review_to_search_result
+from api.utils.streaming import NDJSON_MEDIA_TYPE, iter_ndjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from services.film_reviews import FilmReviewsService, ReviewSort, get_film_review_service
+from services.ugc_events import UgcEventsService, get_ugc_events_service
 
 router = APIRouter()
 
 
+@router.get('/export', response_class=StreamingResponse)
+async def export_user_reviews(
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+    film_review_service: FilmReviewsService = Depends(get_film_review_service),
+) -> StreamingResponse:
+    """Выгружает все отзывы пользователя потоком в формате NDJSON, начиная с новых."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    reviews = await film_review_service.iter_user_reviews(user_id)
+    return StreamingResponse(iter_ndjson(reviews, review_to_export), media_type=NDJSON_MEDIA_TYPE)
+
+
 @router.get('/{film_id}', response_model=list[FilmReviewResponse])
 async def get_film_reviews(
     film_id: uuid.UUID,
     pqp: PaginateQueryParams = Depends(PaginateQueryParams),
+    sort: ReviewSort = Query(
+        'newest',
+        description='Порядок отзывов: newest - новые, highest_score - с наибольшей оценкой, most_helpful - по лайкам',
+    ),
     film_review_service: FilmReviewsService = Depends(get_film_review_service),
-) -> list[FilmReviewResponse]:
-    """Получает отзывы о фильме по его id."""
-    film_reviews = await film_review_service.get_reviews_for_film(
+) -> ORJSONResponse:
+    """
+    Получает отзывы о фильме по его id в выбранном порядке (по умолчанию начиная с новых).
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Отзывы сериализуются напрямую из документов MongoDB, response_model задает только схему ответа.
+    """
+    film_reviews, next_cursor = await film_review_service.get_reviews_for_film(
         film_id,
         page_number=pqp.page_number,
         page_size=pqp.page_size,
+        cursor=pqp.cursor,
+        review_sort=sort,
     )
     if not film_reviews:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='film review not found')
-    return [FilmReviewResponse(review_id=str(review.get('_id')), **review) for review in film_reviews]
+    response = ORJSONResponse([review_to_response(review) for review in film_reviews])
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@router.get('/{film_id}/search', response_model=list[FilmReviewSearchResult])
+async def search_film_reviews(
+    film_id: uuid.UUID,
+    sqp: SearchQueryParams = Depends(SearchQueryParams),
+    film_review_service: FilmReviewsService = Depends(get_film_review_service),
+) -> ORJSONResponse:
+    """Ищет отзывы о фильме по словам из текста отзыва, начиная с наиболее релевантных."""
+    film_reviews = await film_review_service.search_reviews(
+        film_id,
+        sqp.query,
+        page_number=sqp.page_number,
+        page_size=sqp.page_size,
+    )
+    if not film_reviews:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='film review not found')
+    return ORJSONResponse([review_to_search_result(review) for review in film_reviews])
 
 
 @router.post('/{film_id}')
@@ -36,10 +83,12 @@ async def add_film_review(
     film_review_request: FilmReviewRequest = Body(),
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
     film_review_service: FilmReviewsService = Depends(get_film_review_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
 ) -> str:
     """Добавляет отзыв о фильме по его id."""
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    result = await film_review_service.add_review(
+    # В режиме приема событий запись публикуется в журнал событий
+    result = await (ugc_events_service or film_review_service).add_review(
         film_id=film_id,
         review_text=film_review_request.review_text,
         user_id=user_id,
@@ -60,10 +109,11 @@ async def delete_film_review(
     review_id: str,
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
     film_review_service: FilmReviewsService = Depends(get_film_review_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
 ) -> str:
     """Удаляет отзыв о фильме по id отзыва."""
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    result = await film_review_service.delete_review(user_id=user_id, review_id=review_id)
+    result = await (ugc_events_service or film_review_service).delete_review(user_id=user_id, review_id=review_id)
     if result is None or result == 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Review not delete')
     return Response(  # type: ignore[no-any-return]
@@ -79,15 +129,28 @@ async def edit_film_review(
     review_update: ReviewUpdate,
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
     film_review_service: FilmReviewsService = Depends(get_film_review_service),
-) -> FilmReviewResponse:
-    """Редактирует отзыв о фильме по id отзыва."""
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
+) -> FilmReviewResponse | Response:
+    """
+    Редактирует отзыв о фильме по id отзыва.
+
+    В режиме приема событий редактирование публикуется в журнал событий и применяется потребителем
+    в порядке запросов вместе с добавлением и удалением отзыва, поэтому ответ 202 не содержит отзыва.
+    """
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    updated_review = await film_review_service.update_review(
+    updated_review = await (ugc_events_service or film_review_service).update_review(
         user_id=user_id,
         review_id=review_id,
         new_review_text=review_update.review_text,
         new_film_score=review_update.film_score,
     )
-    if updated_review is None:
+    if not updated_review:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Review not update')
-    return FilmReviewResponse(review_id=str(updated_review.get('_id')), **updated_review)
+    if isinstance(updated_review, str):
+        # Редактирование принято в журнал событий
+        return Response(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=orjson.dumps({'message': 'Ok'}),
+            media_type='application/json',
+        )
+    return FilmReviewResponse.model_validate(review_to_response(updated_review))
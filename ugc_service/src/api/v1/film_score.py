@@ -5,34 +5,62 @@ import uuid
 
 import orjson
 from api.utils.extensions import is_authenticated
-from api.utils.response_models import FilmAverageScore, FilmScore
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, Response, status
+from api.utils.response_models import (
+    BulkItemStatus,
+    FilmAverageScore,
+    FilmsAverageScore,
+    FilmScore,
+    FilmScoresBatch,
+)
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response, status
 from services.film_score import FilmScoreService, get_film_score_service
+from services.ugc_events import UgcEventsService, get_ugc_events_service
 
 router = APIRouter()
 
 
+@router.get('/', response_model=list[FilmsAverageScore])
+async def get_films_scores(
+    film_ids: list[uuid.UUID] = Query(
+        alias='film_id',
+        title='UUID фильмов',
+        description='UUID фильмов (параметр повторяется для каждого фильма, не больше 100)',
+        min_length=1,
+        max_length=100,
+    ),
+    score_service: FilmScoreService = Depends(get_film_score_service),
+) -> list[FilmsAverageScore]:
+    """Получает средние оценки нескольких фильмов одним запросом (для страниц каталога)."""
+    films_scores = await score_service.get_scores(film_ids)
+    return [
+        FilmsAverageScore.model_validate({'film_id': film_id, **(film_score or {})})
+        for film_id, film_score in films_scores.items()
+    ]
+
+
 @router.get('/{film_id}', response_model=FilmAverageScore)
 async def get_film_score(
     film_id: uuid.UUID = Path(title='UUID фильма', example='a5a8f573-3cee-4ccc-8a2b-91cb9f55250a'),
     score_service: FilmScoreService = Depends(get_film_score_service),
 ) -> FilmAverageScore:
     """Получает среднюю оценку фильма по его id."""
-    average_film_score = await score_service.get_score(film_id)
-    if average_film_score is None:
+    film_score_stats = await score_service.get_score(film_id)
+    if film_score_stats is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Фильм еще никто не оценил')
-    return FilmAverageScore(average_film_score=average_film_score)
+    return FilmAverageScore.model_validate(film_score_stats)
 
 
 @router.post('/')
 async def add_film_score(
     film_score: FilmScore = Body(),
     score_service: FilmScoreService = Depends(get_film_score_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
 ) -> str:
     """Добавляет оценку к фильму."""
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    result = await score_service.add_score(film_score.film_id, user_id, film_score.film_score)
+    # В режиме приема событий запись публикуется в журнал событий
+    result = await (ugc_events_service or score_service).add_score(film_score.film_id, user_id, film_score.film_score)
     if not result:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='error when adding a record')
     return Response(  # type: ignore[no-any-return]
@@ -42,15 +70,31 @@ async def add_film_score(
     )
 
 
+@router.post('/batch', response_model=list[BulkItemStatus])
+async def add_film_scores(
+    scores_batch: FilmScoresBatch,
+    score_service: FilmScoreService = Depends(get_film_score_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+) -> list[BulkItemStatus]:
+    """Добавляет или обновляет оценки нескольких фильмов и возвращает статус записи каждой оценки."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    # При повторе фильма в пакете учитывается последняя оценка
+    film_scores = {film_score.film_id: film_score.film_score for film_score in scores_batch.scores}
+    statuses = await (ugc_events_service or score_service).add_scores(film_scores, user_id)
+    return [BulkItemStatus(film_id=film_id, status=item_status) for film_id, item_status in statuses.items()]
+
+
 @router.delete('/{film_id}')
 async def delete_film_score(
     film_id: uuid.UUID = Path(title='UUID фильма', example='a5a8f573-3cee-4ccc-8a2b-91cb9f55250a'),
     score_service: FilmScoreService = Depends(get_film_score_service),
+    ugc_events_service: UgcEventsService | None = Depends(get_ugc_events_service),
     token_sub: dict[str, typing.Any] = Depends(is_authenticated),
 ) -> str:
     """Удаляет оценку фильма по его id."""
     user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
-    result = await score_service.delete_score(film_id, user_id)
+    result = await (ugc_events_service or score_service).delete_score(film_id, user_id)
     if result is None or result == 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='error deleting a record')
     return Response(  # type: ignore[no-any-return]
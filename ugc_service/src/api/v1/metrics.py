@@ -0,0 +1,36 @@
+"""Модуль с метриками внутреннего состояния сервиса."""
+
+import typing
+
+from core.cache import caches
+from db.mongo import indexes, write_behind
+from db.mongo.pool_monitor import pool_monitor
+from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get('/cache')
+async def get_cache_stats() -> dict[str, dict[str, int | float]]:
+    """Возвращает счетчики попаданий, промахов и вытеснений in-process кэшей воркера."""
+    return {cache_name: cache.stats() for cache_name, cache in caches.items()}
+
+
+@router.get('/mongo_pool')
+async def get_mongo_pool_stats() -> dict[str, dict[str, typing.Any]]:
+    """Возвращает счетчики пула соединений MongoDB воркера: открытые и занятые соединения, время ожидания."""
+    return pool_monitor.stats()
+
+
+@router.get('/write_behind')
+async def get_write_behind_stats() -> dict[str, dict[str, int]]:
+    """Возвращает счетчики очереди отложенной записи закладок воркера."""
+    if write_behind.bookmarks_queue is None:
+        return {}
+    return {write_behind.bookmarks_queue.collection_name: write_behind.bookmarks_queue.stats()}
+
+
+@router.get('/indexes')
+async def get_index_reports() -> dict[str, indexes.IndexReport]:
+    """Возвращает результат последней сверки индексов коллекций воркера: недостающие, измененные и лишние индексы."""
+    return indexes.index_reports
@@ -0,0 +1,53 @@
+"""Модуль для реакций пользователя (лайков и дизлайков) на отзывы фильмов."""
+
+import typing
+import uuid
+
+import orjson
+from api.utils.extensions import is_authenticated
+from api.utils.response_models import ReviewReactionRequest
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from services.review_reactions import ReviewReactionsService, get_review_reactions_service
+
+router = APIRouter()
+
+
+@router.put('/{review_id}/reaction')
+async def set_review_reaction(
+    review_id: str,
+    review_reaction: ReviewReactionRequest = Body(),
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+    reactions_service: ReviewReactionsService = Depends(get_review_reactions_service),
+) -> Response:
+    """Ставит лайк или дизлайк отзыву по id отзыва (повторная реакция заменяет предыдущую)."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    result = await reactions_service.set_reaction(review_id, user_id, review_reaction.reaction)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='film review not found')
+    if not result:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Reaction is not set.')
+    return Response(
+        status_code=status.HTTP_200_OK,
+        content=orjson.dumps({'message': 'Ok'}),
+        media_type='application/json',
+    )
+
+
+@router.delete('/{review_id}/reaction')
+async def delete_review_reaction(
+    review_id: str,
+    token_sub: dict[str, typing.Any] = Depends(is_authenticated),
+    reactions_service: ReviewReactionsService = Depends(get_review_reactions_service),
+) -> Response:
+    """Снимает реакцию пользователя с отзыва по id отзыва."""
+    user_id: uuid.UUID = uuid.UUID(token_sub.get('user_id'))
+    result = await reactions_service.delete_reaction(review_id, user_id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='review reaction not found')
+    if not result:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Reaction not delete')
+    return Response(
+        status_code=status.HTTP_200_OK,
+        content=orjson.dumps({'message': 'Ok'}),
+        media_type='application/json',
+    )
@@ -0,0 +1,46 @@
+"""Общий код команд заполнения поля записей, добавленных до его появления.
+
+Записи без поля выбираются пачками по _id и обновляются одним запросом на пачку.
+"""
+
+import typing
+
+from core.config import settings
+from db.mongo import mongo_rep, mongo_storage  # type: ignore[attr-defined]
+from loguru import logger
+
+# Обновление записей пачки: документ обновления или конвейер обновления
+BackfillUpdate = dict[str, typing.Any] | list[dict[str, typing.Any]]
+
+
+async def backfill_batch(
+    repository: mongo_rep.MongoRepository,
+    collection_name: str,
+    field_name: str,
+    update: BackfillUpdate,
+    batch_size: int,
+) -> int:
+    """Заполняет поле пачки записей без него и возвращает количество обработанных записей."""
+    entries = await repository.find_all(
+        collection_name,
+        {field_name: {'$exists': False}},
+        page_size=batch_size,
+        page_number=1,
+        sort=[('_id', 1)],
+        projection={'_id': 1},
+    )
+    if not entries:
+        return 0
+    entry_ids: list[typing.Any] = [entry['_id'] for entry in entries]
+    if await repository.update_many(collection_name, {'_id': {'$in': entry_ids}}, update) is None:
+        raise RuntimeError(f'Backfill of the collection: {collection_name} failed')
+    logger.info(f'Backfilled {len(entries)} entries of the collection: {collection_name}')
+    return len(entries)
+
+
+async def backfill_field(collection_name: str, field_name: str, update: BackfillUpdate, batch_size: int) -> None:
+    """Подключается к MongoDB и заполняет поле всех записей коллекции без него."""
+    await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    while await backfill_batch(mongo_rep.get_repository(), collection_name, field_name, update, batch_size):
+        logger.debug(f'Next batch of the collection: {collection_name}')
+    await mongo_storage.on_shutdown()
@@ -0,0 +1,28 @@
+"""Команда заполнения времени добавления (created_at) закладок, добавленных до появления этого поля.
+
+Время добавления берется из ObjectId закладки. Записи обрабатываются пачками по _id.
+Запуск: python -m commands.backfill_bookmarks [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from commands.backfill import backfill_field
+from loguru import logger
+
+COLLECTION_NAME = 'film_bookmarks'
+
+# Конвейер обновления, заполняющий время добавления по времени создания ObjectId
+CREATED_AT_UPDATE = ({'$set': {'created_at': {'$toDate': '$_id'}}},)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Заполнение времени добавления закладок.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Количество записей в пачке')
+    args = parser.parse_args()
+    try:
+        asyncio.run(backfill_field(COLLECTION_NAME, 'created_at', list(CREATED_AT_UPDATE), args.batch_size))
+    except RuntimeError as er:
+        logger.error(er)
+        sys.exit(1)
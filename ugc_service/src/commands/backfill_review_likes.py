@@ -0,0 +1,26 @@
+"""Команда заполнения количества лайков (likes) отзывов, добавленных до появления этого поля.
+
+Без поля отзыв не попадает на следующие страницы выборки отзывов по курсору в порядке most_helpful.
+Записи обрабатываются пачками по _id.
+Запуск: python -m commands.backfill_review_likes [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from commands.backfill import backfill_field
+from loguru import logger
+
+COLLECTION_NAME = 'film_reviews'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Заполнение количества лайков отзывов.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Количество записей в пачке')
+    args = parser.parse_args()
+    try:
+        asyncio.run(backfill_field(COLLECTION_NAME, 'likes', {'$set': {'likes': 0}}, args.batch_size))
+    except RuntimeError as er:
+        logger.error(er)
+        sys.exit(1)
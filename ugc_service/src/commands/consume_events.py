@@ -0,0 +1,39 @@
+"""Команда потребителя журнала событий (режим приема UGC_INGESTION_MODE=events с файловым журналом).
+
+Читает события из файла EVENT_LOG_PATH пачками и записывает их в MongoDB, пока не будет остановлен.
+Запуск: python -m commands.consume_events [--once]
+"""
+
+import argparse
+import asyncio
+import signal
+
+from core.config import settings
+from db import event_log
+from db.mongo import mongo_rep, mongo_storage  # type: ignore[attr-defined]
+from loguru import logger
+from services.event_consumer import EventConsumer
+
+
+async def consume_events(is_once: bool) -> None:
+    """Подключается к MongoDB и применяет события журнала до остановки или однократно."""
+    await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    ugc_event_log = event_log.FileEventLog(settings.event_log_path)
+    consumer = EventConsumer(ugc_event_log, mongo_rep.get_repository())
+    stop_event = asyncio.Event()
+    if is_once:
+        stop_event.set()
+    else:
+        for stop_signal in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(stop_signal, stop_event.set)
+    logger.info(f'Consuming events from: {settings.event_log_path}')
+    await consumer.run(stop_event)
+    ugc_event_log.close()
+    await mongo_storage.on_shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Потребитель журнала событий закладок, оценок и отзывов.')
+    parser.add_argument('--once', action='store_true', help='Применить накопленные события и завершиться')
+    args = parser.parse_args()
+    asyncio.run(consume_events(args.once))
@@ -0,0 +1,72 @@
+"""Команда перевода оценок фильмов, сохраненных строками, в числа (double).
+
+Валидатор схемы коллекций film_score и film_reviews (уровень moderate) не проверяет изменения записей,
+уже нарушающих схему, поэтому команду можно запускать на работающем сервисе.
+Записи обрабатываются пачками по _id.
+Запуск: python -m commands.migrate_scores [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import sys
+import typing
+
+from core.config import settings
+from db.mongo import mongo_rep, mongo_storage  # type: ignore[attr-defined]
+from loguru import logger
+
+COLLECTION_NAMES = ('film_score', 'film_reviews')
+
+# Конвейер обновления, переводящий строковую оценку в число на стороне MongoDB
+SCORE_UPDATE = ({'$set': {'film_score': {'$toDouble': '$film_score'}}},)
+
+
+async def migrate_batch(
+    repository: mongo_rep.MongoRepository,
+    collection_name: str,
+    batch_size: int,
+) -> bool:
+    """Переводит в числа оценки пачки записей и возвращает признак наличия обработанных записей."""
+    query = {'film_score': {'$type': 'string'}}
+    entries = await repository.find_all(
+        collection_name,
+        query,
+        page_size=batch_size,
+        page_number=1,
+        sort=[('_id', 1)],
+        projection={'_id': 1},
+    )
+    if not entries:
+        return False
+    entry_ids: list[typing.Any] = [entry['_id'] for entry in entries]
+    if await repository.update_many(collection_name, {'_id': {'$in': entry_ids}}, list(SCORE_UPDATE)) is None:
+        raise RuntimeError(f'Score migration of the collection: {collection_name} failed')
+    logger.info(f'Migrated {len(entries)} scores of the collection: {collection_name}')
+    return True
+
+
+async def migrate_collection(repository: mongo_rep.MongoRepository, collection_name: str, batch_size: int) -> None:
+    """Переводит в числа оценки всех записей коллекции."""
+    while await migrate_batch(repository, collection_name, batch_size):
+        logger.debug(f'Next batch of scores of the collection: {collection_name}')
+
+
+async def migrate_scores(batch_size: int) -> None:
+    """Подключается к MongoDB и переводит в числа оценки всех коллекций."""
+    await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    repository = mongo_rep.get_repository()
+    await asyncio.gather(
+        *(migrate_collection(repository, collection_name, batch_size) for collection_name in COLLECTION_NAMES),
+    )
+    await mongo_storage.on_shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Перевод строковых оценок фильмов в числа.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Количество записей в пачке')
+    args = parser.parse_args()
+    try:
+        asyncio.run(migrate_scores(args.batch_size))
+    except RuntimeError as er:
+        logger.error(er)
+        sys.exit(1)
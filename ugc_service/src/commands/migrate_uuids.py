@@ -0,0 +1,96 @@
+"""Команда миграции UUID (film_id, user_id) из строк в BSON Binary subtype 4.
+
+Порядок миграции: перезапустить сервис с MONGO_UUID_STORAGE=mixed (новые записи сохраняются в бинарном виде,
+запросы находят оба формата), выполнить команду, затем перезапустить сервис с MONGO_UUID_STORAGE=binary.
+Записи обрабатываются пачками по _id. Строковая запись, для которой уже есть бинарная копия,
+удаляется. После миграции сводка оценок пересчитывается.
+Запуск: python -m commands.migrate_uuids [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import sys
+import typing
+import uuid
+
+from core.config import settings
+from db.mongo import mongo_rep, mongo_storage  # type: ignore[attr-defined]
+from db.mongo.uuids import UUID_FIELDS, UUID_STORAGE_STRING
+from loguru import logger
+from pymongo import UpdateOne
+from services.film_score_summary import FilmScoreSummaryService
+
+COLLECTION_NAMES = ('film_bookmarks', 'film_score', 'film_reviews')
+
+
+def get_uuid_update(entry: dict[str, typing.Any]) -> UpdateOne:
+    """Возвращает операцию перевода строковых UUID записи в бинарный вид."""
+    uuid_fields = {}
+    for field in UUID_FIELDS:
+        if isinstance(entry.get(field), str):
+            uuid_fields[field] = uuid.UUID(entry[field])
+    return UpdateOne({'_id': entry['_id']}, {'$set': uuid_fields})
+
+
+async def migrate_batch(
+    repository: mongo_rep.MongoRepository,
+    collection_name: str,
+    last_id: typing.Any,
+    batch_size: int,
+) -> typing.Any:
+    """Переводит в бинарный вид UUID пачки записей после last_id и возвращает _id последней записи пачки."""
+    query: dict[str, typing.Any] = {'$or': [{field: {'$type': 'string'}} for field in UUID_FIELDS]}
+    if last_id is not None:
+        query['_id'] = {'$gt': last_id}
+    entries = await repository.find_all(
+        collection_name,
+        query,
+        page_size=batch_size,
+        page_number=1,
+        sort=[('_id', 1)],
+        projection=dict.fromkeys(UUID_FIELDS, 1),
+    )
+    if not entries:
+        return None
+    write_errors = await repository.bulk_write(collection_name, [get_uuid_update(entry) for entry in entries])
+    if write_errors is None:
+        raise RuntimeError(f'UUID migration of the collection: {collection_name} failed')
+    # Бинарная копия записи уже добавлена сервисом в смешанном режиме, строковая запись больше не нужна
+    duplicate_ids = [
+        entries[index]['_id']
+        for index, error_code in write_errors.items()
+        if error_code == mongo_rep.DUPLICATE_KEY_ERROR_CODE
+    ]
+    if duplicate_ids:
+        await repository.delete_many(collection_name, {'_id': {'$in': duplicate_ids}})
+    logger.info(f'Migrated {len(entries)} entries of the collection: {collection_name}')
+    return entries[-1]['_id']
+
+
+async def migrate_collection(repository: mongo_rep.MongoRepository, collection_name: str, batch_size: int) -> None:
+    """Переводит в бинарный вид UUID всех записей коллекции."""
+    last_id = await migrate_batch(repository, collection_name, None, batch_size)
+    while last_id is not None:
+        last_id = await migrate_batch(repository, collection_name, last_id, batch_size)
+
+
+async def migrate_uuids(batch_size: int) -> bool:
+    """Подключается к MongoDB, переводит UUID всех коллекций в бинарный вид и пересчитывает сводку оценок."""
+    if settings.mongo_uuid_storage == UUID_STORAGE_STRING:
+        logger.error('UUID migration requires MONGO_UUID_STORAGE=mixed, otherwise strings are written again')
+        return False
+    await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    repository = mongo_rep.get_repository()
+    await asyncio.gather(
+        *(migrate_collection(repository, collection_name, batch_size) for collection_name in COLLECTION_NAMES),
+    )
+    is_rebuilt = await FilmScoreSummaryService(repository).rebuild()
+    await mongo_storage.on_shutdown()
+    return is_rebuilt
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Миграция UUID из строк в BSON Binary subtype 4.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Количество записей в пачке')
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(migrate_uuids(args.batch_size)) else 1)
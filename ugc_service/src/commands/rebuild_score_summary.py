@@ -0,0 +1,30 @@
+"""Команда пересчета сводки оценок фильмов film_score_summary по коллекции film_score.
+
+Используется для первичного заполнения сводки и исправления расхождений счетчиков.
+Запуск: python -m commands.rebuild_score_summary [--film-id UUID]
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+
+from core.config import settings
+from db.mongo import mongo_rep, mongo_storage  # type: ignore[attr-defined]
+from services.film_score_summary import FilmScoreSummaryService
+
+
+async def rebuild_score_summary(film_id: uuid.UUID | None) -> bool:
+    """Подключается к MongoDB и пересчитывает сводку оценок."""
+    await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    summary_service = FilmScoreSummaryService(mongo_rep.get_repository())
+    is_rebuilt = await summary_service.rebuild(film_id)
+    await mongo_storage.on_shutdown()
+    return is_rebuilt
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Пересчет сводки оценок фильмов film_score_summary.')
+    parser.add_argument('--film-id', type=uuid.UUID, default=None, help='UUID фильма (по умолчанию все фильмы)')
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(rebuild_score_summary(args.film_id)) else 1)
@@ -0,0 +1,41 @@
+"""Команда сверки индексов коллекций с описанием db.mongo.indexes.
+
+Недостающие индексы создаются (без --check), расхождения и лишние индексы выводятся в лог.
+Код возврата 1, если после сверки остались недостающие или отличающиеся от описания индексы.
+Запуск: python -m commands.reconcile_indexes [--check]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from core.config import settings
+from db.mongo import indexes, mongo_storage  # type: ignore[attr-defined]
+from motor.motor_asyncio import AsyncIOMotorClient
+
+
+async def reconcile_indexes(is_check: bool) -> bool:
+    """Подключается к MongoDB, сверяет индексы и возвращает признак их соответствия описанию."""
+    mongo_client = AsyncIOMotorClient(
+        [f'{settings.mongo_host}:{settings.mongo_port}'],
+        **mongo_storage.get_client_options(),
+    )
+    db = mongo_client[settings.mongo_db]
+    if is_check:
+        collections_indexes = await indexes.list_indexes(db)
+        reports = {
+            collection_name: indexes.compare_indexes(indexes.INDEX_SPECS[collection_name], collection_indexes)
+            for collection_name, collection_indexes in collections_indexes.items()
+        }
+        indexes.log_index_drift(reports)
+    else:
+        reports = await indexes.reconcile_indexes(db, is_background=False)
+    mongo_client.close()
+    return not any(report['missing'] or report['drifted'] for report in reports.values())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сверка индексов коллекций.')
+    parser.add_argument('--check', action='store_true', help='Только проверить индексы, не создавая недостающие')
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(reconcile_indexes(args.check)) else 1)
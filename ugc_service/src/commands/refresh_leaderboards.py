@@ -0,0 +1,23 @@
+"""Команда пересчета рейтингов фильмов (для запуска по расписанию при LEADERBOARD_REFRESH_INTERVAL=0).
+
+Запуск: python -m commands.refresh_leaderboards
+"""
+
+import asyncio
+import sys
+
+from core.config import settings
+from db.mongo import mongo_rep, mongo_storage  # type: ignore[attr-defined]
+from services.film_leaderboards import FilmLeaderboardsService
+
+
+async def refresh_leaderboards() -> bool:
+    """Подключается к MongoDB и пересчитывает рейтинги фильмов."""
+    await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    is_refreshed = await FilmLeaderboardsService(mongo_rep.get_repository()).refresh()
+    await mongo_storage.on_shutdown()
+    return is_refreshed
+
+
+if __name__ == '__main__':
+    sys.exit(0 if asyncio.run(refresh_leaderboards()) else 1)
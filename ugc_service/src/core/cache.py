@@ -0,0 +1,193 @@
+"""Модуль in-process кэша с ограничением размера и временем жизни записей."""
+
+import asyncio
+import functools
+import time
+import typing
+from collections import OrderedDict
+
+from core.config import settings
+
+_MISSING = object()
+
+
+class AsyncTTLCache:
+    """
+    LRU-кэш с временем жизни записей для asyncio.
+
+    Одновременные запросы одного отсутствующего ключа объединяются: загрузка выполняется один раз,
+    остальные запросы ждут ее результат. Записи объединяются в группы (например, по film_id),
+    чтобы инвалидировать все записи фильма при его изменении.
+    Кэш локален для процесса, поэтому время жизни ограничивает устаревание данных в остальных воркерах.
+    При нулевом времени жизни значения не сохраняются, но одновременные загрузки по-прежнему объединяются.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Инициализирует кэш."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[typing.Hashable, tuple[float, typing.Hashable, typing.Any]] = OrderedDict()
+        self._groups: dict[typing.Hashable, set[typing.Hashable]] = {}
+        self._generations: dict[typing.Hashable, int] = {}
+        self._in_flight: dict[typing.Hashable, asyncio.Future[typing.Any]] = {}
+        self._in_flight_groups: dict[typing.Hashable, typing.Hashable] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        """Возвращает значение из кэша или default, если записи нет или ее время жизни истекло."""
+        cache_value = self._lookup(key)
+        if cache_value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return cache_value
+
+    def set(
+        self,
+        key: typing.Hashable,
+        cache_value: typing.Any,
+        group: typing.Hashable = None,
+        ttl: float | None = None,
+    ) -> None:
+        """Сохраняет значение в кэш, вытесняя самые давно использованные записи при переполнении."""
+        if key in self._entries:
+            self._remove(key)
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, group, cache_value)
+        self._groups.setdefault(group, set()).add(key)
+        while len(self._entries) > self.max_size:
+            evicted_key = next(iter(self._entries))
+            self._remove(evicted_key)
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        key: typing.Hashable,
+        loader: typing.Callable[[], typing.Awaitable[typing.Any]],
+        group: typing.Hashable = None,
+        ttl: float | None = None,
+    ) -> typing.Any:
+        """Возвращает значение из кэша, а при его отсутствии загружает его один раз для всех ожидающих."""
+        cache_value = self._lookup(key)
+        if cache_value is not _MISSING:
+            self.hits += 1
+            return cache_value
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            self.misses += 1
+            in_flight = asyncio.ensure_future(loader())
+            self._in_flight[key] = in_flight
+            self._in_flight_groups[key] = group
+            in_flight.add_done_callback(
+                functools.partial(self._on_loaded, key, group, ttl, self._generations.get(group, 0)),
+            )
+        else:
+            self.coalesced += 1
+        # Отмена одного из запросов не должна отменять загрузку для остальных
+        return await asyncio.shield(in_flight)
+
+    def update(
+        self,
+        key: typing.Hashable,
+        updater: typing.Callable[[typing.Any], None],
+        group: typing.Hashable,
+    ) -> None:
+        """
+        Изменяет значение записи на месте, если она есть в кэше.
+
+        Если записи нет, результаты загрузок группы, начатых до изменения, не сохраняются в кэш.
+        """
+        cache_value = self._lookup(key)
+        if cache_value is _MISSING:
+            self.invalidate_group(group)
+        else:
+            updater(cache_value)
+
+    def invalidate(self, key: typing.Hashable) -> None:
+        """Удаляет запись из кэша."""
+        if key in self._entries:
+            self._remove(key)
+
+    def invalidate_group(self, group: typing.Hashable) -> None:
+        """Удаляет все записи группы, в том числе результаты загрузок, начатых до инвалидации."""
+        self._generations[group] = self._generations.get(group, 0) + 1
+        for key in list(self._groups.get(group, ())):
+            self._remove(key)
+        # Новые запросы не должны ждать загрузку, начатую до изменения данных
+        for key, key_group in list(self._in_flight_groups.items()):
+            if key_group == group:
+                self._in_flight.pop(key)
+                self._in_flight_groups.pop(key)
+
+    def stats(self) -> dict[str, int | float]:
+        """Возвращает счетчики попаданий, промахов и вытеснений."""
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+        }
+
+    def _lookup(self, key: typing.Hashable) -> typing.Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, _, cache_value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return _MISSING
+        self._entries.move_to_end(key)
+        return cache_value
+
+    def _remove(self, key: typing.Hashable) -> None:
+        _, group, _ = self._entries.pop(key)
+        group_keys = self._groups.get(group)
+        if group_keys is not None:
+            group_keys.discard(key)
+            if not group_keys:
+                self._groups.pop(group)
+
+    def _on_loaded(
+        self,
+        key: typing.Hashable,
+        group: typing.Hashable,
+        ttl: float | None,
+        generation: int,
+        in_flight: asyncio.Future[typing.Any],
+    ) -> None:
+        if self._in_flight.get(key) is in_flight:
+            self._in_flight.pop(key)
+            self._in_flight_groups.pop(key)
+        if in_flight.cancelled() or in_flight.exception() is not None:
+            return
+        if self._generations.get(group, 0) == generation:
+            self.set(key, in_flight.result(), group=group, ttl=ttl)
+
+
+film_score_cache = AsyncTTLCache(settings.film_score_cache_size, settings.film_score_cache_ttl)
+film_reviews_cache = AsyncTTLCache(settings.film_reviews_cache_size, settings.film_reviews_cache_ttl)
+bookmarks_cache = AsyncTTLCache(settings.bookmarks_cache_size, settings.bookmarks_cache_ttl)
+# Время жизни записей задается при сохранении по времени истечения токена
+auth_token_cache = AsyncTTLCache(settings.auth_token_cache_size, settings.auth_token_cache_ttl)
+
+caches: dict[str, AsyncTTLCache] = {
+    'film_score': film_score_cache,
+    'film_reviews': film_reviews_cache,
+    'bookmarks': bookmarks_cache,
+    'auth_token': auth_token_cache,
+}
+
+
+def invalidate_film(film_id: typing.Any) -> None:
+    """Удаляет из кэшей оценки и отзывы фильма после их изменения."""
+    for cache in caches.values():
+        cache.invalidate_group(str(film_id))
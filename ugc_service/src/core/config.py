@@ -23,12 +23,90 @@ class Settings(BaseSettings):
     sentry_traces_sample_rate: float = Field(1.0, env='SENTRY_TRACES_SAMPLE_RATE')
     base_dir: Path = Path(__file__).resolve().parent.parent
     auth_server_url: str = Field('http://nginx/api/v1/auth', env='AUTH_URL')
+    # Пользователь-заглушка для разработки и тестов (пустое значение - аутентификация через сервис auth)
+    auth_stub_user_id: str = Field('', env='AUTH_STUB_USER_ID')
+    auth_timeout: float = Field(5.0, env='AUTH_TIMEOUT')
+    auth_max_connections: int = Field(100, env='AUTH_MAX_CONNECTIONS')
+    auth_token_cache_size: int = Field(10000, env='AUTH_TOKEN_CACHE_SIZE')
+    auth_token_cache_ttl: float = Field(3600, env='AUTH_TOKEN_CACHE_TTL')
+    auth_jwt_verify_locally: bool = Field(False, env='AUTH_JWT_VERIFY_LOCALLY')
+    auth_jwt_key: str = Field('', env='AUTH_JWT_KEY')
+    auth_jwt_algorithms: str = Field('RS256', env='AUTH_JWT_ALGORITHMS')
+    auth_jwks_url: str = Field('', env='AUTH_JWKS_URL')
+    auth_jwks_ttl: float = Field(3600, env='AUTH_JWKS_TTL')
+    auth_jwks_refresh_interval: float = Field(60, env='AUTH_JWKS_REFRESH_INTERVAL')
 
     mongo_db: str = Field('ugc2_movies', env='MONGO_DB')
     mongo_username: str = Field('root', env='MONGO_LOGIN')
     mongo_password: str = Field('example', env='MONGO_PASSWORD')
     mongo_host: str = Field('localhost', env='MONGO_HOST')
     mongo_port: int = Field(27017, env='MONGO_PORT')
+    mongo_transactions: bool = Field(False, env='MONGO_TRANSACTIONS')
+    # Параметры пула соединений и клиента MongoDB (0 - значение драйвера по умолчанию)
+    mongo_max_pool_size: int = Field(100, env='MONGO_MAX_POOL_SIZE')
+    mongo_min_pool_size: int = Field(0, env='MONGO_MIN_POOL_SIZE')
+    mongo_max_idle_time_ms: int = Field(0, env='MONGO_MAX_IDLE_TIME_MS')
+    mongo_wait_queue_timeout_ms: int = Field(0, env='MONGO_WAIT_QUEUE_TIMEOUT_MS')
+    mongo_server_selection_timeout_ms: int = Field(30000, env='MONGO_SERVER_SELECTION_TIMEOUT_MS')
+    mongo_compressors: str = Field('', env='MONGO_COMPRESSORS')
+    mongo_read_preference: str = Field('primary', env='MONGO_READ_PREFERENCE')
+    mongo_write_concern: str = Field('1', env='MONGO_WRITE_CONCERN')
+    # Чтение списков и оценок со вторичных узлов replica set (secondaryPreferred).
+    # Выключено по умолчанию: данные, перечитанные после сброса кэша, не должны быть старше записи
+    mongo_secondary_reads: bool = Field(False, env='MONGO_SECONDARY_READS')
+    mongo_max_staleness_seconds: int = Field(90, env='MONGO_MAX_STALENESS_SECONDS')
+    mongo_stream_batch_size: int = Field(1000, env='MONGO_STREAM_BATCH_SIZE')
+    # Формат хранения UUID: string, mixed (на время миграции) или binary
+    mongo_uuid_storage: str = Field('string', env='MONGO_UUID_STORAGE')
+    # Сверка индексов с описанием при запуске (иначе только командой commands.reconcile_indexes)
+    mongo_reconcile_indexes: bool = Field(True, env='MONGO_RECONCILE_INDEXES')
+    # Отложенная запись закладок: запрос подтверждается после попадания операции в очередь
+    bookmarks_write_behind: bool = Field(False, env='BOOKMARKS_WRITE_BEHIND')
+    write_behind_queue_size: int = Field(10000, env='WRITE_BEHIND_QUEUE_SIZE')
+    write_behind_batch_size: int = Field(500, env='WRITE_BEHIND_BATCH_SIZE')
+    write_behind_flush_interval: float = Field(0.5, env='WRITE_BEHIND_FLUSH_INTERVAL')
+    # Повторы записи пакета при недоступности MongoDB: задержка удваивается с каждой попыткой
+    write_behind_max_retries: int = Field(5, env='WRITE_BEHIND_MAX_RETRIES')
+    write_behind_retry_delay: float = Field(0.5, env='WRITE_BEHIND_RETRY_DELAY')
+    # Режим приема записей: direct (запись в MongoDB) или events (публикация событий в журнал)
+    ugc_ingestion_mode: str = Field('direct', env='UGC_INGESTION_MODE')
+    # Бэкенд журнала событий: memory (потребитель работает внутри сервиса) или file
+    event_log_backend: str = Field('file', env='EVENT_LOG_BACKEND')
+    event_log_path: str = Field('/tmp/ugc_events.ndjson', env='EVENT_LOG_PATH')
+    # Размер подтвержденной части файла журнала, после которого журнал сжимается
+    event_log_compact_size: int = Field(67108864, env='EVENT_LOG_COMPACT_SIZE')
+    event_consumer_batch_size: int = Field(500, env='EVENT_CONSUMER_BATCH_SIZE')
+    event_consumer_poll_interval: float = Field(1, env='EVENT_CONSUMER_POLL_INTERVAL')
+    # Неудавшаяся пачка событий повторяется с удвоением задержки, после остановки - не больше
+    # EVENT_CONSUMER_MAX_RETRIES раз
+    event_consumer_max_retries: int = Field(5, env='EVENT_CONSUMER_MAX_RETRIES')
+    event_consumer_retry_delay: float = Field(0.5, env='EVENT_CONSUMER_RETRY_DELAY')
+    # Время хранения ключей идемпотентности обработанных событий
+    event_idempotency_ttl: int = Field(604800, env='EVENT_IDEMPOTENCY_TTL')
+
+    film_score_cache_size: int = Field(10000, env='FILM_SCORE_CACHE_SIZE')
+    film_score_cache_ttl: float = Field(0, env='FILM_SCORE_CACHE_TTL')
+    film_reviews_cache_size: int = Field(2000, env='FILM_REVIEWS_CACHE_SIZE')
+    film_reviews_cache_ttl: float = Field(0, env='FILM_REVIEWS_CACHE_TTL')
+    # Множества закладок пользователей для проверки наличия фильмов в закладках
+    bookmarks_cache_size: int = Field(10000, env='BOOKMARKS_CACHE_SIZE')
+    bookmarks_cache_ttl: float = Field(30, env='BOOKMARKS_CACHE_TTL')
+
+    bulk_max_items: int = Field(500, env='BULK_MAX_ITEMS')
+
+    # Поиск по тексту отзывов: язык текстового индекса (стемминг и стоп-слова) и последняя доступная страница
+    review_search_language: str = Field('russian', env='REVIEW_SEARCH_LANGUAGE')
+    review_search_max_page: int = Field(10, env='REVIEW_SEARCH_MAX_PAGE')
+    # Реакции на отзывы: количество шардов счетчиков, период (0 - не переносить) и размер пачки переноса в отзывы
+    review_reaction_shards: int = Field(16, env='REVIEW_REACTION_SHARDS')
+    review_reactions_fold_interval: float = Field(10, env='REVIEW_REACTIONS_FOLD_INTERVAL')
+    review_reactions_fold_batch_size: int = Field(10000, env='REVIEW_REACTIONS_FOLD_BATCH_SIZE')
+
+    # Рейтинги фильмов: размер, минимальное количество оценок, окно закладок и период пересчета (0 - не пересчитывать)
+    leaderboard_size: int = Field(1000, env='LEADERBOARD_SIZE')
+    leaderboard_min_votes: int = Field(10, env='LEADERBOARD_MIN_VOTES')
+    leaderboard_bookmarks_window_days: int = Field(7, env='LEADERBOARD_BOOKMARKS_WINDOW_DAYS')
+    leaderboard_refresh_interval: int = Field(300, env='LEADERBOARD_REFRESH_INTERVAL')
 
 
 settings = Settings()
@@ -0,0 +1,224 @@
+"""Модуль журнала событий UGC (подменяемый бэкенд: в памяти процесса или в файле)."""
+
+import abc
+import asyncio
+import datetime
+import fcntl
+import os
+import shutil
+import threading
+import typing
+import uuid
+
+import orjson
+from core.config import settings
+from loguru import logger
+
+BOOKMARK_ADDED = 'bookmark_added'
+BOOKMARK_DELETED = 'bookmark_deleted'
+SCORE_ADDED = 'score_added'
+SCORE_DELETED = 'score_deleted'
+REVIEW_ADDED = 'review_added'
+REVIEW_UPDATED = 'review_updated'
+REVIEW_DELETED = 'review_deleted'
+
+EVENT_LOG_MEMORY = 'memory'
+EVENT_LOG_FILE = 'file'
+
+Event = dict[str, typing.Any]
+Payload = dict[str, typing.Any]
+
+
+def create_event(event_type: str, payload: Payload) -> Event:
+    """Возвращает событие с ключом идемпотентности event_id."""
+    return {
+        'event_id': str(uuid.uuid4()),
+        'event_type': event_type,
+        'created_at': datetime.datetime.now(),
+        'payload': payload,
+    }
+
+
+class EventLog(abc.ABC):
+    """
+    Журнал событий с подтверждаемым смещением потребителя (по образцу топика Kafka с одной группой).
+
+    Бэкенд реализует append, read, committed_offset и commit.
+    """
+
+    async def publish(self, event_type: str, **payload: typing.Any) -> None:
+        """Добавляет событие в журнал."""
+        await self.append([create_event(event_type, payload)])
+
+    async def publish_many(self, event_type: str, payloads: list[Payload]) -> None:
+        """Добавляет события одного типа в журнал одной записью."""
+        await self.append([create_event(event_type, payload) for payload in payloads])
+
+    @abc.abstractmethod
+    async def append(self, events: list[Event]) -> None:
+        """Добавляет события в конец журнала."""
+
+    @abc.abstractmethod
+    async def read(self, offset: int, limit: int) -> tuple[list[Event], int]:
+        """Возвращает не больше limit событий после смещения offset и смещение следующего события."""
+
+    @abc.abstractmethod
+    async def committed_offset(self) -> int:
+        """Возвращает подтвержденное потребителем смещение."""
+
+    @abc.abstractmethod
+    async def commit(self, offset: int) -> None:
+        """Подтверждает обработку событий до смещения offset."""
+
+    def close(self) -> None:
+        """Освобождает ресурсы журнала."""
+
+
+class MemoryEventLog(EventLog):
+    """
+    Журнал событий в памяти процесса (для тестов и запуска потребителя внутри сервиса).
+
+    События сериализуются так же, как в файловом журнале, чтобы потребитель получал одинаковые данные.
+    """
+
+    def __init__(self) -> None:
+        """Инициализирует журнал событий в памяти."""
+        self._events: list[Event] = []
+        # Смещение первого хранимого события: подтвержденные события удаляются из памяти
+        self._base_offset = 0
+
+    async def append(self, events: list[Event]) -> None:
+        """Добавляет события в конец журнала."""
+        self._events.extend(orjson.loads(orjson.dumps(event)) for event in events)
+
+    async def read(self, offset: int, limit: int) -> tuple[list[Event], int]:
+        """Возвращает не больше limit событий после смещения offset и смещение следующего события."""
+        start = offset - self._base_offset
+        events = self._events[start:start + limit]
+        return events, offset + len(events)
+
+    async def committed_offset(self) -> int:
+        """Возвращает подтвержденное потребителем смещение."""
+        return self._base_offset
+
+    async def commit(self, offset: int) -> None:
+        """Подтверждает обработку событий до смещения offset и удаляет их из памяти."""
+        del self._events[:offset - self._base_offset]
+        self._base_offset = offset
+
+
+class FileEventLog(EventLog):
+    """
+    Журнал событий в файле NDJSON, смещение - позиция в байтах.
+
+    Сервис и процесс-потребитель должны иметь доступ к одному файлу. Каждая запись добавляется
+    одним вызовом write в режиме O_APPEND, поэтому воркеры могут писать в файл одновременно.
+    Подтвержденное смещение хранится в файле <path>.offset.
+    Когда подтвержденная часть превышает EVENT_LOG_COMPACT_SIZE байт, журнал сжимается: неподтвержденные события
+    переписываются в новый файл, а смещение обнуляется. Запись и сжатие разделены блокировкой файла <path>.lock,
+    воркеры пишут под общей блокировкой и после сжатия открывают новый файл журнала.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Инициализирует журнал событий в файле."""
+        self._path = path
+        self._offset_path = f'{path}.offset'
+        self._lock_path = f'{path}.lock'
+        # Записи потоков одного процесса выполняются по очереди, чтобы файл не был переоткрыт во время записи
+        self._write_lock = threading.Lock()
+        self._fd = self._open()
+
+    async def append(self, events: list[Event]) -> None:
+        """Добавляет события в конец файла."""
+        log_data = b''.join(orjson.dumps(event) + b'\n' for event in events)
+        await asyncio.to_thread(self._write, log_data)
+
+    async def read(self, offset: int, limit: int) -> tuple[list[Event], int]:
+        """Возвращает не больше limit событий после смещения offset и смещение следующего события."""
+        return await asyncio.to_thread(self._read, offset, limit)
+
+    async def committed_offset(self) -> int:
+        """Возвращает подтвержденное потребителем смещение."""
+        try:
+            with open(self._offset_path, 'rb') as offset_file:
+                return int(offset_file.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    async def commit(self, offset: int) -> None:
+        """Подтверждает обработку событий до смещения offset и сжимает журнал, если подтвержденная часть велика."""
+        if offset < settings.event_log_compact_size:
+            self._write_offset(offset)
+            return
+        await asyncio.to_thread(self._compact, offset)
+        logger.info(f'Event log: {self._path} compacted, {offset} bytes of committed events removed')
+
+    def close(self) -> None:
+        """Закрывает файл журнала."""
+        os.close(self._fd)
+
+    def _open(self) -> int:
+        """Открывает файл журнала для дозаписи."""
+        return os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _write(self, log_data: bytes) -> None:
+        """Дописывает события под общей блокировкой, открывая новый файл, если журнал был сжат."""
+        with self._write_lock, open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            if os.fstat(self._fd).st_ino != os.stat(self._path).st_ino:
+                os.close(self._fd)
+                self._fd = self._open()
+            os.write(self._fd, log_data)
+
+    def _write_offset(self, offset: int) -> None:
+        """Атомарно заменяет файл подтвержденного смещения."""
+        temp_path = f'{self._offset_path}.tmp'
+        with open(temp_path, 'w') as offset_file:
+            offset_file.write(str(offset))
+        os.replace(temp_path, self._offset_path)
+
+    def _compact(self, offset: int) -> None:
+        """
+        Переписывает события после смещения offset в новый файл журнала под исключительной блокировкой.
+
+        Смещение обнуляется до замены файла: при сбое между этими шагами подтвержденные события
+        будут прочитаны повторно и пропущены по ключам идемпотентности, но не потеряны.
+        """
+        temp_path = f'{self._path}.tmp'
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with open(self._path, 'rb') as log_file, open(temp_path, 'wb') as temp_file:
+                log_file.seek(offset)
+                shutil.copyfileobj(log_file, temp_file)
+            self._write_offset(0)
+            os.replace(temp_path, self._path)
+
+    def _read(self, offset: int, limit: int) -> tuple[list[Event], int]:
+        """Читает события из файла, пропуская последнюю строку, если она еще дописывается."""
+        events: list[Event] = []
+        with open(self._path, 'rb') as log_file:
+            log_file.seek(offset)
+            while len(events) < limit:
+                line = log_file.readline()
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                events.append(orjson.loads(line))
+        return events, offset
+
+
+def create_event_log() -> EventLog:
+    """Создает журнал событий с бэкендом из настроек."""
+    if settings.event_log_backend == EVENT_LOG_MEMORY:
+        return MemoryEventLog()
+    if settings.event_log_backend == EVENT_LOG_FILE:
+        return FileEventLog(settings.event_log_path)
+    raise ValueError(f'Unknown event log backend: {settings.event_log_backend}')
+
+
+event_log: EventLog | None = None
+
+
+def get_event_log() -> EventLog | None:
+    """Возвращает журнал событий, если сервис работает в режиме приема событий, или None."""
+    return event_log
@@ -0,0 +1,160 @@
+"""Модуль декларативного описания индексов коллекций и их сверки с MongoDB."""
+
+import asyncio
+import types
+import typing
+
+from core.config import settings
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+
+# Отчет о сверке индексов коллекции: недостающие, отличающиеся от описания и лишние индексы
+IndexReport = dict[str, list[str]]
+
+# Описание существующего индекса из listIndexes
+IndexInfo = dict[str, typing.Any]
+
+# Уникальный индекс записей пользователя о фильме
+FILM_USER_INDEX = (('film_id', 1), ('user_id', 1))
+
+# Первое поле индексов выборки записей фильма
+FILM_KEY = ('film_id', 1)
+
+# Параметры индекса, отличие которых от описания считается расхождением
+INDEX_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression', 'default_language')
+
+# Индексы коллекций под используемые запросы
+INDEX_SPECS = types.MappingProxyType(
+    {
+        'film_bookmarks': (
+            IndexModel(list(FILM_USER_INDEX), unique=True),
+            # Покрывающий индекс для проверки наличия фильмов в закладках (запрос по user_id, проекция film_id)
+            IndexModel([('user_id', 1), ('film_id', 1)]),
+            # Покрывающий индекс для постраничного списка закладок пользователя, начиная с последних добавленных
+            IndexModel([('user_id', 1), ('created_at', -1), ('_id', -1), ('film_id', 1)]),
+        ),
+        'film_score': (IndexModel(list(FILM_USER_INDEX), unique=True),),
+        'film_reviews': (
+            IndexModel(list(FILM_USER_INDEX), unique=True),
+            # Индексы для постраничной выборки отзывов фильма в каждом из порядков FilmReviewsService.review_sorts
+            IndexModel([FILM_KEY, ('create_at', -1), ('_id', -1)]),
+            IndexModel([FILM_KEY, ('film_score', -1), ('_id', -1)]),
+            IndexModel([FILM_KEY, ('likes', -1), ('_id', -1)]),
+            # Индекс для выгрузки отзывов пользователя
+            IndexModel([('user_id', 1), ('create_at', -1)]),
+            # Текстовый индекс для поиска по отзывам фильма: равенство по film_id ограничивает поиск записями фильма
+            IndexModel([FILM_KEY, ('review_text', 'text')], default_language=settings.review_search_language),
+        ),
+        # Уникальный индекс нужен и для точечного чтения сводки, и для $merge при ее пересчете
+        'film_score_summary': (IndexModel([FILM_KEY], unique=True),),
+        # Одна реакция пользователя на отзыв
+        'review_reactions': (IndexModel([('review_id', 1), ('user_id', 1)], unique=True),),
+        'review_reaction_counters': (
+            IndexModel([('review_id', 1), ('shard', 1)], unique=True),
+            # Частичный индекс только по шардам, ожидающим переноса в отзыв
+            IndexModel([('is_folded', 1)], partialFilterExpression={'is_folded': False}),
+        ),
+        # Ключи идемпотентности событий хранятся EVENT_IDEMPOTENCY_TTL секунд
+        'processed_events': (IndexModel([('processed_at', 1)], expireAfterSeconds=settings.event_idempotency_ttl),),
+    },
+)
+
+# Последние отчеты о сверке индексов по коллекциям
+index_reports: dict[str, IndexReport] = {}
+
+build_task: asyncio.Task[None] | None = None
+
+
+def get_index_key(index: IndexInfo) -> tuple[tuple[str, typing.Any], ...]:
+    """
+    Возвращает ключ индекса в виде, в котором он задается при создании.
+
+    В описании текстового индекса из listIndexes поля текста заменены на (_fts, _ftsx) и перечислены в weights.
+    """
+    index_key = tuple(index['key'].items())
+    if ('_fts', 'text') not in index_key:
+        return index_key
+    text_position = index_key.index(('_fts', 'text'))
+    text_key = tuple((field, 'text') for field in index['weights'])
+    return index_key[:text_position] + text_key + index_key[text_position + 2:]
+
+
+def compare_indexes(index_models: typing.Iterable[IndexModel], indexes: list[IndexInfo]) -> IndexReport:
+    """Сравнивает описание индексов коллекции с существующими индексами (индексы сопоставляются по ключу)."""
+    indexes_by_key = {get_index_key(index): index for index in indexes}
+    report: IndexReport = {'missing': [], 'drifted': [], 'extra': []}
+    for index_model in index_models:
+        spec = index_model.document
+        index = indexes_by_key.pop(get_index_key(spec), None)
+        if index is None:
+            report['missing'].append(spec['name'])
+        elif index['name'] != spec['name'] or any(index.get(option) != spec.get(option) for option in INDEX_OPTIONS):
+            report['drifted'].append(spec['name'])
+    report['extra'] = [index['name'] for index in indexes_by_key.values() if index['name'] != '_id_']
+    return report
+
+
+async def list_indexes(db: AsyncIOMotorDatabase) -> dict[str, list[IndexInfo]]:
+    """Возвращает индексы описанных коллекций (у еще не созданной коллекции индексов нет)."""
+    collections_indexes = await asyncio.gather(
+        *(db[collection_name].list_indexes().to_list(None) for collection_name in INDEX_SPECS),
+    )
+    return dict(zip(INDEX_SPECS, collections_indexes))
+
+
+def log_index_drift(reports: dict[str, IndexReport]) -> None:
+    """Записывает в лог недостающие, отличающиеся от описания и не описанные индексы."""
+    for collection_name, report in reports.items():
+        if any(report.values()):
+            logger.warning(f'Indexes of the collection: {collection_name} differ from the spec: {report}')
+
+
+async def create_missing_indexes(db: AsyncIOMotorDatabase, collection_name: str) -> None:
+    """Создает недостающие индексы коллекции по последнему отчету о сверке."""
+    index_names = index_reports[collection_name]['missing']
+    index_models = [
+        index_model for index_model in INDEX_SPECS[collection_name] if index_model.document['name'] in index_names
+    ]
+    try:
+        await db[collection_name].create_indexes(index_models)
+    except PyMongoError as er:
+        logger.error(f'Indexes: {index_names} of the collection: {collection_name} not created: {er}')
+        return
+    index_reports[collection_name]['missing'] = []
+    logger.info(f'Indexes: {index_names} of the collection: {collection_name} created')
+
+
+async def build_indexes(db: AsyncIOMotorDatabase, collection_names: list[str]) -> None:
+    """Создает недостающие индексы коллекций параллельно."""
+    await asyncio.gather(*(create_missing_indexes(db, collection_name) for collection_name in collection_names))
+
+
+async def reconcile_indexes(db: AsyncIOMotorDatabase, is_background: bool = True) -> dict[str, IndexReport]:
+    """
+    Сверяет индексы коллекций с INDEX_SPECS и создает недостающие.
+
+    Индексы коллекций получаются одним параллельным запросом. Индексы еще не созданных коллекций создаются сразу:
+    на пустой коллекции это быстро, и уникальные индексы действуют с первой записи. Недостающие индексы
+    существующих коллекций при is_background строятся в фоновой задаче, не задерживая запуск.
+    Отличающиеся от описания и лишние индексы только записываются в лог: пересоздание индекса выполняется вручную,
+    чтобы запросы не остались без индекса на время построения.
+    """
+    global build_task
+    collections_indexes = await list_indexes(db)
+    index_reports.update(
+        (collection_name, compare_indexes(INDEX_SPECS[collection_name], indexes))
+        for collection_name, indexes in collections_indexes.items()
+    )
+    log_index_drift(index_reports)
+    missing_collections = [collection_name for collection_name, report in index_reports.items() if report['missing']]
+    await build_indexes(
+        db,
+        [name for name in missing_collections if not (is_background and collections_indexes[name])],
+    )
+    if is_background:
+        build_task = asyncio.create_task(
+            build_indexes(db, [name for name in missing_collections if collections_indexes[name]]),
+        )
+    return index_reports
@@ -0,0 +1,49 @@
+"""Вспомогательный модуль для постраничной выборки по ключу (keyset pagination)."""
+
+import base64
+import typing
+
+from bson import json_util
+from bson.errors import InvalidId
+
+SortSpec = list[tuple[str, int]]
+
+
+def encode_cursor(sort_values: list[typing.Any]) -> str:
+    """Кодирует значения полей сортировки последней записи страницы в непрозрачный курсор."""
+    return base64.urlsafe_b64encode(json_util.dumps(sort_values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list[typing.Any]:
+    """Декодирует курсор в значения полей сортировки."""
+    try:
+        padded_cursor = cursor + '=' * (-len(cursor) % 4)
+        sort_values = json_util.loads(base64.urlsafe_b64decode(padded_cursor.encode()))
+    except (ValueError, InvalidId) as er:
+        raise ValueError(f'Invalid cursor: {cursor}') from er
+    if not isinstance(sort_values, list):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return sort_values
+
+
+def get_sort_values(document: dict[str, typing.Any], sort: SortSpec) -> list[typing.Any]:
+    """Возвращает значения полей сортировки записи."""
+    return [document.get(field) for field, _ in sort]
+
+
+def build_keyset_query(sort: SortSpec, sort_values: list[typing.Any]) -> dict[str, typing.Any]:
+    """
+    Строит условие выборки записей, следующих за записью с указанными значениями полей сортировки.
+
+    Для сортировки (a, b) условие имеет вид: a после A или (a = A и b после B),
+    что позволяет MongoDB начать чтение индекса сразу с нужной позиции вместо пропуска записей.
+    """
+    if len(sort_values) != len(sort):
+        raise ValueError('Cursor does not match the sort order')
+    conditions = []
+    equal_prefix: dict[str, typing.Any] = {}
+    for (field, direction), sort_value in zip(sort, sort_values):
+        operator = '$gt' if direction > 0 else '$lt'
+        conditions.append({**equal_prefix, field: {operator: sort_value}})
+        equal_prefix[field] = sort_value
+    return {'$or': conditions}
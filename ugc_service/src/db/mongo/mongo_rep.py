@@ -1,10 +1,34 @@
 """Репозиторий для взаимодействия с MongoDB."""
 
+import typing
+
 from core.config import settings
 from loguru import logger
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCursor
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorClientSession,
+    AsyncIOMotorCollection,
+    AsyncIOMotorCursor,
+)
 from pymongo import ReturnDocument
 from pymongo.collection import InsertOneResult, UpdateResult
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+# Сессия MongoDB, в рамках которой выполняется транзакция (None - без транзакции)
+MongoSession: typing.TypeAlias = AsyncIOMotorClientSession | None
+
+# Узел чтения запроса: первичный или вторичный с ограничением отставания
+MongoReadPreference: typing.TypeAlias = Primary | SecondaryPreferred
+
+# Код ошибки MongoDB при нарушении уникального индекса
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+# Чтение со вторичных узлов для запросов, допускающих отставание данных не больше MONGO_MAX_STALENESS_SECONDS.
+# None - чтение с узла из настроек клиента (MONGO_READ_PREFERENCE)
+STALE_READ_PREFERENCE: MongoReadPreference | None = (
+    SecondaryPreferred(max_staleness=settings.mongo_max_staleness_seconds) if settings.mongo_secondary_reads else None
+)
 
 
 class MongoRepository:
@@ -18,48 +42,86 @@ class MongoRepository:
         """Получает объект базы данных."""
         return self._mongo_client[settings.mongo_db]
 
-    async def insert_one(self, collection_name: str, document: dict[str, str]) -> str | None:
-        """Добавление одной записи в коллекцию."""
+    async def get_collection(
+        self,
+        collection_name: str,
+        read_preference: MongoReadPreference | None = None,
+    ) -> AsyncIOMotorCollection:
+        """Получает объект коллекции, при необходимости с узлом чтения, отличным от заданного для клиента."""
+        database = await self.get_database()
+        collection = database[collection_name]
+        if read_preference is not None:
+            collection = collection.with_options(read_preference=read_preference)
+        return collection
+
+    async def insert_one(
+        self,
+        collection_name: str,
+        document: dict[str, typing.Any],
+        session: MongoSession = None,
+    ) -> str | None:
+        """
+        Добавление одной записи в коллекцию.
+
+        Повторная запись отклоняется уникальным индексом коллекции: DuplicateKeyError
+        пробрасывается вызывающему сервису, который возвращает пользователю ошибку 400.
+        """
         try:
-            database = await self.get_database()
-            collection = database[collection_name]
-            if await self.find_one(collection_name, document):
-                logger.exception(f'Entry for User: {document["user_id"]} in the {collection_name}: already exists')
-                return None
-            insert_one_result: InsertOneResult = await collection.insert_one(document)
-            logger.info(f'User: {document["user_id"]} added an entry to the collection: {collection_name}')
-            return str(insert_one_result.inserted_id)
+            collection = await self.get_collection(collection_name)
+            insert_one_result: InsertOneResult = await collection.insert_one(document, session=session)
+        except DuplicateKeyError:
+            logger.info(f'Entry for User: {document["user_id"]} in the {collection_name}: already exists')
+            raise
         except Exception as er:
             logger.exception(f'Error when adding an entry to the collection {collection_name}: {er}')
+            if session:
+                raise
             return None
+        logger.info(f'User: {document["user_id"]} added an entry to the collection: {collection_name}')
+        return str(insert_one_result.inserted_id)
 
-    async def find_one(self, collection_name: str, query: dict[str, str]) -> dict[str, str] | None:
-        """Поиск одной записи в коллекции по запросу."""
+    async def find_one(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        read_preference: MongoReadPreference | None = None,
+        **find_options: typing.Any,
+    ) -> dict[str, typing.Any] | None:
+        """
+        Поиск одной записи в коллекции по запросу (find_options передаются в find_one, например projection).
+
+        Возвращает пустой словарь, если запись не найдена, или None при ошибке.
+        """
         try:
-            database = await self.get_database()
-            collection = database[collection_name]
-            return await collection.find_one(query)  # type: ignore[no-any-return]
+            collection = await self.get_collection(collection_name, read_preference)
+            entry = await collection.find_one(query, **find_options)
         except Exception as er:
             logger.exception(f'Error when searching for an entry in the {collection_name}: {er}')
             return None
+        return entry or {}
 
     async def find_all(
         self,
         collection_name: str,
-        query: dict[str, str],
+        query: dict[str, typing.Any],
         page_size: int | None = None,
         page_number: int | None = None,
-    ) -> list[dict[str, str]] | None:
-        """Поиск всех записей в коллекции по запросу."""
+        read_preference: MongoReadPreference | None = None,
+        **find_options: typing.Any,
+    ) -> list[dict[str, typing.Any]] | None:
+        """
+        Поиск всех записей в коллекции по запросу.
+
+        find_options передаются в find: sort, projection (только нужные поля, что позволяет
+        ответить на запрос по индексу без чтения документов) и другие параметры курсора.
+        """
         try:
-            database = await self.get_database()
-            collection = database[collection_name]
+            collection = await self.get_collection(collection_name, read_preference)
 
+            result: AsyncIOMotorCursor = collection.find(query, **find_options)
             if page_size and page_number:
                 skip_count = (page_number - 1) * page_size
-                result: AsyncIOMotorCursor = collection.find(query).skip(skip_count).limit(page_size)
-            else:
-                result = collection.find(query)
+                result = result.skip(skip_count).limit(page_size)
             entries = await result.to_list(length=None)
         except Exception as er:
             logger.exception(f'Error when searching for an entry in the collection: {collection_name}: {er}')
@@ -72,20 +134,47 @@ class MongoRepository:
         logger.info(f'Entries in the collection: {collection_name} not found')
         return None
 
+    async def iter_find(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        batch_size: int = settings.mongo_stream_batch_size,
+        read_preference: MongoReadPreference | None = None,
+        **find_options: typing.Any,
+    ) -> typing.AsyncIterator[dict[str, typing.Any]]:
+        """
+        Потоковый поиск записей в коллекции по запросу.
+
+        Записи читаются из курсора пачками по batch_size, поэтому память не зависит от размера выборки.
+        Ошибка чтения пробрасывается, чтобы прервать уже начатую передачу ответа.
+        """
+        collection = await self.get_collection(collection_name, read_preference)
+        entries_count = 0
+        try:
+            async for entry in collection.find(query, **find_options).batch_size(batch_size):
+                entries_count += 1
+                yield entry
+        except Exception as er:
+            logger.exception(f'Error when streaming entries from the collection: {collection_name}: {er}')
+            raise
+        logger.info(f'Entries in the collection: {collection_name} streamed {entries_count}')
+
     async def update_one(
         self,
         collection_name: str,
-        query: dict[str, str],
-        update_data: dict[str, str],
+        query: dict[str, typing.Any],
+        update_data: dict[str, typing.Any],
+        return_document: bool = ReturnDocument.AFTER,
+        session: MongoSession = None,
     ) -> dict[str, str] | None:
         """Обновление одной записи в коллекции по запросу."""
         try:
-            database = await self.get_database()
-            collection = database[collection_name]
+            collection = await self.get_collection(collection_name)
             update_result: UpdateResult = await collection.find_one_and_update(
                 query,
                 {'$set': update_data},
-                return_document=ReturnDocument.AFTER,
+                return_document=return_document,
+                session=session,
             )
             if update_result:
                 logger.info(f'Entry in the collection: {collection_name} updated successfully')
@@ -95,27 +184,213 @@ class MongoRepository:
             return None
         except Exception as er:
             logger.exception(f'Error updating a entry in the collection: {collection_name}: {er}')
+            if session:
+                raise
+            return None
+
+    async def upsert_one(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        update_data: dict[str, typing.Any],
+        session: MongoSession = None,
+        insert_data: dict[str, typing.Any] | None = None,
+    ) -> dict[str, typing.Any] | None:
+        """
+        Обновление или добавление одной записи в коллекцию за один запрос.
+
+        insert_data записываются только при добавлении записи ($setOnInsert).
+        Возвращает запись до обновления, пустой словарь, если запись была добавлена, или None при ошибке.
+        """
+        update: dict[str, typing.Any] = {'$set': update_data}
+        if insert_data:
+            update['$setOnInsert'] = insert_data
+        try:
+            collection = await self.get_collection(collection_name)
+            previous_entry = await collection.find_one_and_update(
+                query,
+                update,
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+                session=session,
+            )
+        except Exception as er:
+            logger.exception(f'Error upserting a entry in the collection: {collection_name}: {er}')
+            if session:
+                raise
+            return None
+        logger.info(f'Entry in the collection: {collection_name} upserted successfully')
+        return previous_entry or {}
+
+    async def increment(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        increments: dict[str, int | float],
+        session: MongoSession = None,
+        insert_data: dict[str, typing.Any] | None = None,
+    ) -> bool:
+        """
+        Атомарное увеличение счетчиков одной записи в коллекции по запросу (запись создается при отсутствии).
+
+        insert_data записываются только при создании записи ($setOnInsert).
+        """
+        update: dict[str, typing.Any] = {'$inc': increments}
+        if insert_data:
+            update['$setOnInsert'] = insert_data
+        try:
+            collection = await self.get_collection(collection_name)
+            await collection.update_one(query, update, upsert=True, session=session)
+        except Exception as er:
+            logger.exception(f'Error incrementing a entry in the collection: {collection_name}: {er}')
+            if session:
+                raise
+            return False
+        logger.info(f'Entry counters in the collection: {collection_name} incremented')
+        return True
+
+    async def bulk_write(
+        self,
+        collection_name: str,
+        operations: list[typing.Any],
+        ordered: bool = False,
+    ) -> dict[int, int] | None:
+        """
+        Выполнение набора операций записи (InsertOne, UpdateOne, DeleteOne) одним запросом.
+
+        Возвращает ошибки отдельных операций в виде {индекс операции: код ошибки}
+        или None, если запрос не был выполнен.
+        """
+        try:
+            collection = await self.get_collection(collection_name)
+            await collection.bulk_write(operations, ordered=ordered)
+        except BulkWriteError as er:
+            write_errors = {error['index']: error['code'] for error in er.details.get('writeErrors', [])}
+            logger.warning(
+                f'Bulk write to the collection: {collection_name} failed for {len(write_errors)} '
+                f'of {len(operations)} operations',
+            )
+            return write_errors
+        except Exception as er:
+            logger.exception(f'Error when bulk writing to the collection: {collection_name}: {er}')
+            return None
+        logger.info(f'Bulk write of {len(operations)} operations to the collection: {collection_name} completed')
+        return {}
+
+    async def run_in_transaction(
+        self,
+        callback: typing.Callable[[MongoSession], typing.Awaitable[typing.Any]],
+    ) -> typing.Any:
+        """
+        Выполняет операции в транзакции, если транзакции включены в настройках.
+
+        Транзакции требуют replica set. Без них операции выполняются последовательно без сессии.
+        Внутри транзакции ошибки операций пробрасываются, чтобы транзакция была отменена.
+        """
+        if not settings.mongo_transactions:
+            return await callback(None)
+        async with await self._mongo_client.start_session() as session:
+            return await session.with_transaction(callback)
+
+    async def aggregate(
+        self,
+        collection_name: str,
+        pipeline: list[dict[str, typing.Any]],
+    ) -> list[dict[str, typing.Any]] | None:
+        """Выполнение конвейера агрегации на стороне MongoDB."""
+        try:
+            collection = await self.get_collection(collection_name)
+            entries = await collection.aggregate(pipeline).to_list(length=None)
+        except Exception as er:
+            logger.exception(f'Error when aggregating entries in the collection: {collection_name}: {er}')
+            return None
+        logger.info(f'Aggregation in the collection: {collection_name} returned {len(entries)} entries')
+        return entries  # type: ignore[no-any-return]
+
+    async def update_many(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        update: dict[str, typing.Any] | list[dict[str, typing.Any]],
+    ) -> int | None:
+        """Обновление всех записей коллекции по запросу (update может быть конвейером агрегации)."""
+        try:
+            collection = await self.get_collection(collection_name)
+            update_result = await collection.update_many(query, update)
+        except Exception as er:
+            logger.exception(f'Error when updating entries in a collection: {collection_name}: {er}')
             return None
+        logger.info(f'{update_result.modified_count} entries were updated in the collection: {collection_name}')
+        return update_result.modified_count  # type: ignore[no-any-return]
 
-    async def delete_one(self, collection_name: str, query: dict[str, str]) -> int | None:
+    async def delete_one(self, collection_name: str, query: dict[str, typing.Any]) -> int | None:
         """Удаление одной записи из коллекции по запросу."""
         try:
-            database = await self.get_database()
-            collection = database[collection_name]
-            if await self.find_one(collection_name, query):
-                delete_result = await collection.delete_one(query)
-                logger.info(f'User: {query["user_id"]} an entry was deleted from the collection: {collection_name}')
-                return delete_result.deleted_count  # type: ignore[no-any-return]
-            logger.info(f'Entry for User: {query["user_id"]} in the collection: {collection_name} not found')
+            collection = await self.get_collection(collection_name)
+            delete_result = await collection.delete_one(query)
+        except Exception as er:
+            logger.exception(f'Error when deleting an entry from a collection: {collection_name}: {er}')
             return None
+        if delete_result.deleted_count:
+            logger.info(f'User: {query["user_id"]} an entry was deleted from the collection: {collection_name}')
+        else:
+            logger.info(f'Entry for User: {query["user_id"]} in the collection: {collection_name} not found')
+        return delete_result.deleted_count  # type: ignore[no-any-return]
+
+    async def find_one_and_delete(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        session: MongoSession = None,
+    ) -> dict[str, str] | None:
+        """
+        Удаление одной записи из коллекции по запросу с возвратом удаленной записи.
+
+        Возвращает пустой словарь, если запись не найдена, или None при ошибке.
+        """
+        try:
+            collection = await self.get_collection(collection_name)
+            deleted_entry = await collection.find_one_and_delete(query, session=session)
         except Exception as er:
             logger.exception(f'Error when deleting an entry from a collection: {collection_name}: {er}')
+            if session:
+                raise
             return None
+        if deleted_entry:
+            logger.info(f'An entry was deleted from the collection: {collection_name}')
+            return deleted_entry  # type: ignore[no-any-return]
+        logger.info(f'Entry in the collection: {collection_name} not found')
+        return {}
+
+    async def delete_many(
+        self,
+        collection_name: str,
+        query: dict[str, typing.Any],
+        session: MongoSession = None,
+    ) -> int | None:
+        """Удаление всех записей из коллекции по запросу."""
+        try:
+            collection = await self.get_collection(collection_name)
+            delete_result = await collection.delete_many(query, session=session)
+        except Exception as er:
+            logger.exception(f'Error when deleting entries from a collection: {collection_name}: {er}')
+            if session:
+                raise
+            return None
+        logger.info(f'{delete_result.deleted_count} entries were deleted from the collection: {collection_name}')
+        return delete_result.deleted_count  # type: ignore[no-any-return]
 
 
 mongo_repository: MongoRepository | None = None
 
 
-def get_mongo_repository() -> MongoRepository | None:
-    """Возвращает объект MongoRepository или None."""
+def get_repository() -> MongoRepository:
+    """
+    Возвращает объект MongoRepository.
+
+    Репозиторий создается при подключении к MongoDB (mongo_storage.on_startup),
+    обращение к нему до подключения - ошибка порядка запуска.
+    """
+    if mongo_repository is None:
+        raise RuntimeError('MongoDB repository is not initialized, call mongo_storage.on_startup first')
     return mongo_repository
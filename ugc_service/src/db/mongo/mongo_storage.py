@@ -1,13 +1,93 @@
 """Файл создания подключения/отключения к MongoDB и создание коллекций."""
 
+import asyncio
+import types
+import typing
+
 from core.config import settings
-from db.mongo import mongo_rep  # type: ignore[attr-defined]
+from db.mongo import indexes, mongo_rep, write_behind  # type: ignore[attr-defined]
+from db.mongo.pool_monitor import pool_monitor
 from loguru import logger
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import CollectionInvalid, OperationFailure
 
 # MongoDB client
 mongo_client: AsyncIOMotorClient | None = None
 
+# Оценка фильма хранится числом (double) от 1 до 10
+FILM_SCORE_TYPES = ('double', 'int')
+FILM_SCORE_SCHEMA = types.MappingProxyType({'bsonType': list(FILM_SCORE_TYPES), 'minimum': 1, 'maximum': 10})
+
+# Валидаторы коллекций. Уровень moderate не проверяет изменения записей, уже нарушающих схему,
+# поэтому строковые оценки можно перевести в числа командой commands.migrate_scores после включения валидатора
+COLLECTION_VALIDATORS = types.MappingProxyType(
+    {
+        'film_score': {
+            '$jsonSchema': {
+                'bsonType': 'object',
+                'required': ['film_id', 'user_id', 'film_score'],
+                'properties': {'film_score': dict(FILM_SCORE_SCHEMA)},
+            },
+        },
+        'film_reviews': {
+            '$jsonSchema': {
+                'bsonType': 'object',
+                'properties': {
+                    'film_score': {**FILM_SCORE_SCHEMA, 'bsonType': [*FILM_SCORE_TYPES, 'null']},
+                },
+            },
+        },
+    },
+)
+
+
+def get_client_options() -> dict[str, typing.Any]:
+    """Возвращает параметры клиента MongoDB из настроек, пропуская нулевые значения."""
+    client_options: dict[str, typing.Any] = {
+        'maxPoolSize': settings.mongo_max_pool_size,
+        'minPoolSize': settings.mongo_min_pool_size,
+        'maxIdleTimeMS': settings.mongo_max_idle_time_ms,
+        'waitQueueTimeoutMS': settings.mongo_wait_queue_timeout_ms,
+        'serverSelectionTimeoutMS': settings.mongo_server_selection_timeout_ms,
+        'compressors': settings.mongo_compressors,
+        'readPreference': settings.mongo_read_preference,
+    }
+    client_options = {option: option_value for option, option_value in client_options.items() if option_value}
+    write_concern = settings.mongo_write_concern
+    client_options['w'] = int(write_concern) if write_concern.isdigit() else write_concern
+    # UUID кодируются в BSON Binary subtype 4 (см. db.mongo.uuids)
+    client_options['uuidRepresentation'] = 'standard'
+    client_options['event_listeners'] = [pool_monitor]
+    return client_options
+
+
+async def apply_validator(
+    db: AsyncIOMotorDatabase,
+    collection_name: str,
+    validator: dict[str, typing.Any],
+    collection_names: list[str],
+) -> None:
+    """Создает коллекцию с валидатором схемы или устанавливает валидатор существующей коллекции."""
+    try:
+        if collection_name in collection_names:
+            await db.command('collMod', collection_name, validator=validator, validationLevel='moderate')
+        else:
+            await db.create_collection(collection_name, validator=validator, validationLevel='moderate')
+    except (CollectionInvalid, OperationFailure) as er:
+        # Коллекцию мог одновременно создать другой воркер
+        logger.warning(f'Validator of the collection: {collection_name} not applied: {er}')
+
+
+async def apply_validators(db: AsyncIOMotorDatabase) -> None:
+    """Устанавливает валидаторы схемы коллекций."""
+    collection_names = await db.list_collection_names()
+    await asyncio.gather(
+        *(
+            apply_validator(db, collection_name, validator, collection_names)
+            for collection_name, validator in COLLECTION_VALIDATORS.items()
+        ),
+    )
+
 
 async def on_startup(data_storage_hosts: list[str]) -> None:
     """Выполняет необходимые операции при запуске приложения."""
@@ -15,31 +95,31 @@ async def on_startup(data_storage_hosts: list[str]) -> None:
     try:
         mongo_client = AsyncIOMotorClient(
             data_storage_hosts,  # , username=settings.mongo_username, password=settings.mongo_password
+            **get_client_options(),
         )
-        db = mongo_client[settings.mongo_db]
-
-        if 'film_bookmarks' not in await db.list_collection_names():
-            collection = db['film_bookmarks']
-            collection.create_index([('film_id', 1), ('user_id', 1)], unique=True)
-        if 'film_scores' not in await db.list_collection_names():
-            collection = db['film_score']
-            collection.create_index([('film_id', 1), ('user_id', 1)], unique=True)
-        if 'film_reviews' not in await db.list_collection_names():
-            collection = db['film_reviews']
-            collection.create_index([('film_id', 1), ('user_id', 1)], unique=True)
-
+        if settings.mongo_reconcile_indexes:
+            await indexes.reconcile_indexes(mongo_client[settings.mongo_db])
+        await apply_validators(mongo_client[settings.mongo_db])
         mongo_rep.mongo_repository = mongo_rep.MongoRepository(mongo_client)
+        if settings.bookmarks_write_behind:
+            write_behind.bookmarks_queue = write_behind.WriteBehindQueue(mongo_rep.mongo_repository, 'film_bookmarks')
+            write_behind.bookmarks_queue.start()
         logger.info('Connected to MongoDB successfully.')
     except Exception as er:
         logger.exception(f'Error connecting to MongoDB: {er}')
 
 
-def on_shutdown() -> None:
+async def on_shutdown() -> None:
     """
     Выполняет необходимые операции при завершении работы приложения.
 
-    Закрывает соединение с MongoDB, если оно было установлено.
+    Записывает операции, оставшиеся в очереди отложенной записи, прекращает ожидание фонового построения индексов
+    (построение продолжается на сервере) и закрывает соединение с MongoDB, если оно было установлено.
     """
+    if indexes.build_task:
+        indexes.build_task.cancel()
+    if write_behind.bookmarks_queue:
+        await write_behind.bookmarks_queue.close()
     if mongo_client:
         mongo_client.close()
         logger.info('Disconnected from MongoDB.')
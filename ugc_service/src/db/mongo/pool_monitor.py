@@ -0,0 +1,113 @@
+"""Модуль мониторинга пула соединений MongoDB по событиям CMAP."""
+
+import threading
+import time
+import typing
+
+from loguru import logger
+from pymongo import monitoring
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Слушатель событий пула соединений MongoDB.
+
+    Считает для каждого сервера количество открытых и занятых соединений, выдачи соединений из пула,
+    ошибки выдачи и время ожидания соединения. События приходят из потоков драйвера,
+    поэтому счетчики изменяются под блокировкой, а начало ожидания хранится в данных потока.
+    """
+
+    def __init__(self) -> None:
+        """Инициализирует счетчики пула соединений."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pools: dict[str, dict[str, typing.Any]] = {}
+
+    def stats(self) -> dict[str, dict[str, typing.Any]]:
+        """Возвращает счетчики пула соединений по серверам."""
+        with self._lock:
+            return {address: dict(pool_stats) for address, pool_stats in self._pools.items()}
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        """Регистрирует пул соединений сервера."""
+        with self._lock:
+            self._get_pool(event.address)['max_pool_size'] = event.options.get('maxPoolSize')
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        """Событие готовности пула не учитывается."""
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        """Учитывает сброс пула после ошибки соединения с сервером."""
+        logger.warning(f'MongoDB connection pool cleared for {event.address}')
+        self._increment(event.address, 'cleared')
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        """Событие закрытия пула не учитывается."""
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        """Учитывает открытие соединения."""
+        self._increment(event.address, 'open')
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        """Событие готовности соединения не учитывается."""
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        """Учитывает закрытие соединения."""
+        self._increment(event.address, 'open', -1)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        """Запоминает начало ожидания соединения в текущем потоке."""
+        self._local.check_out_started = time.perf_counter()
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        """Учитывает ошибку выдачи соединения (например, истечение waitQueueTimeoutMS)."""
+        logger.warning(f'MongoDB connection check out failed for {event.address}: {event.reason}')
+        self._record_wait(event.address)
+        self._increment(event.address, 'check_out_failures')
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        """Учитывает выдачу соединения и время его ожидания."""
+        self._record_wait(event.address)
+        with self._lock:
+            pool_stats = self._get_pool(event.address)
+            pool_stats['check_outs'] += 1
+            pool_stats['in_use'] += 1
+            pool_stats['max_in_use'] = max(pool_stats['max_in_use'], pool_stats['in_use'])
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        """Учитывает возврат соединения в пул."""
+        self._increment(event.address, 'in_use', -1)
+
+    def _get_pool(self, address: tuple[str, int | None]) -> dict[str, typing.Any]:
+        pool_address = f'{address[0]}:{address[1]}'
+        if pool_address not in self._pools:
+            self._pools[pool_address] = {
+                'max_pool_size': None,
+                'open': 0,
+                'in_use': 0,
+                'max_in_use': 0,
+                'check_outs': 0,
+                'check_out_failures': 0,
+                'cleared': 0,
+                'wait_time_total_ms': 0,
+                'wait_time_max_ms': 0,
+            }
+        return self._pools[pool_address]
+
+    def _increment(self, address: tuple[str, int | None], counter: str, delta: int = 1) -> None:
+        with self._lock:
+            self._get_pool(address)[counter] += delta
+
+    def _record_wait(self, address: tuple[str, int | None]) -> None:
+        check_out_started = getattr(self._local, 'check_out_started', None)
+        if check_out_started is None:
+            return
+        self._local.check_out_started = None
+        wait_time_ms = (time.perf_counter() - check_out_started) * 1000
+        with self._lock:
+            pool_stats = self._get_pool(address)
+            pool_stats['wait_time_total_ms'] += wait_time_ms
+            pool_stats['wait_time_max_ms'] = max(pool_stats['wait_time_max_ms'], wait_time_ms)
+
+
+pool_monitor = PoolMonitor()
@@ -0,0 +1,73 @@
+"""
+Модуль хранения UUID в MongoDB.
+
+Режим хранения задается настройкой MONGO_UUID_STORAGE:
+
+- string: UUID хранятся строками (36 байт и больше на поле);
+- mixed: новые записи сохраняют UUID в BSON Binary subtype 4 (16 байт), запросы находят оба формата.
+  Режим используется на время миграции commands.migrate_uuids;
+- binary: UUID хранятся и ищутся только в бинарном виде.
+"""
+
+import typing
+import uuid
+
+from core.config import settings
+
+UUID_STORAGE_STRING = 'string'
+UUID_STORAGE_MIXED = 'mixed'
+UUID_STORAGE_BINARY = 'binary'
+
+# Поля коллекций, в которых хранятся UUID
+UUID_FIELDS = ('film_id', 'user_id')
+
+
+def encode_uuid(uuid_value: uuid.UUID | str) -> uuid.UUID | str:
+    """Возвращает UUID в формате записи в MongoDB."""
+    if settings.mongo_uuid_storage == UUID_STORAGE_STRING:
+        return str(uuid_value)
+    return uuid_value if isinstance(uuid_value, uuid.UUID) else uuid.UUID(uuid_value)
+
+
+def decode_uuid(uuid_value: uuid.UUID | str) -> str:
+    """Возвращает UUID, прочитанный из MongoDB в любом формате, строкой."""
+    return str(uuid_value)
+
+
+def match_uuid(uuid_value: uuid.UUID | str) -> typing.Any:
+    """Возвращает условие запроса по UUID, в смешанном режиме совпадающее с обоими форматами."""
+    if settings.mongo_uuid_storage == UUID_STORAGE_MIXED:
+        return {'$in': [uuid.UUID(str(uuid_value)), str(uuid_value)]}
+    return encode_uuid(uuid_value)
+
+
+def match_uuids(uuid_values: typing.Iterable[uuid.UUID | str]) -> dict[str, list[typing.Any]]:
+    """Возвращает условие запроса по списку UUID."""
+    if settings.mongo_uuid_storage == UUID_STORAGE_MIXED:
+        return {'$in': [match_value for uuid_value in uuid_values for match_value in match_uuid(uuid_value)['$in']]}
+    return {'$in': [encode_uuid(uuid_value) for uuid_value in uuid_values]}
+
+
+def uuid_query(**uuid_fields: uuid.UUID | str) -> dict[str, typing.Any]:
+    """Возвращает запрос по полям с UUID, например uuid_query(film_id=film_id, user_id=user_id)."""
+    return {field: match_uuid(uuid_value) for field, uuid_value in uuid_fields.items()}
+
+
+def get_upsert_fields(**uuid_fields: uuid.UUID | str) -> dict[str, typing.Any]:
+    """
+    Возвращает поля для $setOnInsert при upsert по запросу uuid_query.
+
+    В смешанном режиме запрос содержит $in, и MongoDB не переносит такие поля в созданную запись,
+    поэтому они задаются явно. В остальных режимах поля берутся из условий равенства запроса.
+    """
+    if settings.mongo_uuid_storage != UUID_STORAGE_MIXED:
+        return {}
+    return {field: encode_uuid(uuid_value) for field, uuid_value in uuid_fields.items()}
+
+
+def add_upsert_fields(update: dict[str, typing.Any], **uuid_fields: uuid.UUID | str) -> dict[str, typing.Any]:
+    """Добавляет к изменению записи поля get_upsert_fields для upsert в пакетных запросах."""
+    upsert_fields = get_upsert_fields(**uuid_fields)
+    if upsert_fields:
+        return {**update, '$setOnInsert': upsert_fields}
+    return update
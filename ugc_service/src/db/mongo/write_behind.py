@@ -0,0 +1,161 @@
+"""Модуль очереди отложенной записи (write-behind) в MongoDB."""
+
+import asyncio
+import typing
+
+from core.config import settings
+from db.mongo.mongo_rep import DUPLICATE_KEY_ERROR_CODE, MongoRepository
+from loguru import logger
+from pymongo import DeleteOne, InsertOne
+
+WriteOperation: typing.TypeAlias = InsertOne[dict[str, typing.Any]] | DeleteOne
+
+# Пакет операций по ключам: для каждого ключа хранится последняя операция
+WriteBatch: typing.TypeAlias = dict[typing.Hashable, WriteOperation]
+
+# Признак остановки очереди, после которого фоновая задача записывает оставшиеся операции и завершается
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Ограниченная очередь операций записи коллекции, которые фоновая задача записывает пакетами bulk_write.
+
+    Операции с одинаковым ключом внутри пакета схлопываются: записывается последняя из них.
+    Пакет записывается, когда набрано batch_size операций или прошло flush_interval секунд
+    с первой операции пакета. При заполненной очереди добавление операции ожидает освобождения места.
+    Пакет, не записанный из-за ошибки запроса, повторяется с удваивающейся задержкой и объединяется
+    с новыми операциями (новая операция с тем же ключом заменяет повторяемую). После WRITE_BEHIND_MAX_RETRIES
+    неудачных попыток пакет отбрасывается.
+    """
+
+    def __init__(
+        self,
+        repository: MongoRepository,
+        collection_name: str,
+        max_size: int = settings.write_behind_queue_size,
+        batch_size: int = settings.write_behind_batch_size,
+        flush_interval: float = settings.write_behind_flush_interval,
+    ) -> None:
+        """Инициализирует очередь отложенной записи."""
+        self._repository = repository
+        self.collection_name = collection_name
+        self._queue: asyncio.Queue[tuple[typing.Hashable, WriteOperation]] = asyncio.Queue(max_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._task: asyncio.Task[None] | None = None
+        self._is_stopping = False
+        self._retry_batch: WriteBatch = {}
+        self._retry_attempts = 0
+        self._counters = {'queued': 0, 'coalesced': 0, 'flushed': 0, 'batches': 0, 'retried': 0, 'failed': 0}
+
+    @property
+    def is_running(self) -> bool:
+        """Признак того, что очередь принимает операции."""
+        return self._task is not None and not self._is_stopping
+
+    def start(self) -> None:
+        """Запускает фоновую задачу записи операций."""
+        self._task = asyncio.create_task(self._run())
+        logger.info(f'Write-behind queue of the collection: {self.collection_name} started')
+
+    async def put(self, key: typing.Hashable, operation: WriteOperation) -> None:
+        """Добавляет операцию в очередь, ожидая освобождения места, если очередь заполнена."""
+        await self._queue.put((key, operation))
+        self._counters['queued'] += 1
+
+    async def close(self) -> None:
+        """Прекращает прием операций и ожидает записи операций, оставшихся в очереди."""
+        if self._task is None or self._is_stopping:
+            return
+        self._is_stopping = True
+        await self._queue.put((_STOP, _STOP))  # type: ignore[arg-type]
+        await self._task
+        logger.info(f'Write-behind queue of the collection: {self.collection_name} drained')
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счетчики очереди: добавленные, схлопнутые и записанные операции, пакеты, повторы и ошибки."""
+        return {**self._counters, 'size': self._queue.qsize()}
+
+    async def _run(self) -> None:
+        """Собирает и записывает пакеты операций до остановки очереди, затем повторяет неудавшийся пакет."""
+        is_stopped = False
+        while not is_stopped:
+            batch, is_stopped = await self._collect_batch()
+            if batch:
+                await self._flush(batch)
+        while self._retry_batch:
+            await self._flush(self._retry_batch)
+
+    async def _collect_batch(self) -> tuple[WriteBatch, bool]:
+        """
+        Собирает пакет операций, схлопывая операции с одинаковым ключом, и возвращает признак остановки.
+
+        Пакет начинается с неудавшегося пакета, если он ожидает повтора.
+        """
+        batch = self._retry_batch
+        self._retry_batch = {}
+        if not batch:
+            key, operation = await self._queue.get()
+            if key is _STOP:
+                return batch, True
+            batch[key] = operation
+        deadline = asyncio.get_running_loop().time() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                key, operation = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if key is _STOP:
+                return batch, True
+            self._counters['coalesced'] += key in batch
+            batch[key] = operation
+        return batch, False
+
+    async def _flush(self, batch: WriteBatch) -> None:
+        """Записывает пакет операций одним неупорядоченным запросом bulk_write."""
+        write_errors = await self._repository.bulk_write(self.collection_name, list(batch.values()))
+        self._counters['batches'] += 1
+        if write_errors is None:
+            await self._retry(batch)
+            return
+        self._retry_batch = {}
+        self._retry_attempts = 0
+        # Повторное добавление существующей записи не считается ошибкой
+        failed_count = sum(error_code != DUPLICATE_KEY_ERROR_CODE for error_code in write_errors.values())
+        self._counters['failed'] += failed_count
+        self._counters['flushed'] += len(batch) - failed_count
+
+    async def _retry(self, batch: WriteBatch) -> None:
+        """Откладывает неудавшийся пакет для повтора или отбрасывает его после WRITE_BEHIND_MAX_RETRIES попыток."""
+        self._retry_attempts += 1
+        if self._retry_attempts > settings.write_behind_max_retries:
+            self._counters['failed'] += len(batch)
+            logger.error(
+                f'Write-behind batch of {len(batch)} operations to: {self.collection_name} lost '
+                f'after {settings.write_behind_max_retries} retries',
+            )
+            self._retry_batch = {}
+            self._retry_attempts = 0
+            return
+        self._counters['retried'] += len(batch)
+        self._retry_batch = batch
+        retry_delay = settings.write_behind_retry_delay * 2 ** (self._retry_attempts - 1)
+        logger.warning(
+            f'Write-behind batch of {len(batch)} operations to: {self.collection_name} failed, '
+            f'retry {self._retry_attempts} in {retry_delay} seconds',
+        )
+        await asyncio.sleep(retry_delay)
+
+
+bookmarks_queue: WriteBehindQueue | None = None
+
+
+def get_bookmarks_queue() -> WriteBehindQueue | None:
+    """Возвращает запущенную очередь отложенной записи закладок или None."""
+    if bookmarks_queue and bookmarks_queue.is_running:
+        return bookmarks_queue
+    return None
@@ -2,11 +2,14 @@
 
 import fastapi
 import sentry_sdk
-from api.v1 import film_bookmarks, film_reviews, film_score
+from api.v1 import film_bookmarks, film_leaderboards, film_reviews, film_score, metrics, review_reactions
 from core.config import settings
 from core.logger import logger
 from db.mongo import mongo_storage  # type: ignore[attr-defined]
 from sentry_sdk.integrations.loguru import LoguruIntegration
+from services import auth, ugc_events
+from services import film_leaderboards as leaderboards_service
+from services import review_reactions as reactions_service
 
 sentry_sdk.init(
     dsn=settings.sentry_dsn,  # type: ignore
@@ -36,14 +39,29 @@ async def startup() -> None:
     """Выполняет необходимые действия при запуске приложения."""
     logger.info('Fastapi service launched.')
     await mongo_storage.on_startup([f'{settings.mongo_host}:{settings.mongo_port}'])
+    await auth.on_startup()
+    await ugc_events.on_startup()
+    await leaderboards_service.on_startup()
+    await reactions_service.on_startup()
 
 
 @app.on_event('shutdown')
 async def shutdown() -> None:
     """Выполняет необходимые действия при остановке приложения."""
-    mongo_storage.on_shutdown()
+    await reactions_service.on_shutdown()
+    await leaderboards_service.on_shutdown()
+    await ugc_events.on_shutdown()
+    await mongo_storage.on_shutdown()
+    await auth.on_shutdown()
 
 
 app.include_router(film_bookmarks.router, prefix='/api/v1/ugc_2/film_bookmarks', tags=['film_bookmarks'])
+app.include_router(
+    film_leaderboards.router,
+    prefix='/api/v1/ugc_2/film_leaderboards',
+    tags=['film_leaderboards'],
+)
 app.include_router(film_reviews.router, prefix='/api/v1/ugc_2/film_reviews', tags=['film_reviews'])
+app.include_router(review_reactions.router, prefix='/api/v1/ugc_2/film_reviews', tags=['film_reviews'])
 app.include_router(film_score.router, prefix='/api/v1/ugc_2/film_score', tags=['film_score'])
+app.include_router(metrics.router, prefix='/api/v1/ugc_2/metrics', tags=['metrics'])
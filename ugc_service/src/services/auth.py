@@ -0,0 +1,158 @@
+"""Модуль сервиса аутентификации пользователей."""
+
+import hashlib
+import json
+import time
+import typing
+from functools import partial
+from http import HTTPStatus
+
+import httpx
+import jwt
+from core.cache import AsyncTTLCache, auth_token_cache
+from core.config import settings
+from fastapi import HTTPException
+from loguru import logger
+
+JWKS_CACHE_KEY = 'jwks'
+
+
+def get_token_ttl(claims: dict[str, typing.Any]) -> float:
+    """Возвращает время хранения проверенного токена: до его истечения, но не дольше AUTH_TOKEN_CACHE_TTL."""
+    expires_at = claims.get('exp')
+    if expires_at is None:
+        return settings.auth_token_cache_ttl
+    return min(float(expires_at) - time.time(), settings.auth_token_cache_ttl)
+
+
+def get_signing_keys(jwks: dict[str, typing.Any]) -> dict[str | None, typing.Any]:
+    """Возвращает ключи проверки подписи из JWKS по kid, пропуская ключи, которые не удалось разобрать."""
+    signing_keys = {}
+    for jwk in jwks.get('keys', []):
+        try:
+            signing_keys[jwk.get('kid')] = jwt.PyJWK(jwk).key
+        except jwt.PyJWTError as er:
+            logger.error(f'Invalid signing key: {jwk.get("kid")} in JWKS: {er}')
+    return signing_keys
+
+
+class AuthService:
+    """
+    Сервис аутентификации пользователей по JWT.
+
+    Токен проверяется сервисом auth через общий пул HTTP-соединений или локально по подписи
+    (ключ AUTH_JWT_KEY или JWKS из AUTH_JWKS_URL). Проверенные токены хранятся в кэше
+    по хэшу токена до истечения их срока действия.
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient) -> None:
+        """Инициализирует сервис аутентификации."""
+        self._http_client = http_client
+        self._jwks_cache = AsyncTTLCache(1, settings.auth_jwks_ttl)
+        self._jwks_loaded_at: float = 0
+
+    async def authenticate(self, token: str) -> dict[str, str]:
+        """Возвращает данные пользователя (sub) из проверенного токена."""
+        try:
+            claims = jwt.decode(token, options={'verify_signature': False})
+        except jwt.InvalidTokenError as er:
+            raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='You are not authenticated') from er
+        return await auth_token_cache.get_or_load(  # type: ignore[no-any-return]
+            hashlib.sha256(token.encode()).hexdigest(),
+            partial(self._verify_token, token),
+            ttl=get_token_ttl(claims),
+        )
+
+    async def close(self) -> None:
+        """Закрывает пул HTTP-соединений."""
+        await self._http_client.aclose()
+
+    async def _verify_token(self, token: str) -> dict[str, str]:
+        """Проверяет токен и возвращает данные пользователя."""
+        if settings.auth_jwt_verify_locally:
+            claims = await self._verify_locally(token)
+        else:
+            claims = await self._verify_remotely(token)
+        return json.loads(claims['sub'])  # type: ignore[no-any-return]
+
+    async def _verify_remotely(self, token: str) -> dict[str, typing.Any]:
+        """Проверяет токен в сервисе auth."""
+        response = await self._http_client.get(
+            f'{settings.auth_server_url}/is_authenticated',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        if response.status_code == HTTPStatus.UNAUTHORIZED:
+            raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='You are not authenticated')
+        if response.status_code != HTTPStatus.OK:
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail='Something was broke')
+        return jwt.decode(token, options={'verify_signature': False})  # type: ignore[no-any-return]
+
+    async def _verify_locally(self, token: str) -> dict[str, typing.Any]:
+        """Проверяет подпись и срок действия токена без обращения к сервису auth."""
+        try:
+            signing_key = await self._get_signing_key(token)
+            return jwt.decode(  # type: ignore[no-any-return]
+                token,
+                signing_key,
+                algorithms=settings.auth_jwt_algorithms.split(','),
+            )
+        except jwt.PyJWTError as er:
+            # Ошибки ключа (неизвестный kid, неподдерживаемый алгоритм) означают, что токен не проверен
+            raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='You are not authenticated') from er
+
+    async def _get_signing_key(self, token: str) -> typing.Any:
+        """Возвращает ключ проверки подписи токена: AUTH_JWT_KEY или ключ из JWKS по kid токена."""
+        if settings.auth_jwt_key:
+            return settings.auth_jwt_key
+        key_id = jwt.get_unverified_header(token).get('kid')
+        signing_keys = await self._jwks_cache.get_or_load(JWKS_CACHE_KEY, self._load_jwks)
+        # Неизвестный kid означает ротацию ключей, но JWKS перечитывается не чаще AUTH_JWKS_REFRESH_INTERVAL
+        refresh_at = self._jwks_loaded_at + settings.auth_jwks_refresh_interval
+        if key_id not in signing_keys and refresh_at <= time.monotonic():
+            self._jwks_cache.invalidate(JWKS_CACHE_KEY)
+            signing_keys = await self._jwks_cache.get_or_load(JWKS_CACHE_KEY, self._load_jwks)
+        if key_id not in signing_keys:
+            raise jwt.InvalidKeyError(f'Unknown signing key: {key_id}')
+        return signing_keys[key_id]
+
+    async def _load_jwks(self) -> dict[str | None, typing.Any]:
+        """Загружает набор публичных ключей (JWKS) сервиса auth."""
+        try:
+            response = await self._http_client.get(settings.auth_jwks_url)
+            response.raise_for_status()
+        except httpx.HTTPError as er:
+            logger.exception(f'Error loading JWKS from {settings.auth_jwks_url}: {er}')
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail='Something was broke') from er
+        self._jwks_loaded_at = time.monotonic()
+        signing_keys = get_signing_keys(response.json())
+        logger.info(f'Loaded {len(signing_keys)} signing keys from {settings.auth_jwks_url}')
+        return signing_keys
+
+
+auth_service: AuthService | None = None
+
+
+def get_auth_service() -> AuthService | None:
+    """Возвращает объект AuthService или None."""
+    return auth_service
+
+
+async def on_startup() -> None:
+    """Создает общий пул HTTP-соединений с сервисом аутентификации."""
+    global auth_service
+    auth_service = AuthService(
+        httpx.AsyncClient(
+            timeout=settings.auth_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.auth_max_connections,
+                max_keepalive_connections=settings.auth_max_connections,
+            ),
+        ),
+    )
+
+
+async def on_shutdown() -> None:
+    """Закрывает пул HTTP-соединений с сервисом аутентификации."""
+    if auth_service:
+        await auth_service.close()
+        logger.info('Auth HTTP client closed.')
@@ -0,0 +1,261 @@
+"""Модуль потребителя журнала событий, записывающего закладки, оценки и отзывы в MongoDB."""
+
+import asyncio
+import datetime
+import uuid
+
+from core.config import settings
+from db import event_log
+from db.mongo.mongo_rep import DUPLICATE_KEY_ERROR_CODE, MongoRepository
+from loguru import logger
+from pymongo import InsertOne
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from services.film_bookmarks import BookmarksService
+from services.film_reviews import FilmReviewsService
+from services.film_score import FilmScoreService
+
+# Ключ записи пользователя о фильме: (film_id, user_id)
+EntryKey = tuple[uuid.UUID, uuid.UUID]
+
+
+def get_entry_key(payload: event_log.Payload) -> EntryKey:
+    """Возвращает ключ записи пользователя о фильме, к которой относится событие."""
+    return uuid.UUID(payload['film_id']), uuid.UUID(payload['user_id'])
+
+
+def get_review_fields(payload: event_log.Payload) -> event_log.Payload:
+    """Возвращает поля отзыва из события добавления отзыва."""
+    return {
+        'film_id': uuid.UUID(payload['film_id']),
+        'review_text': payload['review_text'],
+        'user_id': uuid.UUID(payload['user_id']),
+        'film_score': payload['film_score'],
+        'create_at': datetime.datetime.fromisoformat(payload['create_at']),
+    }
+
+
+def select_payloads(events: list[event_log.Event], *event_types: str) -> list[event_log.Payload]:
+    """Возвращает данные событий указанных типов в порядке журнала."""
+    return [event['payload'] for event in events if event['event_type'] in event_types]
+
+
+def get_last_scores(events: list[event_log.Event]) -> dict[EntryKey, float | None]:
+    """
+    Возвращает последнюю оценку (None - оценка удалена) каждой записи пользователя о фильме.
+
+    Оценка из добавленного отзыва тоже учитывается, чтобы итоговая оценка соответствовала порядку событий.
+    """
+    return {
+        get_entry_key(event['payload']): event['payload'].get('film_score')
+        for event in events
+        if event['event_type'] in {event_log.SCORE_ADDED, event_log.SCORE_DELETED} or (
+            event['event_type'] == event_log.REVIEW_ADDED and event['payload']['film_score'] is not None
+        )
+    }
+
+
+def get_bookmark_changes(events: list[event_log.Event]) -> dict[EntryKey, bool]:
+    """Возвращает последнее изменение (True - добавление, False - удаление) каждой закладки."""
+    return {
+        get_entry_key(event['payload']): event['event_type'] == event_log.BOOKMARK_ADDED
+        for event in events
+        if event['event_type'] in {event_log.BOOKMARK_ADDED, event_log.BOOKMARK_DELETED}
+    }
+
+
+def group_user_scores(film_scores: dict[EntryKey, float | None]) -> dict[uuid.UUID, dict[uuid.UUID, float]]:
+    """Группирует добавленные оценки по пользователям для пакетной записи."""
+    user_scores: dict[uuid.UUID, dict[uuid.UUID, float]] = {}
+    for (film_id, user_id), film_score in film_scores.items():
+        if film_score is not None:
+            user_scores.setdefault(user_id, {})[film_id] = film_score
+    return user_scores
+
+
+class EventConsumer:
+    """
+    Потребитель журнала событий.
+
+    События читаются пачками после подтвержденного смещения и записываются пакетными запросами:
+    из событий одной записи (закладки или оценки пользователя о фильме) в пачке применяется последнее,
+    изменения одного отзыва схлопываются, а отзывы добавляются, редактируются и удаляются в этом порядке.
+    Ключи идемпотентности (event_id) обработанных событий хранятся в коллекции processed_events,
+    поэтому повторно прочитанные после сбоя события не применяются дважды. Смещение подтверждается
+    только после успешной записи пачки, иначе пачка читается повторно.
+    """
+
+    def __init__(self, ugc_event_log: event_log.EventLog, mongo_repository: MongoRepository) -> None:
+        """Инициализирует потребителя журнала событий."""
+        self._event_log = ugc_event_log
+        self._mongo_repository = mongo_repository
+        self.processed_collection_name = 'processed_events'
+        self._bookmark_service = BookmarksService(mongo_repository)
+        self._score_service = FilmScoreService(mongo_repository)
+        self._review_service = FilmReviewsService(mongo_repository)
+
+    async def consume_batch(self, batch_size: int = settings.event_consumer_batch_size) -> int | None:
+        """Применяет пачку событий и возвращает количество прочитанных событий (0 - журнал пуст, None - ошибка)."""
+        events, next_offset = await self._event_log.read(await self._event_log.committed_offset(), batch_size)
+        if not events:
+            return 0
+        new_events = await self._get_new_events(events)
+        if new_events is None or not await self._apply_events(new_events):
+            logger.error(f'Events batch of {len(events)} events not applied, it will be read again')
+            return None
+        if not await self._commit(new_events, next_offset):
+            logger.error(f'Processed events of the batch of {len(events)} events not saved, it will be read again')
+            return None
+        logger.info(f'Applied {len(new_events)} of {len(events)} events')
+        return len(events)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """
+        Применяет события до установки stop_event, после чего применяет оставшиеся события и завершается.
+
+        Неудавшаяся пачка повторяется с удвоением задержки. После установки stop_event пачка повторяется
+        не больше EVENT_CONSUMER_MAX_RETRIES раз, после чего потребитель завершается с ошибкой в логе.
+        """
+        failed_attempts = 0
+        while True:
+            consumed_count = await self.consume_batch()
+            if consumed_count is None:
+                failed_attempts += 1
+                if not await self._wait_for_retry(stop_event, failed_attempts):
+                    return
+            elif consumed_count:
+                failed_attempts = 0
+            elif stop_event.is_set():
+                return
+            else:
+                await self._wait_for_events(stop_event)
+
+    async def _wait_for_retry(self, stop_event: asyncio.Event, failed_attempts: int) -> bool:
+        """Ожидает перед повтором неудавшейся пачки, возвращает False, если после остановки повторы исчерпаны."""
+        max_retries = settings.event_consumer_max_retries
+        if stop_event.is_set() and failed_attempts > max_retries:
+            logger.error(f'Event consumer stopped after {failed_attempts} failed attempts, events are not applied')
+            return False
+        await asyncio.sleep(settings.event_consumer_retry_delay * 2 ** (min(failed_attempts, max_retries) - 1))
+        return True
+
+    async def _wait_for_events(self, stop_event: asyncio.Event) -> None:
+        """Ожидает новые события EVENT_CONSUMER_POLL_INTERVAL секунд или до установки stop_event."""
+        try:
+            await asyncio.wait_for(stop_event.wait(), settings.event_consumer_poll_interval)
+        except asyncio.TimeoutError:
+            logger.debug('No new events in the event log')
+
+    async def _get_new_events(self, events: list[event_log.Event]) -> list[event_log.Event] | None:
+        """Возвращает события, ключей идемпотентности которых еще нет в processed_events."""
+        try:
+            processed_ids = {
+                entry['_id']
+                async for entry in self._mongo_repository.iter_find(
+                    self.processed_collection_name,
+                    {'_id': {'$in': [event['event_id'] for event in events]}},
+                    projection={'_id': 1},
+                )
+            }
+        except PyMongoError:
+            return None
+        return [event for event in events if event['event_id'] not in processed_ids]
+
+    async def _apply_events(self, events: list[event_log.Event]) -> bool:
+        """Записывает события в MongoDB: сначала отзывы, затем оценки и закладки."""
+        is_reviews_applied = await self._apply_reviews(events)
+        is_scores_applied = await self._apply_scores(get_last_scores(events))
+        is_bookmarks_applied = await self._bookmark_service.apply_bookmark_changes(get_bookmark_changes(events))
+        return is_reviews_applied and is_scores_applied and is_bookmarks_applied
+
+    async def _apply_reviews(self, events: list[event_log.Event]) -> bool:
+        """Добавляет, редактирует и удаляет отзывы (в этом порядке) и возвращает признак успешной записи изменений."""
+        added_statuses = await asyncio.gather(
+            *(self._add_review(payload) for payload in select_payloads(events, event_log.REVIEW_ADDED)),
+        )
+        is_updated = await self._update_reviews(events)
+        deleted_statuses = await asyncio.gather(
+            *(
+                self._review_service.delete_review(payload['review_id'], uuid.UUID(payload['user_id']))
+                for payload in select_payloads(events, event_log.REVIEW_DELETED)
+            ),
+        )
+        # Отзыв, записанный или удаленный до сбоя, при повторном чтении пачки дает 0, это не ошибка
+        return is_updated and all(status is not None for status in (*added_statuses, *deleted_statuses))
+
+    async def _update_reviews(self, events: list[event_log.Event]) -> bool:
+        """
+        Редактирует отзывы и возвращает признак успешной записи изменений.
+
+        Изменения одного отзыва в пачке схлопываются: заданные поля более поздних изменений заменяют ранние.
+        """
+        review_updates: dict[tuple[str, str], event_log.Payload] = {}
+        for payload in select_payloads(events, event_log.REVIEW_UPDATED):
+            update_key = (payload['review_id'], payload['user_id'])
+            review_updates[update_key] = {
+                **review_updates.get(update_key, {}),
+                **{field: field_value for field, field_value in payload.items() if field_value is not None},
+            }
+        updated_reviews = await asyncio.gather(
+            *(
+                self._review_service.update_review(
+                    uuid.UUID(review_update['user_id']),
+                    review_update['review_id'],
+                    review_update.get('review_text'),
+                    review_update.get('film_score'),
+                )
+                for review_update in review_updates.values()
+            ),
+        )
+        # Отзыв, удаленный до редактирования, дает пустой словарь, это не ошибка
+        return all(updated_review is not None for updated_review in updated_reviews)
+
+    async def _add_review(self, payload: event_log.Payload) -> int | None:
+        """
+        Добавляет отзыв из события и возвращает количество добавленных отзывов или None при ошибке.
+
+        Повторный отзыв отклоняется уникальным индексом, поэтому отзыв, уже записанный до сбоя, не дублируется.
+        """
+        try:
+            review_id = await self._review_service.insert_review(**get_review_fields(payload))
+        except DuplicateKeyError:
+            return 0
+        return None if review_id is None else 1
+
+    async def _apply_scores(self, film_scores: dict[EntryKey, float | None]) -> bool:
+        """Записывает последние оценки пакетами по пользователям, удаляет снятые оценки и возвращает признак успеха."""
+        user_scores = group_user_scores(film_scores)
+        statuses = await asyncio.gather(
+            *(self._score_service.add_scores(scores, user_id) for user_id, scores in user_scores.items()),
+        )
+        is_deleted = await self._delete_scores(film_scores)
+        return is_deleted and all('error' not in user_statuses.values() for user_statuses in statuses)
+
+    async def _delete_scores(self, film_scores: dict[EntryKey, float | None]) -> bool:
+        """Удаляет снятые оценки и возвращает признак успешного удаления всех оценок."""
+        statuses = await asyncio.gather(
+            *(
+                self._score_service.delete_score(film_id, user_id)
+                for (film_id, user_id), film_score in film_scores.items()
+                if film_score is None
+            ),
+        )
+        # Оценка, удаленная до сбоя, при повторном чтении пачки дает 0, это не ошибка
+        return all(status is not None for status in statuses)
+
+    async def _commit(self, events: list[event_log.Event], next_offset: int) -> bool:
+        """
+        Сохраняет ключи идемпотентности примененных событий и подтверждает смещение пачки.
+
+        Если ключи не сохранены, смещение не подтверждается и пачка читается повторно. Ключи, сохраненные
+        при предыдущей попытке, отклоняются уникальным _id, это не ошибка.
+        """
+        if events:
+            processed_at = datetime.datetime.now()
+            write_errors = await self._mongo_repository.bulk_write(
+                self.processed_collection_name,
+                [InsertOne({'_id': event['event_id'], 'processed_at': processed_at}) for event in events],
+            )
+            if write_errors is None or set(write_errors.values()) - {DUPLICATE_KEY_ERROR_CODE}:
+                return False
+        await self._event_log.commit(next_offset)
+        return True
@@ -1,11 +1,44 @@
 """Модуль сервиса для работы с закладками фильмов."""
 
-from functools import lru_cache
+import datetime
+import typing
+from functools import lru_cache, partial
 from uuid import UUID
 
-from db.mongo.mongo_rep import MongoRepository, get_mongo_repository
+from core.cache import bookmarks_cache
+from db.mongo.keyset import SortSpec, build_keyset_query, decode_cursor, encode_cursor, get_sort_values
+from db.mongo.mongo_rep import (
+    DUPLICATE_KEY_ERROR_CODE,
+    STALE_READ_PREFERENCE,
+    MongoRepository,
+    get_repository,
+)
+from db.mongo.uuids import decode_uuid, encode_uuid, uuid_query
+from db.mongo.write_behind import get_bookmarks_queue
 from fastapi import Depends, HTTPException, status
-from pymongo.errors import DuplicateKeyError
+from pymongo import DeleteOne, InsertOne
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+
+def get_film_hash(film_id: UUID | str) -> int:
+    """Возвращает 64-битный ключ фильма (старшие биты UUID) для множества закладок пользователя."""
+    return UUID(str(film_id)).int >> 64
+
+
+def get_bookmark_document(film_id: UUID, user_id: UUID) -> dict[str, typing.Any]:
+    """Возвращает запись закладки со временем добавления."""
+    return {'film_id': encode_uuid(film_id), 'user_id': encode_uuid(user_id), 'created_at': datetime.datetime.now()}
+
+
+def update_bookmarks_cache(user_id: UUID, film_ids: typing.Iterable[UUID], is_added: bool) -> None:
+    """Добавляет фильмы в закэшированное множество закладок пользователя или удаляет их из него."""
+    film_hashes = {get_film_hash(film_id) for film_id in film_ids}
+    update_method = set.update if is_added else set.difference_update
+    bookmarks_cache.update(
+        str(user_id),
+        lambda cached_hashes: update_method(cached_hashes, film_hashes),
+        group=str(user_id),
+    )
 
 
 class BookmarksService:
@@ -15,36 +48,173 @@ class BookmarksService:
         """Инициализирует сервис закладок фильмов."""
         self._mongo_repository = mongo_repository
         self.collection_name = 'film_bookmarks'
+        self.bookmarks_sort: SortSpec = [('created_at', -1), ('_id', -1)]
 
-    async def get_bookmark_films(self, user_id: UUID) -> list[dict[str, UUID]] | None:
-        """Возвращает список id фильмов, добавленных пользователем в закладки."""
-        films_bookmarks = await self._mongo_repository.find_all(self.collection_name, {'user_id': str(user_id)})
-        if films_bookmarks:
-            return [film_obj.get('film_id') for film_obj in films_bookmarks]
-        return None
+    async def get_bookmark_films(
+        self,
+        user_id: UUID,
+        page_number: int = 1,
+        page_size: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[list[str] | None, str | None]:
+        """
+        Возвращает страницу id фильмов из закладок пользователя (начиная с новых) и курсор следующей страницы.
+
+        Если передан курсор, страница выбирается по ключу (created_at, _id) без пропуска записей,
+        иначе по номеру страницы.
+        """
+        query: dict[str, typing.Any] = uuid_query(user_id=user_id)
+        if cursor:
+            try:
+                query.update(build_keyset_query(self.bookmarks_sort, decode_cursor(cursor)))
+            except ValueError as er:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='invalid cursor') from er
+            page_number = 1
+        films_bookmarks = await self._mongo_repository.find_all(
+            self.collection_name,
+            query,
+            page_number=page_number,
+            page_size=page_size,
+            read_preference=STALE_READ_PREFERENCE,
+            sort=self.bookmarks_sort,
+            # Запрос, сортировка и проекция покрываются индексом (user_id, created_at, _id, film_id)
+            projection={'film_id': 1, 'created_at': 1},
+        )
+        if not films_bookmarks:
+            return None, None
+        next_cursor = None
+        if len(films_bookmarks) == page_size:
+            next_cursor = encode_cursor(get_sort_values(films_bookmarks[-1], self.bookmarks_sort))
+        return [decode_uuid(film_obj['film_id']) for film_obj in films_bookmarks], next_cursor
+
+    async def get_bookmarked_films(self, film_ids: list[UUID], user_id: UUID) -> dict[UUID, bool] | None:
+        """
+        Возвращает признак наличия каждого фильма в закладках пользователя.
+
+        Ответ строится по кэшу множества ключей фильмов пользователя, которое загружается запросом,
+        покрываемым индексом (user_id, film_id), и изменяется при добавлении и удалении закладок.
+        """
+        try:
+            film_hashes = await bookmarks_cache.get_or_load(
+                str(user_id),
+                partial(self._load_film_hashes, user_id),
+                group=str(user_id),
+            )
+        except PyMongoError:
+            return None
+        return {film_id: get_film_hash(film_id) in film_hashes for film_id in film_ids}
+
+    async def iter_bookmark_films(self, user_id: UUID) -> typing.AsyncIterator[dict[str, typing.Any]]:
+        """Возвращает закладки пользователя потоком, не загружая их в память целиком."""
+        return self._mongo_repository.iter_find(
+            self.collection_name,
+            uuid_query(user_id=user_id),
+            read_preference=STALE_READ_PREFERENCE,
+            projection={'film_id': 1, '_id': 0},
+        )
 
     async def add_film_to_bookmarks(self, film_id: UUID, user_id: UUID) -> str | None:
-        """Добавляет фильм в закладки."""
+        """
+        Добавляет фильм в закладки.
+
+        В режиме отложенной записи операция только ставится в очередь, повторное добавление не отклоняется.
+        """
+        bookmarks_queue = get_bookmarks_queue()
+        if bookmarks_queue:
+            await bookmarks_queue.put((str(film_id), str(user_id)), InsertOne(get_bookmark_document(film_id, user_id)))
+            update_bookmarks_cache(user_id, [film_id], is_added=True)
+            return 'queued'
         try:
-            return await self._mongo_repository.insert_one(  # type: ignore[no-any-return]
+            bookmark_id = await self._mongo_repository.insert_one(
                 self.collection_name,
-                {'film_id': str(film_id), 'user_id': str(user_id)},
+                get_bookmark_document(film_id, user_id),
             )
         except DuplicateKeyError as er:
+            update_bookmarks_cache(user_id, [film_id], is_added=True)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail='the movie has already been added to bookmarks',
             ) from er
+        if bookmark_id:
+            update_bookmarks_cache(user_id, [film_id], is_added=True)
+        return bookmark_id  # type: ignore[no-any-return]
+
+    async def add_films_to_bookmarks(self, film_ids: list[UUID], user_id: UUID) -> dict[UUID, str]:
+        """Добавляет фильмы в закладки одним запросом и возвращает статус добавления каждого фильма."""
+        film_ids = list(dict.fromkeys(film_ids))
+        write_errors = await self._mongo_repository.bulk_write(
+            self.collection_name,
+            [InsertOne(get_bookmark_document(film_id, user_id)) for film_id in film_ids],
+        )
+        if write_errors is None:
+            return dict.fromkeys(film_ids, 'error')
+        update_bookmarks_cache(user_id, film_ids, is_added=True)
+        statuses = {}
+        for index, film_id in enumerate(film_ids):
+            error_code = write_errors.get(index)
+            if error_code is None:
+                statuses[film_id] = 'created'
+            elif error_code == DUPLICATE_KEY_ERROR_CODE:
+                statuses[film_id] = 'exists'
+            else:
+                statuses[film_id] = 'error'
+                update_bookmarks_cache(user_id, [film_id], is_added=False)
+        return statuses
+
+    async def apply_bookmark_changes(self, bookmark_changes: dict[tuple[UUID, UUID], bool]) -> bool:
+        """Добавляет (True) и удаляет (False) закладки (film_id, user_id) одним пакетным запросом."""
+        if not bookmark_changes:
+            return True
+        write_errors = await self._mongo_repository.bulk_write(
+            self.collection_name,
+            [
+                InsertOne(get_bookmark_document(film_id, user_id))
+                if is_added
+                else DeleteOne(uuid_query(film_id=film_id, user_id=user_id))
+                for (film_id, user_id), is_added in bookmark_changes.items()
+            ],
+        )
+        for _, user_id in bookmark_changes:
+            bookmarks_cache.invalidate_group(str(user_id))
+        # Повторное добавление существующей закладки не считается ошибкой
+        return write_errors is not None and all(
+            error_code == DUPLICATE_KEY_ERROR_CODE for error_code in write_errors.values()
+        )
 
     async def delete_film_from_bookmarks(self, film_id: UUID, user_id: UUID) -> int | None:
-        """Удаляет фильм из закладок пользователя."""
-        return await self._mongo_repository.delete_one(  # type: ignore[no-any-return]
+        """
+        Удаляет фильм из закладок пользователя.
+
+        В режиме отложенной записи операция только ставится в очередь, отсутствие закладки не проверяется.
+        """
+        bookmarks_queue = get_bookmarks_queue()
+        if bookmarks_queue:
+            await bookmarks_queue.put(
+                (str(film_id), str(user_id)),
+                DeleteOne(uuid_query(film_id=film_id, user_id=user_id)),
+            )
+            update_bookmarks_cache(user_id, [film_id], is_added=False)
+            return 1
+        deleted_count = await self._mongo_repository.delete_one(
             self.collection_name,
-            {'film_id': str(film_id), 'user_id': str(user_id)},
+            uuid_query(film_id=film_id, user_id=user_id),
         )
+        update_bookmarks_cache(user_id, [film_id], is_added=False)
+        return deleted_count  # type: ignore[no-any-return]
+
+    async def _load_film_hashes(self, user_id: UUID) -> set[int]:
+        """Загружает ключи фильмов из закладок пользователя (запрос и проекция покрываются индексом)."""
+        return {
+            get_film_hash(bookmark['film_id'])
+            async for bookmark in self._mongo_repository.iter_find(
+                self.collection_name,
+                uuid_query(user_id=user_id),
+                projection={'film_id': 1, '_id': 0},
+            )
+        }
 
 
 @lru_cache
-def get_bookmark_service(repository=Depends(get_mongo_repository)) -> BookmarksService:  # type: ignore[no-untyped-def]
+def get_bookmark_service(repository=Depends(get_repository)) -> BookmarksService:  # type: ignore[no-untyped-def]
     """Возвращает экземпляр сервиса для работы с закладками фильмов."""
     return BookmarksService(repository)
@@ -0,0 +1,169 @@
+"""Модуль сервиса рейтингов фильмов: лучшие по средней оценке и самые добавляемые в закладки."""
+
+import asyncio
+import contextlib
+import datetime
+import types
+import typing
+from functools import lru_cache
+
+import bson
+from core.config import settings
+from db.mongo import mongo_rep  # type: ignore[attr-defined]
+from db.mongo.uuids import decode_uuid
+from fastapi import Depends
+from loguru import logger
+
+TOP_RATED = 'top_rated'
+MOST_BOOKMARKED = 'most_bookmarked'
+
+
+TOP_RATED_SORT = types.MappingProxyType({'average_film_score': -1, 'scores_count': -1})
+
+
+def get_top_rated_stages(min_votes: int) -> list[dict[str, typing.Any]]:
+    """Возвращает начальные стадии конвейера лучших по оценке фильмов с количеством оценок от min_votes."""
+    return [
+        {'$match': {'count': {'$gte': min_votes}}},
+        {
+            '$project': {
+                '_id': 0,
+                'film_id': 1,
+                'average_film_score': {'$divide': ['$sum', '$count']},
+                'scores_count': '$count',
+            },
+        },
+    ]
+
+
+def get_leaderboard_stages(leaderboard_name: str, sort: dict[str, int]) -> list[dict[str, typing.Any]]:
+    """Возвращает завершающие стадии конвейера: сортировку, первые N фильмов и запись рейтинга через $merge."""
+    return [
+        # $facet возвращает один документ и при пустом входе, поэтому рейтинг без фильмов тоже перезаписывается
+        {'$facet': {'films': [{'$sort': sort}, {'$limit': settings.leaderboard_size}]}},
+        {
+            '$project': {
+                '_id': {'$literal': leaderboard_name},
+                'films': 1,
+                'refreshed_at': {'$literal': datetime.datetime.now()},
+            },
+        },
+        {'$merge': {'into': 'film_leaderboards', 'on': '_id', 'whenMatched': 'replace'}},
+    ]
+
+
+class FilmLeaderboardsService:
+    """
+    Сервис рейтингов фильмов.
+
+    Рейтинги периодически пересчитываются конвейерами агрегации и сохраняются через $merge в коллекцию
+    film_leaderboards одним документом на рейтинг, поэтому чтение рейтинга - это одно чтение документа по _id.
+    """
+
+    def __init__(self, mongo_repository: mongo_rep.MongoRepository):
+        """Инициализирует сервис рейтингов фильмов."""
+        self._mongo_repository = mongo_repository
+        self.collection_name = 'film_leaderboards'
+
+    async def refresh(self) -> bool:
+        """Пересчитывает все рейтинги фильмов."""
+        results = await asyncio.gather(self._refresh_top_rated(), self._refresh_most_bookmarked())
+        return all(result is not None for result in results)
+
+    async def get_leaderboard(
+        self,
+        leaderboard_name: str,
+        limit: int,
+        min_votes: int | None = None,
+    ) -> list[dict[str, typing.Any]] | None:
+        """
+        Возвращает первые limit фильмов рейтинга.
+
+        Сохраненный рейтинг лучших по оценке фильмов содержит фильмы с количеством оценок от LEADERBOARD_MIN_VOTES,
+        поэтому для большего min_votes рейтинг вычисляется агрегацией по сводке оценок.
+        """
+        if min_votes is not None and min_votes > settings.leaderboard_min_votes:
+            films = await self._get_top_rated(limit, min_votes)
+        else:
+            leaderboard = await self._mongo_repository.find_one(
+                self.collection_name,
+                {'_id': leaderboard_name},
+                read_preference=mongo_rep.STALE_READ_PREFERENCE,
+            )
+            films = leaderboard['films'][:limit] if leaderboard else None
+        if films is None:
+            return None
+        return [{**film, 'film_id': decode_uuid(film['film_id'])} for film in films]
+
+    async def _get_top_rated(self, limit: int, min_votes: int) -> list[dict[str, typing.Any]] | None:
+        """Возвращает первые limit фильмов по средней оценке с количеством оценок от min_votes из сводки оценок."""
+        return await self._mongo_repository.aggregate(  # type: ignore[no-any-return]
+            'film_score_summary',
+            [*get_top_rated_stages(min_votes), {'$sort': dict(TOP_RATED_SORT)}, {'$limit': limit}],
+        )
+
+    async def _refresh_top_rated(self) -> list[dict[str, typing.Any]] | None:
+        """Пересчитывает рейтинг фильмов по средней оценке из сводки оценок."""
+        return await self._mongo_repository.aggregate(  # type: ignore[no-any-return]
+            'film_score_summary',
+            [
+                *get_top_rated_stages(settings.leaderboard_min_votes),
+                *get_leaderboard_stages(TOP_RATED, dict(TOP_RATED_SORT)),
+            ],
+        )
+
+    async def _refresh_most_bookmarked(self) -> list[dict[str, typing.Any]] | None:
+        """Пересчитывает рейтинг фильмов по количеству добавлений в закладки за последние дни."""
+        window_start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            days=settings.leaderboard_bookmarks_window_days,
+        )
+        return await self._mongo_repository.aggregate(  # type: ignore[no-any-return]
+            'film_bookmarks',
+            [
+                # Время добавления закладки берется из ObjectId
+                {'$match': {'_id': {'$gte': bson.ObjectId.from_datetime(window_start)}}},
+                {'$group': {'_id': '$film_id', 'bookmarks_count': {'$sum': 1}}},
+                {'$project': {'_id': 0, 'film_id': '$_id', 'bookmarks_count': 1}},
+                *get_leaderboard_stages(MOST_BOOKMARKED, {'bookmarks_count': -1}),
+            ],
+        )
+
+
+async def refresh_periodically() -> None:
+    """
+    Пересчитывает рейтинги фильмов каждые LEADERBOARD_REFRESH_INTERVAL секунд.
+
+    Если подключение к MongoDB не установлено, пересчет пропускается до следующего интервала.
+    """
+    while True:
+        if mongo_rep.mongo_repository is None:
+            logger.error('Film leaderboards refresh skipped: MongoDB repository is not initialized')
+        elif not await FilmLeaderboardsService(mongo_rep.mongo_repository).refresh():
+            logger.error('Film leaderboards refresh failed')
+        await asyncio.sleep(settings.leaderboard_refresh_interval)
+
+
+refresh_task: asyncio.Task[None] | None = None
+
+
+async def on_startup() -> None:
+    """Запускает периодический пересчет рейтингов, если он включен."""
+    global refresh_task
+    if settings.leaderboard_refresh_interval > 0:
+        refresh_task = asyncio.create_task(refresh_periodically())
+
+
+async def on_shutdown() -> None:
+    """Останавливает периодический пересчет рейтингов и ожидает завершения задачи."""
+    if refresh_task:
+        refresh_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await refresh_task
+
+
+@lru_cache
+def get_film_leaderboards_service(
+    repository: mongo_rep.MongoRepository = Depends(mongo_rep.get_repository),
+) -> FilmLeaderboardsService:
+    """Возвращает экземпляр сервиса рейтингов фильмов."""
+    return FilmLeaderboardsService(repository)
@@ -1,12 +1,21 @@
 """Модуль сервиса для работы с отзывами фильмов."""
 
 import datetime
+import typing
 import uuid
-from functools import lru_cache
+from functools import lru_cache, partial
 
 import bson
-from db.mongo.mongo_rep import MongoRepository, get_mongo_repository
-from fastapi import Depends
+import pymongo
+from core.cache import film_reviews_cache, invalidate_film
+from db.mongo.keyset import SortSpec, build_keyset_query, decode_cursor, encode_cursor, get_sort_values
+from db.mongo.mongo_rep import STALE_READ_PREFERENCE, MongoRepository, MongoSession, get_repository
+from db.mongo.uuids import encode_uuid, get_upsert_fields, uuid_query
+from fastapi import Depends, HTTPException, status
+from services.film_score_summary import FilmScoreSummaryService
+
+# Порядок отзывов: новые, с наибольшей оценкой, наиболее полезные (по количеству лайков)
+ReviewSort = typing.Literal['newest', 'highest_score', 'most_helpful']
 
 
 class FilmReviewsService:
@@ -16,6 +25,24 @@ class FilmReviewsService:
         """Инициализирует сервис отзывов о фильмах."""
         self._mongo_repository = mongo_repository
         self.collection_name = 'film_reviews'
+        # Каждому порядку отзывов соответствует индекс (film_id, <поля сортировки>) из db.mongo.indexes,
+        # поэтому страница читается из индекса по порядку без сортировки в памяти
+        self.review_sorts: dict[str, SortSpec] = {
+            'newest': [('create_at', -1), ('_id', -1)],
+            'highest_score': [('film_score', -1), ('_id', -1)],
+            'most_helpful': [('likes', -1), ('_id', -1)],
+        }
+        # Поля отзыва, возвращаемые пользователю (_id возвращается всегда)
+        self.review_projection = {
+            'user_id': 1,
+            'review_text': 1,
+            'film_score': 1,
+            'create_at': 1,
+            'update_at': 1,
+            'likes': 1,
+            'dislikes': 1,
+        }
+        self._summary_service = FilmScoreSummaryService(mongo_repository)
 
     async def add_review(
         self,
@@ -26,35 +53,33 @@ class FilmReviewsService:
         create_at: datetime.datetime,
     ) -> str | None:
         """Добавляет отзыв и оценку фильма."""
+        try:
+            return await self.insert_review(film_id, review_text, user_id, film_score, create_at)
+        except pymongo.errors.DuplicateKeyError:
+            # Повторный отзыв отклоняется уникальным индексом, роутер вернет ошибку 400
+            return None
+
+    async def insert_review(
+        self,
+        film_id: uuid.UUID,
+        review_text: str,
+        user_id: uuid.UUID,
+        film_score: float,
+        create_at: datetime.datetime,
+    ) -> str | None:
+        """Добавляет отзыв и оценку фильма, пробрасывая DuplicateKeyError, если отзыв пользователя уже есть."""
         document = {
-            'film_id': str(film_id),
-            'user_id': str(user_id),
+            'film_id': encode_uuid(film_id),
+            'user_id': encode_uuid(user_id),
             'review_text': review_text,
-            'film_score': str(film_score),
+            'film_score': film_score,
             'create_at': create_at,
             'update_at': datetime.datetime.now(),
+            'likes': 0,
         }
-        result = await self._mongo_repository.insert_one(self.collection_name, document)
+        result = await self._mongo_repository.run_in_transaction(partial(self._write_review, document, film_score))
         if result:
-            existing_film_score = await self._mongo_repository.find_one(
-                'film_score',
-                {'film_id': str(film_id), 'user_id': str(user_id)},
-            )
-            if existing_film_score and film_score:
-                await self._mongo_repository.update_one(
-                    'film_score',
-                    existing_film_score,
-                    {'film_score': str(film_score)},
-                )
-            elif film_score:
-                await self._mongo_repository.insert_one(
-                    'film_score',
-                    {
-                        'film_id': str(film_id),
-                        'user_id': str(user_id),
-                        'film_score': film_score,
-                    },
-                )
+            invalidate_film(film_id)
         return result  # type: ignore[no-any-return]
 
     async def update_review(
@@ -63,58 +88,195 @@ class FilmReviewsService:
         review_id: str,
         new_review_text: str | None,
         new_film_score: float | None,
-    ) -> dict[str, str] | None:
-        """Редактирует озыв и оценку фильма."""
-        result = None
+    ) -> dict[str, typing.Any] | None:
+        """
+        Редактирует отзыв и оценку фильма и возвращает измененный отзыв.
+
+        Возвращает пустой словарь, если отзыв пользователя не найден, или None при ошибке.
+        """
+        # Изменяемый отзыв читается с первичного узла, чтобы не перезаписать его устаревшей копией
         existing_film_review = await self._mongo_repository.find_one(
             self.collection_name,
-            {'_id': bson.ObjectId(review_id), 'user_id': str(user_id)},
+            {'_id': bson.ObjectId(review_id), **uuid_query(user_id=user_id)},
+            read_preference=pymongo.ReadPreference.PRIMARY,
         )
-        if existing_film_review:
-            result = await self._mongo_repository.update_one(
-                self.collection_name,
-                existing_film_review,
-                {
-                    'update_at': datetime.datetime.now()
-                    if new_review_text or new_film_score
-                    else existing_film_review['update_at'],
-                    'review_text': new_review_text or existing_film_review['review_text'],
-                    'film_score': new_film_score or existing_film_review['film_score'],
-                },
-            )
-        if new_film_score and result:
-            await self._mongo_repository.update_one(
+        if not existing_film_review:
+            return existing_film_review
+        # Фильтр только по _id и пользователю: лайки и дизлайки переносятся в отзыв параллельно с редактированием
+        result = await self._mongo_repository.update_one(
+            self.collection_name,
+            {'_id': existing_film_review['_id'], 'user_id': existing_film_review['user_id']},
+            {
+                'update_at': datetime.datetime.now()
+                if new_review_text or new_film_score
+                else existing_film_review['update_at'],
+                'review_text': new_review_text or existing_film_review['review_text'],
+                'film_score': new_film_score or existing_film_review['film_score'],
+            },
+        )
+        if not result:
+            return None
+        if new_film_score:
+            old_film_score = await self._mongo_repository.update_one(
                 'film_score',
-                {'film_id': existing_film_review['film_id'], 'user_id': existing_film_review['user_id']},
+                uuid_query(film_id=existing_film_review['film_id'], user_id=existing_film_review['user_id']),
                 {'film_score': new_film_score},
+                return_document=pymongo.ReturnDocument.BEFORE,
             )
-        return result  # type: ignore[no-any-return]
+            if old_film_score:
+                await self._summary_service.apply_score_change(
+                    existing_film_review['film_id'],
+                    old_film_score['film_score'],
+                    new_film_score,
+                )
+        invalidate_film(existing_film_review['film_id'])
+        return result
 
     async def delete_review(self, review_id: str, user_id: uuid.UUID) -> None | int:
-        """Удаляет отзыв о фильме."""
-        return await self._mongo_repository.delete_one(  # type: ignore[no-any-return]
-            self.collection_name,
-            {'_id': bson.ObjectId(review_id), 'user_id': str(user_id)},
+        """Удаляет отзыв о фильме и реакции на него и возвращает количество удаленных отзывов или None при ошибке."""
+        deleted_review = await self._mongo_repository.run_in_transaction(
+            partial(self._delete_review, {'_id': bson.ObjectId(review_id), **uuid_query(user_id=user_id)}),
         )
+        if not deleted_review:
+            # 0 - отзыв не найден, None - ошибка удаления
+            return None if deleted_review is None else 0
+        invalidate_film(deleted_review['film_id'])
+        return 1
 
     async def get_reviews_for_film(
         self,
         film_id: uuid.UUID,
         page_number: int = 1,
         page_size: int = 50,
-    ) -> list[dict[str, str]]:
-        """Возвращает список отзвов о фильме."""
+        cursor: str | None = None,
+        review_sort: ReviewSort = 'newest',
+    ) -> tuple[list[dict[str, str]] | None, str | None]:
+        """
+        Возвращает страницу отзывов о фильме в порядке review_sort и курсор следующей страницы.
+
+        Если передан курсор, страница выбирается по ключу (поля сортировки, _id) без пропуска записей,
+        иначе по номеру страницы. Курсор содержит порядок отзывов и подходит только для него.
+        """
+        query: dict[str, typing.Any] = uuid_query(film_id=film_id)
+        if cursor:
+            try:
+                sort_values = decode_cursor(cursor)
+                if sort_values[-1:] != [review_sort]:
+                    raise ValueError('Cursor does not match the review sort')
+                query.update(build_keyset_query(self.review_sorts[review_sort], sort_values[:-1]))
+            except ValueError as er:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='invalid cursor') from er
+            page_number = 1
+        return await film_reviews_cache.get_or_load(  # type: ignore[no-any-return]
+            (str(film_id), review_sort, page_number, page_size, cursor),
+            partial(self._load_reviews_page, query, review_sort, page_number, page_size),
+            group=str(film_id),
+        )
+
+    async def search_reviews(
+        self,
+        film_id: uuid.UUID,
+        search_text: str,
+        page_number: int = 1,
+        page_size: int = 20,
+    ) -> list[dict[str, typing.Any]] | None:
+        """
+        Возвращает страницу отзывов о фильме, содержащих слова из search_text, начиная с наиболее релевантных.
+
+        Поиск выполняется по текстовому индексу (film_id, review_text) только среди записей индекса этого фильма.
+        Индекс требует условия равенства по film_id, поэтому в смешанном режиме хранения UUID находятся
+        только отзывы, сохраненные в текущем формате.
+        """
         return await self._mongo_repository.find_all(  # type: ignore[no-any-return]
             self.collection_name,
-            {'film_id': str(film_id)},
+            {'film_id': encode_uuid(film_id), '$text': {'$search': search_text}},
+            page_number=page_number,
+            page_size=page_size,
+            read_preference=STALE_READ_PREFERENCE,
+            sort=[('text_score', {'$meta': 'textScore'}), ('_id', -1)],
+            projection={**self.review_projection, 'text_score': {'$meta': 'textScore'}},
+        )
+
+    async def iter_user_reviews(self, user_id: uuid.UUID) -> typing.AsyncIterator[dict[str, typing.Any]]:
+        """Возвращает отзывы пользователя потоком, начиная с новых, не загружая их в память целиком."""
+        return self._mongo_repository.iter_find(
+            self.collection_name,
+            uuid_query(user_id=user_id),
+            read_preference=STALE_READ_PREFERENCE,
+            sort=[('create_at', -1)],
+            projection={'film_id': 1, 'review_text': 1, 'film_score': 1, 'create_at': 1, 'update_at': 1},
+        )
+
+    async def _delete_review(
+        self,
+        query: dict[str, typing.Any],
+        session: MongoSession,
+    ) -> dict[str, typing.Any] | None:
+        """Удаляет отзыв, а затем реакции на него и их счетчики и возвращает удаленный отзыв."""
+        deleted_review = await self._mongo_repository.find_one_and_delete(self.collection_name, query, session=session)
+        if not deleted_review:
+            return deleted_review
+        reactions_query = {'review_id': deleted_review['_id']}
+        # Операции одной сессии выполняются последовательно
+        deleted_counts = [
+            await self._mongo_repository.delete_many('review_reactions', reactions_query, session=session),
+            await self._mongo_repository.delete_many('review_reaction_counters', reactions_query, session=session),
+        ]
+        return None if None in deleted_counts else deleted_review
+
+    async def _write_review(
+        self,
+        document: dict[str, typing.Any],
+        film_score: float,
+        session: MongoSession,
+    ) -> str | None:
+        """Добавляет отзыв, а затем оценку фильма одним upsert-запросом и изменение сводки оценок."""
+        review_id = await self._mongo_repository.insert_one(self.collection_name, document, session=session)
+        if not review_id or not film_score:
+            return review_id  # type: ignore[no-any-return]
+        previous_film_score = await self._mongo_repository.upsert_one(
+            'film_score',
+            uuid_query(film_id=document['film_id'], user_id=document['user_id']),
+            {'film_score': film_score},
+            session=session,
+            insert_data=get_upsert_fields(film_id=document['film_id'], user_id=document['user_id']),
+        )
+        if previous_film_score is not None:
+            await self._summary_service.apply_score_change(
+                document['film_id'],
+                previous_film_score.get('film_score'),
+                film_score,
+                session=session,
+            )
+        return review_id  # type: ignore[no-any-return]
+
+    async def _load_reviews_page(
+        self,
+        query: dict[str, typing.Any],
+        review_sort: ReviewSort,
+        page_number: int,
+        page_size: int,
+    ) -> tuple[list[dict[str, str]] | None, str | None]:
+        """Загружает страницу отзывов и формирует курсор следующей страницы (со значением порядка в конце)."""
+        sort = self.review_sorts[review_sort]
+        film_reviews = await self._mongo_repository.find_all(
+            self.collection_name,
+            query,
             page_number=page_number,
             page_size=page_size,
+            read_preference=STALE_READ_PREFERENCE,
+            sort=sort,
+            projection=self.review_projection,
         )
+        next_cursor = None
+        if film_reviews and len(film_reviews) == page_size:
+            next_cursor = encode_cursor([*get_sort_values(film_reviews[-1], sort), review_sort])
+        return film_reviews, next_cursor
 
 
 @lru_cache
 def get_film_review_service(
-    repository: MongoRepository = Depends(get_mongo_repository),
+    repository: MongoRepository = Depends(get_repository),
 ) -> FilmReviewsService:
     """Возвращает экземпляр сервиса для работы с отзывами фильмов."""
     return FilmReviewsService(repository)
@@ -1,11 +1,54 @@
 """Модуль сервиса для работы с оценками фильмов."""
 
+import asyncio
+import types
+import typing
 import uuid
-from functools import lru_cache
+from functools import lru_cache, partial
 
-from db.mongo.mongo_rep import MongoRepository, get_mongo_repository
-from fastapi import Depends, HTTPException, status
+from core.cache import film_score_cache, invalidate_film
+from db.mongo.mongo_rep import MongoRepository, MongoSession, get_repository
+from db.mongo.uuids import encode_uuid, get_upsert_fields, uuid_query
+from fastapi import Depends
+from pymongo import UpdateOne
 from pymongo.errors import DuplicateKeyError
+from services.film_score_summary import FilmScoreSummaryService, ScoreChange
+
+# Поля сводки, из которых вычисляется средняя оценка
+SUMMARY_PROJECTION = types.MappingProxyType({'sum': 1, 'count': 1, '_id': 0})
+
+_NOT_CACHED = object()
+
+
+def get_average_score(summary: dict[str, typing.Any] | None) -> dict[str, float] | None:
+    """Возвращает среднюю оценку фильма, количество и сумму оценок по сводке оценок."""
+    if not summary:
+        return None
+    return {
+        'average_film_score': summary['sum'] / summary['count'],
+        'scores_count': summary['count'],
+        'scores_sum': summary['sum'],
+    }
+
+
+def get_score_changes(
+    film_scores: dict[uuid.UUID, float],
+    previous_scores: list[dict[str, typing.Any] | None],
+) -> list[ScoreChange]:
+    """Возвращает изменения успешно записанных оценок по записям, которые оценки заменили (None - ошибка записи)."""
+    return [
+        (film_id, previous_score.get('film_score'), film_score)
+        for (film_id, film_score), previous_score in zip(film_scores.items(), previous_scores)
+        if previous_score is not None
+    ]
+
+
+def get_score_statuses(film_ids: list[uuid.UUID], score_changes: list[ScoreChange]) -> dict[uuid.UUID, str]:
+    """Возвращает статус записи оценки каждого фильма пакета: created, updated или error."""
+    statuses = dict.fromkeys(film_ids, 'error')
+    for film_id, old_score, _ in score_changes:
+        statuses[film_id] = 'created' if old_score is None else 'updated'  # type: ignore[index]
+    return statuses
 
 
 class FilmScoreService:
@@ -15,66 +58,142 @@ class FilmScoreService:
         """Инициализирует сервис оценок фильмов."""
         self._mongo_repository = mongo_repository
         self.collection_name = 'film_score'
+        self._summary_service = FilmScoreSummaryService(mongo_repository)
 
-    async def add_score(self, film_id: uuid.UUID, user_id: uuid.UUID, film_score: float) -> dict[str, str]:
+    async def add_score(self, film_id: uuid.UUID, user_id: uuid.UUID, film_score: float) -> str | None:
         """Добавляет оценку фильма."""
         try:
-            result = await self._mongo_repository.insert_one(
-                self.collection_name,
-                {
-                    'film_id': str(film_id),
-                    'user_id': str(user_id),
-                    'film_score': film_score,
-                },
+            result = await self._mongo_repository.run_in_transaction(
+                partial(self._write_score, film_id, user_id, film_score),
             )
-            if result:
-                review = await self._mongo_repository.find_one(
-                    'film_reviews',
-                    {'film_id': str(film_id), 'user_id': str(user_id)},
+        except DuplicateKeyError:
+            # Повторная оценка отклоняется уникальным индексом, роутер вернет ошибку 400
+            return None
+        if result:
+            invalidate_film(film_id)
+        return result  # type: ignore[no-any-return]
+
+    async def add_scores(self, film_scores: dict[uuid.UUID, float], user_id: uuid.UUID) -> dict[uuid.UUID, str]:
+        """
+        Добавляет или обновляет оценки нескольких фильмов и возвращает статус записи каждой оценки.
+
+        Оценки записываются параллельно, и каждая запись атомарно возвращает замененную оценку,
+        поэтому изменения сводок не расходятся с записанными оценками при одновременных запросах.
+        Сводки и отзывы обновляются пакетными запросами вне транзакции.
+        """
+        previous_scores = await asyncio.gather(
+            *(
+                self._mongo_repository.upsert_one(
+                    self.collection_name,
+                    uuid_query(film_id=film_id, user_id=user_id),
+                    {'film_score': film_score},
+                    insert_data=get_upsert_fields(film_id=film_id, user_id=user_id),
                 )
-                if review:
-                    await self._mongo_repository.update_one(
-                        'film_reviews',
-                        {'film_id': str(film_id), 'user_id': str(user_id)},
-                        {'film_score': film_score},
-                    )
-            return result  # type: ignore[no-any-return]
-        except DuplicateKeyError as er:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='the score has already been added to film_score',
-            ) from er
+                for film_id, film_score in film_scores.items()
+            ),
+        )
+        score_changes = get_score_changes(film_scores, previous_scores)
+        await self._apply_score_changes(score_changes, user_id)
+        return get_score_statuses(list(film_scores), score_changes)
 
     async def delete_score(
         self,
         film_id: uuid.UUID,
         user_id: uuid.UUID,
     ) -> int | None:
-        """Удаляет оценку фильма."""
-        return await self._mongo_repository.delete_one(  # type: ignore[no-any-return]
+        """Удаляет оценку фильма и возвращает количество удаленных оценок или None при ошибке."""
+        deleted_score = await self._mongo_repository.find_one_and_delete(
             collection_name=self.collection_name,
-            query={'film_id': str(film_id), 'user_id': str(user_id)},
+            query=uuid_query(film_id=film_id, user_id=user_id),
         )
+        if not deleted_score:
+            # 0 - оценка не найдена, None - ошибка удаления
+            return None if deleted_score is None else 0
+        await self._summary_service.apply_score_change(film_id, deleted_score['film_score'], None)
+        invalidate_film(film_id)
+        return 1
 
     async def get_score(
         self,
         film_id: uuid.UUID,
-    ) -> float | None:
-        """Возвращает среднюю оценку фильма."""
-        film_scores = await self._mongo_repository.find_all(
-            collection_name=self.collection_name,
-            query={'film_id': str(film_id)},
+    ) -> dict[str, float] | None:
+        """Возвращает среднюю оценку фильма, количество и сумму оценок."""
+        return await film_score_cache.get_or_load(  # type: ignore[no-any-return]
+            str(film_id),
+            partial(self._load_score, film_id),
+            group=str(film_id),
         )
-        if not film_scores:
+
+    async def get_scores(self, film_ids: list[uuid.UUID]) -> dict[uuid.UUID, dict[str, float] | None]:
+        """
+        Возвращает средние оценки нескольких фильмов (None - фильм еще не оценен).
+
+        Оценки, которых нет в кэше, читаются из сводки оценок одним запросом и сохраняются в кэш.
+        """
+        film_scores = {film_id: film_score_cache.get(str(film_id), _NOT_CACHED) for film_id in film_ids}
+        missing_ids = [film_id for film_id, film_score in film_scores.items() if film_score is _NOT_CACHED]
+        if missing_ids:
+            summaries = await self._summary_service.get_summaries(missing_ids, dict(SUMMARY_PROJECTION))
+            for film_id in missing_ids:
+                film_scores[film_id] = get_average_score(summaries.get(str(film_id)))
+                film_score_cache.set(str(film_id), film_scores[film_id], group=str(film_id))
+        return film_scores  # type: ignore[return-value]
+
+    async def _write_score(
+        self,
+        film_id: uuid.UUID,
+        user_id: uuid.UUID,
+        film_score: float,
+        session: MongoSession,
+    ) -> str | None:
+        """Добавляет оценку, а затем обновляет сводку оценок и оценку в отзыве пользователя."""
+        result = await self._mongo_repository.insert_one(
+            self.collection_name,
+            {'film_id': encode_uuid(film_id), 'user_id': encode_uuid(user_id), 'film_score': film_score},
+            session=session,
+        )
+        if not result:
             return None
+        summary_update = self._summary_service.apply_score_change(film_id, None, film_score, session=session)
+        # Оценка переносится в отзыв пользователя, если он есть
+        review_update = self._mongo_repository.update_one(
+            'film_reviews',
+            uuid_query(film_id=film_id, user_id=user_id),
+            {'film_score': film_score},
+            session=session,
+        )
+        if session:
+            # Операции одной транзакции выполняются последовательно
+            await summary_update
+            await review_update
+        else:
+            await asyncio.gather(summary_update, review_update)
+        return result  # type: ignore[no-any-return]
+
+    async def _apply_score_changes(self, score_changes: list[ScoreChange], user_id: uuid.UUID) -> None:
+        """Обновляет сводки оценок и оценки в отзывах пользователя после пакетной записи оценок."""
+        if not score_changes:
+            return
+        await self._summary_service.apply_score_changes(score_changes)
+        await self._mongo_repository.bulk_write(
+            'film_reviews',
+            [
+                UpdateOne(uuid_query(film_id=film_id, user_id=user_id), {'$set': {'film_score': new_score}})
+                for film_id, _, new_score in score_changes
+            ],
+        )
+        for film_id, _, _ in score_changes:
+            invalidate_film(film_id)
 
-        sum_score = sum(float(film_score.get('film_score')) for film_score in film_scores)
-        return sum_score / len(film_scores)
+    async def _load_score(self, film_id: uuid.UUID) -> dict[str, float] | None:
+        """Загружает среднюю оценку фильма из сводки оценок."""
+        summary = await self._summary_service.get_summary(film_id, projection=dict(SUMMARY_PROJECTION))
+        return get_average_score(summary)
 
 
 @lru_cache
 def get_film_score_service(
-    repository: MongoRepository = Depends(get_mongo_repository),
+    repository: MongoRepository = Depends(get_repository),
 ) -> FilmScoreService:
     """Возвращает экземпляр сервиса для работы с оценками фильмов."""
     return FilmScoreService(repository)
@@ -0,0 +1,179 @@
+"""Модуль сервиса для работы со сводкой оценок фильмов."""
+
+import datetime
+import typing
+import uuid
+
+from db.mongo.mongo_rep import STALE_READ_PREFERENCE, MongoRepository, MongoSession
+from db.mongo.uuids import add_upsert_fields, decode_uuid, get_upsert_fields, match_uuids, uuid_query
+from loguru import logger
+from pymongo import UpdateOne
+
+# Изменение оценки фильма: (film_id, старая оценка, новая оценка)
+ScoreChange = tuple[uuid.UUID | str, float | str | None, float | str | None]
+
+
+def get_score_bucket(film_score: float) -> str:
+    """Возвращает ключ гистограммы (от 1 до 10) для оценки фильма."""
+    return str(round(film_score))
+
+
+def to_score(film_score: float | str | None) -> float | None:
+    """Приводит оценку фильма, сохраненную числом или строкой, к числу."""
+    return None if film_score is None else float(film_score)
+
+
+def get_score_increments(old_score: float | None, new_score: float | None) -> dict[str, int | float]:
+    """Возвращает изменения счетчиков сводки при замене старой оценки на новую."""
+    increments: dict[str, int | float] = {}
+    for film_score, sign in ((old_score, -1), (new_score, 1)):
+        if film_score is None:
+            continue
+        bucket_field = f'histogram.{get_score_bucket(film_score)}'
+        increments['sum'] = increments.get('sum', 0) + sign * film_score
+        increments['count'] = increments.get('count', 0) + sign
+        increments[bucket_field] = increments.get(bucket_field, 0) + sign
+    return {field: value for field, value in increments.items() if value}
+
+
+class FilmScoreSummaryService:
+    """Сервис для работы со сводкой оценок фильмов {film_id, sum, count, histogram} в MongoDB."""
+
+    def __init__(self, mongo_repository: MongoRepository):
+        """Инициализирует сервис сводки оценок фильмов."""
+        self._mongo_repository = mongo_repository
+        self.collection_name = 'film_score_summary'
+        self.scores_collection_name = 'film_score'
+
+    async def apply_score_change(
+        self,
+        film_id: uuid.UUID | str,
+        old_score: float | str | None,
+        new_score: float | str | None,
+        session: MongoSession = None,
+    ) -> None:
+        """Атомарно обновляет сводку оценок фильма при добавлении, изменении или удалении оценки."""
+        increments = get_score_increments(to_score(old_score), to_score(new_score))
+        if increments:
+            await self._mongo_repository.increment(
+                self.collection_name,
+                uuid_query(film_id=film_id),
+                increments,
+                session=session,
+                insert_data=get_upsert_fields(film_id=film_id),
+            )
+
+    async def apply_score_changes(self, score_changes: list[ScoreChange]) -> None:
+        """Обновляет сводки оценок нескольких фильмов одним пакетным запросом."""
+        operations = []
+        for film_id, old_score, new_score in score_changes:
+            increments = get_score_increments(to_score(old_score), to_score(new_score))
+            if increments:
+                operations.append(
+                    UpdateOne(
+                        uuid_query(film_id=film_id),
+                        add_upsert_fields({'$inc': increments}, film_id=film_id),
+                        upsert=True,
+                    ),
+                )
+        if operations:
+            await self._mongo_repository.bulk_write(self.collection_name, operations)
+
+    async def get_summary(
+        self,
+        film_id: uuid.UUID,
+        projection: dict[str, int] | None = None,
+    ) -> dict[str, typing.Any] | None:
+        """Возвращает сводку оценок фильма или только указанные поля (допускается чтение со вторичного узла)."""
+        summary = await self._mongo_repository.find_one(
+            self.collection_name,
+            uuid_query(film_id=film_id),
+            read_preference=STALE_READ_PREFERENCE,
+            projection=projection,
+        )
+        if not summary or summary['count'] <= 0:
+            return None
+        return summary
+
+    async def get_summaries(
+        self,
+        film_ids: list[uuid.UUID],
+        projection: dict[str, int],
+    ) -> dict[str, dict[str, typing.Any]]:
+        """Возвращает сводки оценок нескольких фильмов одним запросом $in по film_id (строкой)."""
+        summaries = await self._mongo_repository.find_all(
+            self.collection_name,
+            {'film_id': match_uuids(film_ids), 'count': {'$gt': 0}},
+            read_preference=STALE_READ_PREFERENCE,
+            projection={**projection, 'film_id': 1},
+        )
+        return {decode_uuid(summary['film_id']): summary for summary in summaries or []}
+
+    async def rebuild(self, film_id: uuid.UUID | None = None) -> bool:
+        """
+        Пересчитывает сводку оценок по коллекции film_score для одного или всех фильмов.
+
+        Сводка заменяется результатом агрегации, поэтому изменения оценок, записанные во время пересчета,
+        теряются: пересчет выполняется при остановленной записи оценок (например, до запуска сервиса).
+        film_id сводки хранится в том же формате, что и в film_score, поэтому после миграции UUID
+        (commands.migrate_uuids) сводка пересчитывается заново.
+        """
+        rebuilt_at = datetime.datetime.now()
+        query: dict[str, typing.Any] = uuid_query(film_id=film_id) if film_id else {}
+        pipeline = [
+            {'$match': query},
+            {'$project': {'film_id': 1, 'film_score': {'$toDouble': '$film_score'}}},
+            {
+                '$group': {
+                    '_id': {'film_id': '$film_id', 'bucket': {'$toString': {'$round': ['$film_score', 0]}}},
+                    'sum': {'$sum': '$film_score'},
+                    'count': {'$sum': 1},
+                },
+            },
+            {
+                '$group': {
+                    '_id': '$_id.film_id',
+                    'sum': {'$sum': '$sum'},
+                    'count': {'$sum': '$count'},
+                    'histogram': {'$push': {'k': '$_id.bucket', 'v': '$count'}},
+                },
+            },
+            {
+                '$project': {
+                    '_id': 0,
+                    'film_id': '$_id',
+                    'sum': 1,
+                    'count': 1,
+                    'histogram': {'$arrayToObject': '$histogram'},
+                    'rebuilt_at': rebuilt_at,
+                },
+            },
+            {'$merge': {'into': self.collection_name, 'on': 'film_id', 'whenMatched': 'replace'}},
+        ]
+        if await self._mongo_repository.aggregate(self.scores_collection_name, pipeline) is None:
+            logger.error(f'Film score summary rebuild failed for film: {film_id or "all"}')
+            return False
+        await self._delete_unscored_summaries({**query, 'rebuilt_at': {'$ne': rebuilt_at}})
+        logger.info(f'Film score summary rebuilt for film: {film_id or "all"}')
+        return True
+
+    async def _delete_unscored_summaries(self, query: dict[str, typing.Any]) -> None:
+        """
+        Удаляет сводки, не попавшие в пересчет, только у фильмов, оценок которых больше нет.
+
+        Сводка фильма, впервые оцененного во время пересчета, создается $inc без rebuilt_at и не удаляется.
+        """
+        stale_summaries = await self._mongo_repository.find_all(self.collection_name, query, projection={'film_id': 1})
+        if not stale_summaries:
+            return
+        film_ids = [summary['film_id'] for summary in stale_summaries]
+        scored_films = await self._mongo_repository.aggregate(
+            self.scores_collection_name,
+            [{'$match': {'film_id': {'$in': film_ids}}}, {'$group': {'_id': '$film_id'}}],
+        )
+        if scored_films is None:
+            return
+        scored_film_ids = {scored_film['_id'] for scored_film in scored_films}
+        unscored_film_ids = [film_id for film_id in film_ids if film_id not in scored_film_ids]
+        if unscored_film_ids:
+            await self._mongo_repository.delete_many(self.collection_name, {'film_id': {'$in': unscored_film_ids}})
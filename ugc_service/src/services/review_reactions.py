@@ -0,0 +1,224 @@
+"""Модуль сервиса реакций (лайков и дизлайков) на отзывы фильмов."""
+
+import asyncio
+import typing
+import uuid
+from functools import lru_cache
+
+import bson
+from core.cache import invalidate_film
+from core.config import settings
+from db.mongo import mongo_rep
+from db.mongo.uuids import get_upsert_fields, uuid_query
+from fastapi import Depends
+from loguru import logger
+from pymongo import UpdateOne
+
+ReviewReaction = typing.Literal['like', 'dislike']
+
+
+def get_reaction_increments(old_reaction: str | None, new_reaction: str | None) -> dict[str, int]:
+    """Возвращает изменения счетчиков (likes, dislikes) при замене старой реакции пользователя на новую."""
+    increments: dict[str, int] = {}
+    for reaction, sign in ((old_reaction, -1), (new_reaction, 1)):
+        if reaction is not None:
+            counter_field = f'{reaction}s'
+            increments[counter_field] = increments.get(counter_field, 0) + sign
+    return {field: value for field, value in increments.items() if value}
+
+
+def get_counter_shard(user_id: uuid.UUID) -> int:
+    """Возвращает номер шарда счетчиков, в который записываются реакции пользователя."""
+    return uuid.UUID(str(user_id)).int % settings.review_reaction_shards
+
+
+class ReviewReactionsService:
+    """
+    Сервис реакций на отзывы в MongoDB.
+
+    Реакция пользователя на отзыв хранится в коллекции review_reactions (один документ на пользователя и отзыв).
+    Счетчики отзыва разделены на REVIEW_REACTION_SHARDS документов review_reaction_counters
+    {review_id, shard, likes, dislikes, version, is_folded}: реакции разных пользователей изменяют разные документы,
+    поэтому запись реакций на популярный отзыв не упирается в блокировку одного документа. Реакции пользователя
+    всегда попадают в один шард, и отмена реакции уменьшает тот же счетчик, который она увеличила.
+    Суммы шардов периодически переносятся в поля likes и dislikes отзыва.
+    """
+
+    def __init__(self, mongo_repository: mongo_rep.MongoRepository) -> None:
+        """Инициализирует сервис реакций на отзывы."""
+        self._mongo_repository = mongo_repository
+        self.collection_name = 'review_reactions'
+        self.counters_collection_name = 'review_reaction_counters'
+        self.reviews_collection_name = 'film_reviews'
+
+    async def set_reaction(self, review_id: str, user_id: uuid.UUID, reaction: ReviewReaction) -> bool | None:
+        """
+        Ставит реакцию пользователя на отзыв, заменяя предыдущую.
+
+        Возвращает None, если отзыв не найден, и False при ошибке записи.
+        """
+        review = await self._find_review(review_id)
+        if not review:
+            return None
+        previous_reaction = await self._mongo_repository.upsert_one(
+            self.collection_name,
+            {'review_id': review['_id'], **uuid_query(user_id=user_id)},
+            {'reaction': reaction},
+            insert_data=get_upsert_fields(user_id=user_id),
+        )
+        if previous_reaction is None:
+            return False
+        return await self._apply_reaction_change(review, user_id, previous_reaction.get('reaction'), reaction)
+
+    async def delete_reaction(self, review_id: str, user_id: uuid.UUID) -> bool | None:
+        """
+        Снимает реакцию пользователя с отзыва.
+
+        Возвращает None, если отзыв или реакция не найдены, и False при ошибке записи.
+        """
+        review = await self._find_review(review_id)
+        if not review:
+            return None
+        deleted_reaction = await self._mongo_repository.find_one_and_delete(
+            self.collection_name,
+            {'review_id': review['_id'], **uuid_query(user_id=user_id)},
+        )
+        if not deleted_reaction:
+            return None
+        return await self._apply_reaction_change(review, user_id, deleted_reaction['reaction'], None)
+
+    async def fold_counters(self, batch_size: int = settings.review_reactions_fold_batch_size) -> int | None:
+        """
+        Переносит суммы счетчиков в отзывы, шарды которых изменились, и возвращает количество обновленных отзывов.
+
+        Шард отмечается перенесенным, только если его версия не изменилась с момента чтения,
+        поэтому реакции, записанные во время переноса, будут перенесены в следующий раз.
+        """
+        shards = await self._mongo_repository.find_all(
+            self.counters_collection_name,
+            {'is_folded': False},
+            page_size=batch_size,
+            page_number=1,
+            projection={'review_id': 1, 'version': 1},
+        )
+        if not shards:
+            return 0
+        review_counters = await self._mongo_repository.aggregate(
+            self.counters_collection_name,
+            [
+                {'$match': {'review_id': {'$in': list({shard['review_id'] for shard in shards})}}},
+                {
+                    '$group': {
+                        '_id': '$review_id',
+                        'film_id': {'$first': '$film_id'},
+                        'likes': {'$sum': '$likes'},
+                        'dislikes': {'$sum': '$dislikes'},
+                    },
+                },
+            ],
+        )
+        if not review_counters or not await self._write_review_counters(review_counters):
+            return None
+        await self._mongo_repository.bulk_write(
+            self.counters_collection_name,
+            [
+                UpdateOne({'_id': shard['_id'], 'version': shard['version']}, {'$set': {'is_folded': True}})
+                for shard in shards
+            ],
+        )
+        return len(review_counters)
+
+    async def _find_review(self, review_id: str) -> dict[str, typing.Any] | None:
+        """Возвращает _id и film_id отзыва или None, если отзыв не найден."""
+        if not bson.ObjectId.is_valid(review_id):
+            return None
+        return await self._mongo_repository.find_one(
+            self.reviews_collection_name,
+            {'_id': bson.ObjectId(review_id)},
+            projection={'film_id': 1},
+        )
+
+    async def _apply_reaction_change(
+        self,
+        review: dict[str, typing.Any],
+        user_id: uuid.UUID,
+        old_reaction: str | None,
+        new_reaction: str | None,
+    ) -> bool:
+        """Изменяет счетчики реакций отзыва в шарде пользователя и отмечает шард для переноса в отзыв."""
+        increments = get_reaction_increments(old_reaction, new_reaction)
+        if not increments:
+            return True
+        write_errors = await self._mongo_repository.bulk_write(
+            self.counters_collection_name,
+            [
+                UpdateOne(
+                    {'review_id': review['_id'], 'shard': get_counter_shard(user_id)},
+                    {
+                        '$inc': {**increments, 'version': 1},
+                        '$set': {'is_folded': False},
+                        '$setOnInsert': {'film_id': review['film_id']},
+                    },
+                    upsert=True,
+                ),
+            ],
+        )
+        return write_errors is not None and not write_errors
+
+    async def _write_review_counters(self, review_counters: list[dict[str, typing.Any]]) -> bool:
+        """Записывает суммы счетчиков в отзывы и сбрасывает кэш отзывов их фильмов."""
+        write_errors = await self._mongo_repository.bulk_write(
+            self.reviews_collection_name,
+            [
+                UpdateOne(
+                    {'_id': counters['_id']},
+                    {'$set': {'likes': counters['likes'], 'dislikes': counters['dislikes']}},
+                )
+                for counters in review_counters
+            ],
+        )
+        for counters in review_counters:
+            invalidate_film(counters['film_id'])
+        return write_errors is not None
+
+
+async def fold_periodically() -> None:
+    """
+    Переносит счетчики реакций в отзывы каждые REVIEW_REACTIONS_FOLD_INTERVAL секунд.
+
+    Если подключение к MongoDB не установлено, перенос пропускается до следующего интервала.
+    """
+    while True:
+        if mongo_rep.mongo_repository is None:
+            logger.error('Review reaction counters fold skipped: MongoDB repository is not initialized')
+        elif await ReviewReactionsService(mongo_rep.mongo_repository).fold_counters() is None:
+            logger.error('Review reaction counters fold failed')
+        await asyncio.sleep(settings.review_reactions_fold_interval)
+
+
+fold_task: asyncio.Task[None] | None = None
+
+
+async def on_startup() -> None:
+    """Запускает периодический перенос счетчиков реакций в отзывы, если он включен."""
+    global fold_task
+    if settings.review_reactions_fold_interval > 0:
+        fold_task = asyncio.create_task(fold_periodically())
+
+
+async def on_shutdown() -> None:
+    """Останавливает периодический перенос счетчиков реакций и ожидает завершения задачи."""
+    if fold_task:
+        fold_task.cancel()
+        try:
+            await fold_task
+        except asyncio.CancelledError:
+            logger.info('Review reaction counters fold stopped')
+
+
+@lru_cache
+def get_review_reactions_service(
+    repository: mongo_rep.MongoRepository = Depends(mongo_rep.get_repository),
+) -> ReviewReactionsService:
+    """Возвращает экземпляр сервиса реакций на отзывы."""
+    return ReviewReactionsService(repository)
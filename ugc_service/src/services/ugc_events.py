@@ -0,0 +1,162 @@
+"""Модуль сервиса публикации пользовательских событий (режим приема UGC_INGESTION_MODE=events)."""
+
+import asyncio
+import datetime
+import uuid
+
+import bson
+from core.config import settings
+from db import event_log
+from db.mongo import mongo_rep  # type: ignore[attr-defined]
+from loguru import logger
+from services.event_consumer import EventConsumer
+from services.film_bookmarks import update_bookmarks_cache
+
+INGESTION_MODE_EVENTS = 'events'
+
+# Статус элемента пакета, принятого в журнал событий
+ACCEPTED_STATUS = 'accepted'
+
+
+class UgcEventsService:
+    """
+    Сервис, публикующий закладки, оценки и отзывы в журнал событий вместо записи в MongoDB.
+
+    Методы повторяют методы записи сервисов закладок, оценок и отзывов. Запрос подтверждается
+    после публикации события, а в MongoDB события записывает потребитель (commands.consume_events).
+    Проверки, требующие чтения из MongoDB (повторное добавление, отсутствие записи), не выполняются.
+    UUID и даты сериализуются журналом.
+    """
+
+    def __init__(self, ugc_event_log: event_log.EventLog) -> None:
+        """Инициализирует сервис публикации событий."""
+        self._event_log = ugc_event_log
+
+    async def add_film_to_bookmarks(self, film_id: uuid.UUID, user_id: uuid.UUID) -> str:
+        """Публикует добавление фильма в закладки."""
+        await self._event_log.publish(event_log.BOOKMARK_ADDED, film_id=film_id, user_id=user_id)
+        update_bookmarks_cache(user_id, [film_id], is_added=True)
+        return ACCEPTED_STATUS
+
+    async def add_films_to_bookmarks(self, film_ids: list[uuid.UUID], user_id: uuid.UUID) -> dict[uuid.UUID, str]:
+        """Публикует добавление нескольких фильмов в закладки."""
+        film_ids = list(dict.fromkeys(film_ids))
+        await self._event_log.publish_many(
+            event_log.BOOKMARK_ADDED,
+            [{'film_id': film_id, 'user_id': user_id} for film_id in film_ids],
+        )
+        update_bookmarks_cache(user_id, film_ids, is_added=True)
+        return dict.fromkeys(film_ids, ACCEPTED_STATUS)
+
+    async def delete_film_from_bookmarks(self, film_id: uuid.UUID, user_id: uuid.UUID) -> int:
+        """Публикует удаление фильма из закладок."""
+        await self._event_log.publish(event_log.BOOKMARK_DELETED, film_id=film_id, user_id=user_id)
+        update_bookmarks_cache(user_id, [film_id], is_added=False)
+        return 1
+
+    async def add_score(self, film_id: uuid.UUID, user_id: uuid.UUID, film_score: float) -> str:
+        """Публикует оценку фильма."""
+        await self._event_log.publish(
+            event_log.SCORE_ADDED,
+            film_id=film_id,
+            user_id=user_id,
+            film_score=film_score,
+        )
+        return ACCEPTED_STATUS
+
+    async def add_scores(self, film_scores: dict[uuid.UUID, float], user_id: uuid.UUID) -> dict[uuid.UUID, str]:
+        """Публикует оценки нескольких фильмов."""
+        await self._event_log.publish_many(
+            event_log.SCORE_ADDED,
+            [
+                {'film_id': film_id, 'user_id': user_id, 'film_score': film_score}
+                for film_id, film_score in film_scores.items()
+            ],
+        )
+        return dict.fromkeys(film_scores, ACCEPTED_STATUS)
+
+    async def delete_score(self, film_id: uuid.UUID, user_id: uuid.UUID) -> int:
+        """Публикует удаление оценки фильма."""
+        await self._event_log.publish(event_log.SCORE_DELETED, film_id=film_id, user_id=user_id)
+        return 1
+
+    async def add_review(
+        self,
+        film_id: uuid.UUID,
+        review_text: str,
+        user_id: uuid.UUID,
+        film_score: float,
+        create_at: datetime.datetime,
+    ) -> str:
+        """Публикует отзыв и оценку фильма."""
+        await self._event_log.publish(
+            event_log.REVIEW_ADDED,
+            film_id=film_id,
+            user_id=user_id,
+            review_text=review_text,
+            film_score=film_score,
+            create_at=create_at,
+        )
+        return ACCEPTED_STATUS
+
+    async def update_review(
+        self,
+        user_id: uuid.UUID,
+        review_id: str,
+        new_review_text: str | None,
+        new_film_score: float | None,
+    ) -> str | None:
+        """Публикует редактирование отзыва (некорректный id отклоняется сразу, чтобы не останавливать потребителя)."""
+        if not bson.ObjectId.is_valid(review_id):
+            return None
+        await self._event_log.publish(
+            event_log.REVIEW_UPDATED,
+            review_id=review_id,
+            user_id=user_id,
+            review_text=new_review_text,
+            film_score=new_film_score,
+        )
+        return ACCEPTED_STATUS
+
+    async def delete_review(self, review_id: str, user_id: uuid.UUID) -> int | None:
+        """Публикует удаление отзыва (некорректный id отклоняется сразу, чтобы не останавливать потребителя)."""
+        if not bson.ObjectId.is_valid(review_id):
+            return None
+        await self._event_log.publish(event_log.REVIEW_DELETED, review_id=review_id, user_id=user_id)
+        return 1
+
+
+ugc_events_service: UgcEventsService | None = None
+consumer_task: asyncio.Task[None] | None = None
+consumer_stop = asyncio.Event()
+
+
+def get_ugc_events_service() -> UgcEventsService | None:
+    """Возвращает сервис публикации событий, если сервис работает в режиме приема событий, или None."""
+    return ugc_events_service
+
+
+async def on_startup() -> None:
+    """
+    Создает журнал событий в режиме приема событий.
+
+    Журнал в памяти процесса доступен только сервису, поэтому его потребитель запускается фоновой задачей.
+    """
+    global ugc_events_service, consumer_task
+    if settings.ugc_ingestion_mode != INGESTION_MODE_EVENTS:
+        return
+    event_log.event_log = event_log.create_event_log()
+    ugc_events_service = UgcEventsService(event_log.event_log)
+    if settings.event_log_backend == event_log.EVENT_LOG_MEMORY:
+        consumer = EventConsumer(event_log.event_log, mongo_rep.get_repository())
+        consumer_task = asyncio.create_task(consumer.run(consumer_stop))
+    logger.info(f'Events ingestion mode with the {settings.event_log_backend} event log enabled.')
+
+
+async def on_shutdown() -> None:
+    """Дожидается применения событий потребителем внутри сервиса и закрывает журнал событий."""
+    if consumer_task:
+        consumer_stop.set()
+        await consumer_task
+    if event_log.event_log:
+        event_log.event_log.close()
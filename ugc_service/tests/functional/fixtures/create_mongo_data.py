@@ -9,6 +9,9 @@ COLLECTION_NAMES = [
     'film_bookmarks',
     'film_score',
     'film_reviews',
+    'film_score_summary',
+    'review_reactions',
+    'review_reaction_counters',
 ]
 
 
@@ -20,3 +20,63 @@ async def test_hello_world(make_get_request, expected_answer: dict):
     logging.info(f'Response status: {status}')
 
     assert status == expected_answer['status']
+
+
+@pytest.mark.parametrize(
+    'expected_answer',
+    [
+        {
+            'status': http.HTTPStatus.OK,
+            'counters': {
+                'max_pool_size',
+                'open',
+                'in_use',
+                'max_in_use',
+                'check_outs',
+                'check_out_failures',
+                'cleared',
+                'wait_time_total_ms',
+                'wait_time_max_ms',
+            },
+        },
+    ],
+)
+async def test_mongo_pool_metrics(make_get_request, expected_answer: dict):
+    url = f'{settings_test.service_url}/api/v1/ugc_2/'
+    # запрос оценки фильма выдает соединение из пула воркера, который затем возвращает счетчики пула
+    await make_get_request(url + 'film_score/3fa85f64-5717-4562-b3fc-2c963f66afa6')
+    message, status = await make_get_request(url + 'metrics/mongo_pool')
+
+    assert status == expected_answer['status']
+    for pool_stats in message.values():
+        assert set(pool_stats) == expected_answer['counters']
+        assert pool_stats['open'] >= pool_stats['in_use'] >= 0
+
+
+@pytest.mark.parametrize(
+    'expected_answer',
+    [
+        {
+            'status': http.HTTPStatus.OK,
+            'collections': {
+                'film_bookmarks',
+                'film_score',
+                'film_reviews',
+                'film_score_summary',
+                'review_reactions',
+                'review_reaction_counters',
+                'processed_events',
+            },
+            'report': {'drifted': [], 'extra': []},
+        },
+    ],
+)
+async def test_index_reports(make_get_request, expected_answer: dict):
+    url = f'{settings_test.service_url}/api/v1/ugc_2/metrics/indexes'
+    message, status = await make_get_request(url)
+
+    assert status == expected_answer['status']
+    assert set(message) == expected_answer['collections']
+    # индексы, созданные сервисом при запуске, совпадают с описанием (недостающие могут еще строиться в фоне)
+    for report in message.values():
+        assert {field: report[field] for field in expected_answer['report']} == expected_answer['report']
@@ -0,0 +1,6 @@
+import os
+import sys
+
+current = os.path.dirname(os.path.realpath(__file__))
+src = os.path.join(os.path.dirname(os.path.dirname(current)), 'src')
+sys.path.append(src)
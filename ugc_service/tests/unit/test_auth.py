@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import json
+import time
+from http import HTTPStatus
+
+import httpx
+import jwt
+import pytest
+from core.cache import AsyncTTLCache
+from core.config import settings
+from fastapi import HTTPException
+from services import auth
+from services.auth import AuthService, get_token_ttl
+
+pytestmark = pytest.mark.asyncio
+
+JWT_KEY = 'unit-test-secret-key-of-sufficient-length'
+USER = {'user_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'}
+JWKS = {
+    'keys': [
+        {'kty': 'oct', 'kid': 'main', 'k': base64.urlsafe_b64encode(JWT_KEY.encode()).decode().rstrip('=')},
+        # Ключ неизвестного типа не разбирается PyJWK
+        {'kty': 'unknown', 'kid': 'broken'},
+    ],
+}
+
+
+def make_token(expires_in: int = 3600, key: str = JWT_KEY, key_id: str | None = None) -> str:
+    """Возвращает токен пользователя USER со сроком действия expires_in секунд."""
+    return jwt.encode(
+        {'sub': json.dumps(USER), 'exp': int(time.time()) + expires_in},
+        key,
+        algorithm='HS256',
+        headers={'kid': key_id} if key_id else None,
+    )
+
+
+def make_auth_service(requests: list[httpx.Request]) -> AuthService:
+    """Возвращает сервис аутентификации, запросы которого к сервису auth записываются в requests."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith('/jwks'):
+            return httpx.Response(HTTPStatus.OK, json=JWKS)
+        return httpx.Response(HTTPStatus.OK)
+
+    return AuthService(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+@pytest.fixture(autouse=True)
+def token_cache(monkeypatch: pytest.MonkeyPatch):
+    """Изолирует кэш проверенных токенов каждого теста."""
+    monkeypatch.setattr(auth, 'auth_token_cache', AsyncTTLCache(100, settings.auth_token_cache_ttl))
+
+
+@pytest.fixture
+def local_verification(monkeypatch: pytest.MonkeyPatch):
+    """Включает локальную проверку подписи токенов HS256."""
+    monkeypatch.setattr(settings, 'auth_jwt_verify_locally', True)
+    monkeypatch.setattr(settings, 'auth_jwt_algorithms', 'HS256')
+    monkeypatch.setattr(settings, 'auth_jwks_url', 'http://auth/jwks')
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # подпись ключом AUTH_JWT_KEY верна
+        (
+            {'token': make_token(), 'jwt_key': JWT_KEY},
+            {'status': HTTPStatus.OK, 'user': USER, 'requests': 0},
+        ),
+        # токен подписан другим ключом
+        (
+            {'token': make_token(key='another-secret-key-of-sufficient-length'), 'jwt_key': JWT_KEY},
+            {'status': HTTPStatus.UNAUTHORIZED, 'user': None, 'requests': 0},
+        ),
+        # срок действия токена истек
+        (
+            {'token': make_token(expires_in=-10), 'jwt_key': JWT_KEY},
+            {'status': HTTPStatus.UNAUTHORIZED, 'user': None, 'requests': 0},
+        ),
+        # подпись ключом из JWKS верна
+        (
+            {'token': make_token(key_id='main'), 'jwt_key': ''},
+            {'status': HTTPStatus.OK, 'user': USER, 'requests': 1},
+        ),
+        # ключ токена в JWKS не разбирается
+        (
+            {'token': make_token(key_id='broken'), 'jwt_key': ''},
+            {'status': HTTPStatus.UNAUTHORIZED, 'user': None, 'requests': 1},
+        ),
+        # ключа токена нет в JWKS
+        (
+            {'token': make_token(key_id='unknown'), 'jwt_key': ''},
+            {'status': HTTPStatus.UNAUTHORIZED, 'user': None, 'requests': 1},
+        ),
+    ],
+)
+@pytest.mark.usefixtures('local_verification')
+async def test_local_verification(monkeypatch: pytest.MonkeyPatch, query_data: dict, expected_answer: dict):
+    monkeypatch.setattr(settings, 'auth_jwt_key', query_data['jwt_key'])
+    requests: list[httpx.Request] = []
+    auth_service = make_auth_service(requests)
+
+    try:
+        user = await auth_service.authenticate(query_data['token'])
+        status = HTTPStatus.OK
+    except HTTPException as er:
+        user = None
+        status = er.status_code
+
+    assert status == expected_answer['status']
+    assert user == expected_answer['user']
+    assert len(requests) == expected_answer['requests']
+    await auth_service.close()
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # токен без срока действия хранится AUTH_TOKEN_CACHE_TTL
+        (
+            {'claims': {}},
+            {'ttl': settings.auth_token_cache_ttl},
+        ),
+        # токен, истекающий раньше AUTH_TOKEN_CACHE_TTL, хранится до истечения
+        (
+            {'claims': {'exp': 60}},
+            {'ttl': 60},
+        ),
+        # токен, истекающий позже AUTH_TOKEN_CACHE_TTL, хранится AUTH_TOKEN_CACHE_TTL
+        (
+            {'claims': {'exp': settings.auth_token_cache_ttl * 2}},
+            {'ttl': settings.auth_token_cache_ttl},
+        ),
+    ],
+)
+async def test_token_ttl(query_data: dict, expected_answer: dict):
+    claims = {field: time.time() + expires_in for field, expires_in in query_data['claims'].items()}
+
+    assert get_token_ttl(claims) == pytest.approx(expected_answer['ttl'], abs=1)
+
+
+async def test_token_cache_expires_with_token():
+    requests: list[httpx.Request] = []
+    auth_service = make_auth_service(requests)
+    token = make_token(expires_in=2)
+
+    # повторная проверка токена берется из кэша
+    assert await auth_service.authenticate(token) == USER
+    assert await auth_service.authenticate(token) == USER
+    assert len(requests) == 1
+
+    # после истечения срока действия токен снова проверяется сервисом auth
+    await asyncio.sleep(2.1)
+    assert await auth_service.authenticate(token) == USER
+    assert len(requests) == 2
+    await auth_service.close()
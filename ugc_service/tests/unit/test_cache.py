@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from core.cache import AsyncTTLCache
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # при переполнении вытесняется самая давно использованная запись
+        (
+            {
+                'cache': {'max_size': 2, 'ttl': 60},
+                'entries': [('a', 1, 'film_1'), ('b', 2, 'film_1'), ('c', 3, 'film_2')],
+                'reads_before_last': ['a'],
+                'invalidated_groups': [],
+                'delay': 0,
+            },
+            {'values': {'a': 1, 'b': None, 'c': 3}, 'evictions': 1},
+        ),
+        # запись с истекшим временем жизни не возвращается
+        (
+            {
+                'cache': {'max_size': 10, 'ttl': 0.05},
+                'entries': [('a', 1, 'film_1')],
+                'reads_before_last': [],
+                'invalidated_groups': [],
+                'delay': 0.1,
+            },
+            {'values': {'a': None}, 'evictions': 0},
+        ),
+        # при нулевом времени жизни значения не сохраняются
+        (
+            {
+                'cache': {'max_size': 10, 'ttl': 0},
+                'entries': [('a', 1, 'film_1')],
+                'reads_before_last': [],
+                'invalidated_groups': [],
+                'delay': 0,
+            },
+            {'values': {'a': None}, 'evictions': 0},
+        ),
+        # инвалидация удаляет только записи группы фильма
+        (
+            {
+                'cache': {'max_size': 10, 'ttl': 60},
+                'entries': [('a', 1, 'film_1'), ('b', 2, 'film_1'), ('c', 3, 'film_2')],
+                'reads_before_last': [],
+                'invalidated_groups': ['film_1'],
+                'delay': 0,
+            },
+            {'values': {'a': None, 'b': None, 'c': 3}, 'evictions': 0},
+        ),
+    ],
+)
+async def test_cache_entries(query_data: dict, expected_answer: dict):
+    cache = AsyncTTLCache(**query_data['cache'])
+    *entries, last_entry = query_data['entries']
+    for key, cache_value, group in entries:
+        cache.set(key, cache_value, group=group)
+    for key in query_data['reads_before_last']:
+        cache.get(key)
+    cache.set(last_entry[0], last_entry[1], group=last_entry[2])
+    for group in query_data['invalidated_groups']:
+        cache.invalidate_group(group)
+    await asyncio.sleep(query_data['delay'])
+
+    assert {key: cache.get(key) for key in expected_answer['values']} == expected_answer['values']
+    assert cache.stats()['evictions'] == expected_answer['evictions']
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # одновременные запросы отсутствующего ключа загружают значение один раз
+        (
+            {'requests': 3, 'is_invalidated': False},
+            {'loads': 1, 'coalesced': 2, 'cached': 'value_1'},
+        ),
+        # результат загрузки, начатой до инвалидации группы, не сохраняется в кэш
+        (
+            {'requests': 2, 'is_invalidated': True},
+            {'loads': 1, 'coalesced': 1, 'cached': None},
+        ),
+    ],
+)
+async def test_cache_get_or_load(query_data: dict, expected_answer: dict):
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    loads = []
+    release = asyncio.Event()
+
+    async def loader():
+        loads.append(1)
+        await release.wait()
+        return f'value_{len(loads)}'
+
+    requests = [
+        asyncio.create_task(cache.get_or_load('a', loader, group='film_1')) for _ in range(query_data['requests'])
+    ]
+    await asyncio.sleep(0)
+    if query_data['is_invalidated']:
+        cache.invalidate_group('film_1')
+    release.set()
+
+    assert await asyncio.gather(*requests) == ['value_1'] * query_data['requests']
+    assert len(loads) == expected_answer['loads']
+    assert cache.stats()['coalesced'] == expected_answer['coalesced']
+    assert cache.get('a') == expected_answer['cached']
+
+
+async def test_cache_get_or_load_error():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+
+    async def failed_loader():
+        raise RuntimeError('load failed')
+
+    async def loader():
+        return 'value'
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load('a', failed_loader, group='film_1')
+    # неудавшаяся загрузка не сохраняется и не блокирует следующие запросы
+    assert cache.get('a') is None
+    assert await cache.get_or_load('a', loader, group='film_1') == 'value'
+    assert cache.get('a') == 'value'
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from core.config import settings
+from db import event_log
+from db.event_log import FileEventLog, MemoryEventLog
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(params=['memory', 'file'])
+def ugc_event_log(request: pytest.FixtureRequest, tmp_path):
+    """Журнал событий каждого бэкенда."""
+    if request.param == 'memory':
+        yield MemoryEventLog()
+        return
+    file_event_log = FileEventLog(str(tmp_path / 'events.ndjson'))
+    yield file_event_log
+    file_event_log.close()
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # журнал не сжимается, пока подтвержденная часть меньше EVENT_LOG_COMPACT_SIZE
+        (
+            {'compact_size': 1_000_000, 'published': 3, 'committed': 2, 'published_after_commit': 1},
+            {'film_ids': ['2', '3'], 'is_compacted': False},
+        ),
+        # подтвержденные события удаляются из журнала, события после сжатия дописываются в новый файл
+        (
+            {'compact_size': 1, 'published': 3, 'committed': 2, 'published_after_commit': 1},
+            {'film_ids': ['2', '3'], 'is_compacted': True},
+        ),
+    ],
+)
+async def test_event_log_commit(
+    monkeypatch: pytest.MonkeyPatch,
+    ugc_event_log: event_log.EventLog,
+    query_data: dict,
+    expected_answer: dict,
+):
+    monkeypatch.setattr(settings, 'event_log_compact_size', query_data['compact_size'])
+    await ugc_event_log.publish_many(
+        event_log.BOOKMARK_ADDED,
+        [{'film_id': str(index)} for index in range(query_data['published'])],
+    )
+
+    _, next_offset = await ugc_event_log.read(await ugc_event_log.committed_offset(), query_data['committed'])
+    await ugc_event_log.commit(next_offset)
+    await ugc_event_log.publish_many(
+        event_log.BOOKMARK_ADDED,
+        [{'film_id': str(query_data['published'] + index)} for index in range(query_data['published_after_commit'])],
+    )
+    events, _ = await ugc_event_log.read(await ugc_event_log.committed_offset(), 10)
+
+    assert [event['payload']['film_id'] for event in events] == expected_answer['film_ids']
+    if isinstance(ugc_event_log, FileEventLog):
+        assert (await ugc_event_log.committed_offset() == 0) == expected_answer['is_compacted']
+
+
+async def test_file_event_log_compaction_keeps_writers(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setattr(settings, 'event_log_compact_size', 1)
+    path = str(tmp_path / 'events.ndjson')
+    consumer_log = FileEventLog(path)
+    # журнал другого воркера, открывший файл до сжатия
+    writer_log = FileEventLog(path)
+
+    await writer_log.publish(event_log.BOOKMARK_ADDED, film_id='0')
+    _, next_offset = await consumer_log.read(0, 10)
+    await consumer_log.commit(next_offset)
+    await writer_log.publish(event_log.BOOKMARK_ADDED, film_id='1')
+    events, next_offset = await consumer_log.read(await consumer_log.committed_offset(), 10)
+
+    assert [event['payload']['film_id'] for event in events] == ['1']
+    assert next_offset == os.path.getsize(path)
+    writer_log.close()
+    consumer_log.close()
+
+
+async def test_event_log_is_abstract():
+    with pytest.raises(TypeError):
+        event_log.EventLog()
@@ -0,0 +1,26 @@
+import pytest
+from services.film_score import get_average_score
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # средняя оценка вычисляется по сумме и количеству оценок сводки
+        (
+            {'summary': {'sum': 17.0, 'count': 2}},
+            {'average_film_score': 8.5, 'scores_count': 2, 'scores_sum': 17.0},
+        ),
+        # одна оценка
+        (
+            {'summary': {'sum': 10, 'count': 1}},
+            {'average_film_score': 10.0, 'scores_count': 1, 'scores_sum': 10},
+        ),
+        # фильм еще никто не оценил
+        (
+            {'summary': None},
+            None,
+        ),
+    ],
+)
+def test_get_average_score(query_data: dict, expected_answer: dict | None):
+    assert get_average_score(query_data['summary']) == expected_answer
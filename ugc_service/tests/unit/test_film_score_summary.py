@@ -0,0 +1,156 @@
+import uuid
+
+import pytest
+from services.film_score_summary import FilmScoreSummaryService, get_score_increments
+
+
+class FakeRepository:
+    """Репозиторий, записывающий запросы сервиса сводки оценок и возвращающий заданные результаты."""
+
+    def __init__(self, aggregate_results: list, stale_summaries: list | None = None) -> None:
+        self.increments: list[tuple[dict, dict]] = []
+        self.pipelines: list[list] = []
+        self.found_queries: list[dict] = []
+        self.deleted_queries: list[dict] = []
+        self._aggregate_results = aggregate_results
+        self._stale_summaries = stale_summaries
+
+    async def increment(self, collection_name: str, query: dict, increments: dict, **kwargs) -> bool:
+        self.increments.append((query, increments))
+        return True
+
+    async def aggregate(self, collection_name: str, pipeline: list) -> list | None:
+        self.pipelines.append(pipeline)
+        return self._aggregate_results.pop(0)
+
+    async def find_all(self, collection_name: str, query: dict, **kwargs) -> list | None:
+        self.found_queries.append(query)
+        return self._stale_summaries
+
+    async def delete_many(self, collection_name: str, query: dict) -> int:
+        self.deleted_queries.append(query)
+        return 0
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # добавление оценки
+        (
+            {'old_score': None, 'new_score': 8.0},
+            {'sum': 8.0, 'count': 1, 'histogram.8': 1},
+        ),
+        # изменение оценки переносит ее в другой столбец гистограммы, количество не меняется
+        (
+            {'old_score': 8.0, 'new_score': 3.0},
+            {'sum': -5.0, 'histogram.8': -1, 'histogram.3': 1},
+        ),
+        # изменение оценки в пределах столбца гистограммы
+        (
+            {'old_score': 7.6, 'new_score': 8.0},
+            {'sum': pytest.approx(0.4)},
+        ),
+        # удаление оценки
+        (
+            {'old_score': 8.0, 'new_score': None},
+            {'sum': -8.0, 'count': -1, 'histogram.8': -1},
+        ),
+        # повторная запись той же оценки не изменяет сводку
+        (
+            {'old_score': 5.0, 'new_score': 5.0},
+            {},
+        ),
+    ],
+)
+def test_get_score_increments(query_data: dict, expected_answer: dict):
+    assert get_score_increments(query_data['old_score'], query_data['new_score']) == expected_answer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # оценка, сохраненная строкой, приводится к числу
+        (
+            {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6', 'old_score': '4', 'new_score': 6.0},
+            [({'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'}, {'sum': 2.0, 'histogram.4': -1, 'histogram.6': 1})],
+        ),
+        # без изменения счетчиков запрос не выполняется
+        (
+            {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6', 'old_score': None, 'new_score': None},
+            [],
+        ),
+    ],
+)
+async def test_apply_score_change(query_data: dict, expected_answer: list):
+    repository = FakeRepository([])
+    summary_service = FilmScoreSummaryService(repository)
+
+    await summary_service.apply_score_change(query_data['film_id'], query_data['old_score'], query_data['new_score'])
+
+    assert repository.increments == expected_answer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # пересчет сводок всех фильмов удаляет сводки только тех фильмов, оценок которых больше нет
+        (
+            {
+                'film_id': None,
+                'aggregate_results': [[], [{'_id': 'film_a'}]],
+                'stale_summaries': [{'film_id': 'film_a'}, {'film_id': 'film_b'}],
+            },
+            {
+                'is_rebuilt': True,
+                'match': {},
+                'found_queries': [{}],
+                'deleted_queries': [{'film_id': {'$in': ['film_b']}}],
+            },
+        ),
+        # сводка фильма, впервые оцененного во время пересчета, не удаляется
+        (
+            {
+                'film_id': None,
+                'aggregate_results': [[], [{'_id': 'film_a'}]],
+                'stale_summaries': [{'film_id': 'film_a'}],
+            },
+            {'is_rebuilt': True, 'match': {}, 'found_queries': [{}], 'deleted_queries': []},
+        ),
+        # пересчет сводки одного фильма
+        (
+            {
+                'film_id': uuid.UUID('3fa85f64-5717-4562-b3fc-2c963f66afa6'),
+                'aggregate_results': [[]],
+                'stale_summaries': None,
+            },
+            {
+                'is_rebuilt': True,
+                'match': {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'},
+                'found_queries': [{'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'}],
+                'deleted_queries': [],
+            },
+        ),
+        # при ошибке пересчета сводки не удаляются
+        (
+            {'film_id': None, 'aggregate_results': [None], 'stale_summaries': None},
+            {'is_rebuilt': False, 'match': {}, 'found_queries': [], 'deleted_queries': []},
+        ),
+    ],
+)
+async def test_rebuild(query_data: dict, expected_answer: dict):
+    repository = FakeRepository(query_data['aggregate_results'], query_data['stale_summaries'])
+    summary_service = FilmScoreSummaryService(repository)
+
+    assert await summary_service.rebuild(query_data['film_id']) is expected_answer['is_rebuilt']
+
+    pipeline = repository.pipelines[0]
+    assert pipeline[0] == {'$match': expected_answer['match']}
+    assert pipeline[-1] == {'$merge': {'into': 'film_score_summary', 'on': 'film_id', 'whenMatched': 'replace'}}
+    rebuilt_at = pipeline[-2]['$project']['rebuilt_at']
+    # сводки, не перезаписанные пересчетом, отличаются временем пересчета
+    assert repository.found_queries == [
+        {**query, 'rebuilt_at': {'$ne': rebuilt_at}} for query in expected_answer['found_queries']
+    ]
+    assert repository.deleted_queries == expected_answer['deleted_queries']
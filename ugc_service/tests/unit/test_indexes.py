@@ -0,0 +1,107 @@
+import pytest
+from db.mongo.indexes import compare_indexes, get_index_key
+from pymongo import IndexModel
+
+FILM_USER_INDEX = {'v': 2, 'key': {'film_id': 1, 'user_id': 1}, 'name': 'film_id_1_user_id_1', 'unique': True}
+ID_INDEX = {'v': 2, 'key': {'_id': 1}, 'name': '_id_'}
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # индексы совпадают с описанием, индекс _id не считается лишним
+        (
+            {
+                'index_models': [IndexModel([('film_id', 1), ('user_id', 1)], unique=True)],
+                'indexes': [ID_INDEX, FILM_USER_INDEX],
+            },
+            {'missing': [], 'drifted': [], 'extra': []},
+        ),
+        # коллекция еще не создана
+        (
+            {
+                'index_models': [
+                    IndexModel([('film_id', 1), ('user_id', 1)], unique=True),
+                    IndexModel([('user_id', 1), ('create_at', -1)]),
+                ],
+                'indexes': [],
+            },
+            {'missing': ['film_id_1_user_id_1', 'user_id_1_create_at_-1'], 'drifted': [], 'extra': []},
+        ),
+        # индекс с тем же ключом, но без уникальности, и не описанный индекс
+        (
+            {
+                'index_models': [IndexModel([('film_id', 1), ('user_id', 1)], unique=True)],
+                'indexes': [
+                    ID_INDEX,
+                    {'v': 2, 'key': {'film_id': 1, 'user_id': 1}, 'name': 'film_id_1_user_id_1'},
+                    {'v': 2, 'key': {'film_id': 1}, 'name': 'film_id_1'},
+                ],
+            },
+            {'missing': [], 'drifted': ['film_id_1_user_id_1'], 'extra': ['film_id_1']},
+        ),
+        # индекс с другим именем считается отличающимся от описания
+        (
+            {
+                'index_models': [IndexModel([('film_id', 1), ('user_id', 1)], unique=True)],
+                'indexes': [{**FILM_USER_INDEX, 'name': 'film_user'}],
+            },
+            {'missing': [], 'drifted': ['film_id_1_user_id_1'], 'extra': []},
+        ),
+        # текстовый индекс сопоставляется по полям из weights, отличается язык индекса
+        (
+            {
+                'index_models': [
+                    IndexModel([('film_id', 1), ('review_text', 'text')], default_language='russian'),
+                ],
+                'indexes': [
+                    {
+                        'v': 2,
+                        'key': {'film_id': 1, '_fts': 'text', '_ftsx': 1},
+                        'name': 'film_id_1_review_text_text',
+                        'weights': {'review_text': 1},
+                        'default_language': 'english',
+                        'textIndexVersion': 3,
+                    },
+                ],
+            },
+            {'missing': [], 'drifted': ['film_id_1_review_text_text'], 'extra': []},
+        ),
+        # частичный индекс с отличающимся условием
+        (
+            {
+                'index_models': [IndexModel([('is_folded', 1)], partialFilterExpression={'is_folded': False})],
+                'indexes': [
+                    {
+                        'v': 2,
+                        'key': {'is_folded': 1},
+                        'name': 'is_folded_1',
+                        'partialFilterExpression': {'is_folded': True},
+                    },
+                ],
+            },
+            {'missing': [], 'drifted': ['is_folded_1'], 'extra': []},
+        ),
+    ],
+)
+def test_compare_indexes(query_data: dict, expected_answer: dict):
+    assert compare_indexes(query_data['index_models'], query_data['indexes']) == expected_answer
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # ключ обычного индекса
+        (
+            {'key': {'user_id': 1, 'created_at': -1}},
+            (('user_id', 1), ('created_at', -1)),
+        ),
+        # поля текста в ключе текстового индекса заменяются полями из weights
+        (
+            {'key': {'film_id': 1, '_fts': 'text', '_ftsx': 1, 'likes': -1}, 'weights': {'review_text': 1}},
+            (('film_id', 1), ('review_text', 'text'), ('likes', -1)),
+        ),
+    ],
+)
+def test_get_index_key(query_data: dict, expected_answer: tuple):
+    assert get_index_key(query_data) == expected_answer
@@ -0,0 +1,99 @@
+import types
+
+import pytest
+from db.mongo.mongo_rep import MongoRepository
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeCollection:
+    """Коллекция, записывающая запросы и отвечающая заданным результатом или ошибкой."""
+
+    def __init__(self, result: object) -> None:
+        self.calls: list[str] = []
+        self._result = result
+
+    async def insert_one(self, document: dict, session=None) -> types.SimpleNamespace:
+        return self._reply('insert_one')
+
+    async def delete_one(self, query: dict) -> types.SimpleNamespace:
+        return self._reply('delete_one')
+
+    def _reply(self, method_name: str) -> types.SimpleNamespace:
+        self.calls.append(method_name)
+        if isinstance(self._result, Exception):
+            raise self._result
+        return self._result
+
+
+def get_repository(collection: FakeCollection) -> MongoRepository:
+    repository = MongoRepository(None)
+
+    async def get_collection(collection_name: str, read_preference=None) -> FakeCollection:
+        return collection
+
+    repository.get_collection = get_collection
+    return repository
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # запись добавляется одним запросом без предварительного поиска
+        (
+            {'result': types.SimpleNamespace(inserted_id='64b7f0c2e4b0a1a2b3c4d5e6')},
+            {'inserted_id': '64b7f0c2e4b0a1a2b3c4d5e6', 'error': None},
+        ),
+        # повторная запись отклоняется уникальным индексом, ошибка пробрасывается сервису
+        (
+            {'result': DuplicateKeyError('E11000 duplicate key error')},
+            {'inserted_id': None, 'error': DuplicateKeyError},
+        ),
+        # прочие ошибки записи возвращают None
+        (
+            {'result': PyMongoError('connection closed')},
+            {'inserted_id': None, 'error': None},
+        ),
+    ],
+)
+async def test_insert_one(query_data: dict, expected_answer: dict):
+    collection = FakeCollection(query_data['result'])
+    repository = get_repository(collection)
+    document = {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6', 'user_id': '377be7fa-8396-43f8-ae46-378415add5e0'}
+
+    if expected_answer['error']:
+        with pytest.raises(expected_answer['error']):
+            await repository.insert_one('film_bookmarks', document)
+    else:
+        assert await repository.insert_one('film_bookmarks', document) == expected_answer['inserted_id']
+    assert collection.calls == ['insert_one']
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # запись удаляется одним запросом
+        (
+            {'result': types.SimpleNamespace(deleted_count=1)},
+            {'deleted_count': 1},
+        ),
+        # запись не найдена
+        (
+            {'result': types.SimpleNamespace(deleted_count=0)},
+            {'deleted_count': 0},
+        ),
+        # ошибка удаления
+        (
+            {'result': PyMongoError('connection closed')},
+            {'deleted_count': None},
+        ),
+    ],
+)
+async def test_delete_one(query_data: dict, expected_answer: dict):
+    collection = FakeCollection(query_data['result'])
+    repository = get_repository(collection)
+    query = {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6', 'user_id': '377be7fa-8396-43f8-ae46-378415add5e0'}
+
+    assert await repository.delete_one('film_bookmarks', query) == expected_answer['deleted_count']
+    assert collection.calls == ['delete_one']
@@ -0,0 +1,136 @@
+import pytest
+from core.config import settings
+from db.mongo.mongo_storage import get_client_options
+from db.mongo.pool_monitor import PoolMonitor
+from pymongo import monitoring
+
+ADDRESS = ('mongo', 27017)
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # нулевые и пустые значения не передаются клиенту, используются значения драйвера
+        (
+            {
+                'mongo_max_pool_size': 100,
+                'mongo_min_pool_size': 0,
+                'mongo_max_idle_time_ms': 0,
+                'mongo_wait_queue_timeout_ms': 0,
+                'mongo_server_selection_timeout_ms': 30000,
+                'mongo_compressors': '',
+                'mongo_read_preference': 'primary',
+                'mongo_write_concern': '1',
+            },
+            {
+                'maxPoolSize': 100,
+                'serverSelectionTimeoutMS': 30000,
+                'readPreference': 'primary',
+                'w': 1,
+                'uuidRepresentation': 'standard',
+            },
+        ),
+        # заданные параметры пула, сжатие и подтверждение записи большинством узлов
+        (
+            {
+                'mongo_max_pool_size': 50,
+                'mongo_min_pool_size': 10,
+                'mongo_max_idle_time_ms': 60000,
+                'mongo_wait_queue_timeout_ms': 2000,
+                'mongo_server_selection_timeout_ms': 5000,
+                'mongo_compressors': 'zstd,snappy',
+                'mongo_read_preference': 'secondaryPreferred',
+                'mongo_write_concern': 'majority',
+            },
+            {
+                'maxPoolSize': 50,
+                'minPoolSize': 10,
+                'maxIdleTimeMS': 60000,
+                'waitQueueTimeoutMS': 2000,
+                'serverSelectionTimeoutMS': 5000,
+                'compressors': 'zstd,snappy',
+                'readPreference': 'secondaryPreferred',
+                'w': 'majority',
+                'uuidRepresentation': 'standard',
+            },
+        ),
+    ],
+)
+def test_get_client_options(monkeypatch: pytest.MonkeyPatch, query_data: dict, expected_answer: dict):
+    for setting_name, setting_value in query_data.items():
+        monkeypatch.setattr(settings, setting_name, setting_value)
+
+    client_options = get_client_options()
+
+    assert len(client_options.pop('event_listeners')) == 1
+    assert client_options == expected_answer
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # соединение выдано и возвращено в пул
+        (
+            {
+                'events': [
+                    monitoring.PoolCreatedEvent(ADDRESS, {'maxPoolSize': 100}),
+                    monitoring.ConnectionCreatedEvent(ADDRESS, 1),
+                    monitoring.ConnectionCheckOutStartedEvent(ADDRESS),
+                    monitoring.ConnectionCheckedOutEvent(ADDRESS, 1),
+                    monitoring.ConnectionCheckedInEvent(ADDRESS, 1),
+                ],
+            },
+            {
+                'max_pool_size': 100,
+                'open': 1,
+                'in_use': 0,
+                'max_in_use': 1,
+                'check_outs': 1,
+                'check_out_failures': 0,
+                'cleared': 0,
+            },
+        ),
+        # соединение не выдано за время ожидания, пул сброшен после ошибки соединения
+        (
+            {
+                'events': [
+                    monitoring.PoolCreatedEvent(ADDRESS, {'maxPoolSize': 1}),
+                    monitoring.ConnectionCreatedEvent(ADDRESS, 1),
+                    monitoring.ConnectionCheckOutStartedEvent(ADDRESS),
+                    monitoring.ConnectionCheckedOutEvent(ADDRESS, 1),
+                    monitoring.ConnectionCheckOutStartedEvent(ADDRESS),
+                    monitoring.ConnectionCheckOutFailedEvent(ADDRESS, 'timeout'),
+                    monitoring.PoolClearedEvent(ADDRESS),
+                    monitoring.ConnectionClosedEvent(ADDRESS, 1, 'stale'),
+                ],
+            },
+            {
+                'max_pool_size': 1,
+                'open': 0,
+                'in_use': 1,
+                'max_in_use': 1,
+                'check_outs': 1,
+                'check_out_failures': 1,
+                'cleared': 1,
+            },
+        ),
+    ],
+)
+def test_pool_monitor(query_data: dict, expected_answer: dict):
+    pool_monitor = PoolMonitor()
+    event_handlers = {
+        monitoring.PoolCreatedEvent: pool_monitor.pool_created,
+        monitoring.PoolClearedEvent: pool_monitor.pool_cleared,
+        monitoring.ConnectionCreatedEvent: pool_monitor.connection_created,
+        monitoring.ConnectionClosedEvent: pool_monitor.connection_closed,
+        monitoring.ConnectionCheckOutStartedEvent: pool_monitor.connection_check_out_started,
+        monitoring.ConnectionCheckOutFailedEvent: pool_monitor.connection_check_out_failed,
+        monitoring.ConnectionCheckedOutEvent: pool_monitor.connection_checked_out,
+        monitoring.ConnectionCheckedInEvent: pool_monitor.connection_checked_in,
+    }
+    for event in query_data['events']:
+        event_handlers[type(event)](event)
+
+    pool_stats = pool_monitor.stats()['mongo:27017']
+    assert {counter: pool_stats[counter] for counter in expected_answer} == expected_answer
+    assert pool_stats['wait_time_max_ms'] <= pool_stats['wait_time_total_ms']
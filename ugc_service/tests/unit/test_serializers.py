@@ -0,0 +1,119 @@
+import datetime
+import uuid
+
+import bson
+import orjson
+import pytest
+from api.utils.response_models import FilmFormBookmarks, FilmReviewResponse, FilmReviewSearchResult
+from api.utils.serializers import bookmark_to_response, review_to_response, review_to_search_result
+
+REVIEW_ID = bson.ObjectId('64b7f0c2e4b0a1a2b3c4d5e6')
+USER_ID = uuid.UUID('377be7fa-8396-43f8-ae46-378415add5e0')
+CREATE_AT = datetime.datetime(2023, 7, 1, 12, 30)
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # отзыв с оценкой и счетчиками реакций
+        (
+            {
+                'review': {
+                    '_id': REVIEW_ID,
+                    'user_id': USER_ID,
+                    'review_text': 'Отличный фильм',
+                    'film_score': 9,
+                    'create_at': CREATE_AT,
+                    'update_at': CREATE_AT,
+                    'likes': 3,
+                    'dislikes': 1,
+                },
+            },
+            {
+                'review_id': '64b7f0c2e4b0a1a2b3c4d5e6',
+                'user_id': '377be7fa-8396-43f8-ae46-378415add5e0',
+                'review_text': 'Отличный фильм',
+                'film_score': 9.0,
+                'create_at': '2023-07-01T12:30:00',
+                'update_at': '2023-07-01T12:30:00',
+                'likes': 3,
+                'dislikes': 1,
+            },
+        ),
+        # отзыв без оценки, сохраненный до появления счетчиков реакций, с user_id строкой
+        (
+            {
+                'review': {
+                    '_id': REVIEW_ID,
+                    'user_id': '377be7fa-8396-43f8-ae46-378415add5e0',
+                    'review_text': 'Без оценки',
+                    'film_score': None,
+                    'create_at': CREATE_AT,
+                    'update_at': CREATE_AT,
+                },
+            },
+            {
+                'review_id': '64b7f0c2e4b0a1a2b3c4d5e6',
+                'user_id': '377be7fa-8396-43f8-ae46-378415add5e0',
+                'review_text': 'Без оценки',
+                'film_score': None,
+                'create_at': '2023-07-01T12:30:00',
+                'update_at': '2023-07-01T12:30:00',
+                'likes': 0,
+                'dislikes': 0,
+            },
+        ),
+        # оценка, сохраненная строкой до перевода оценок в числа
+        (
+            {
+                'review': {
+                    '_id': REVIEW_ID,
+                    'user_id': USER_ID,
+                    'review_text': 'Старый отзыв',
+                    'film_score': '7',
+                    'create_at': CREATE_AT,
+                    'update_at': CREATE_AT,
+                    'likes': 0,
+                },
+            },
+            {
+                'review_id': '64b7f0c2e4b0a1a2b3c4d5e6',
+                'user_id': '377be7fa-8396-43f8-ae46-378415add5e0',
+                'review_text': 'Старый отзыв',
+                'film_score': 7.0,
+                'create_at': '2023-07-01T12:30:00',
+                'update_at': '2023-07-01T12:30:00',
+                'likes': 0,
+                'dislikes': 0,
+            },
+        ),
+    ],
+)
+def test_review_to_response(query_data: dict, expected_answer: dict):
+    response = orjson.loads(orjson.dumps(review_to_response(query_data['review'])))
+
+    assert response == expected_answer
+    # ответ совпадает с моделью, которая описывает его в схеме OpenAPI
+    assert response == FilmReviewResponse.model_validate(response).model_dump(mode='json')
+
+    search_result = orjson.loads(orjson.dumps(review_to_search_result({**query_data['review'], 'text_score': 1.5})))
+    assert search_result == FilmReviewSearchResult.model_validate({**response, 'text_score': 1.5}).model_dump(
+        mode='json',
+    )
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # id фильма из закладок
+        (
+            {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'},
+            {'film_id': '3fa85f64-5717-4562-b3fc-2c963f66afa6'},
+        ),
+    ],
+)
+def test_bookmark_to_response(query_data: dict, expected_answer: dict):
+    response = orjson.loads(orjson.dumps(bookmark_to_response(query_data['film_id'])))
+
+    assert response == expected_answer
+    assert response == FilmFormBookmarks.model_validate(response).model_dump(mode='json')
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from core.config import settings
+from db.mongo.write_behind import WriteBehindQueue
+from pymongo import DeleteOne, InsertOne
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRepository:
+    """Репозиторий, записывающий пакеты bulk_write и возвращающий заданные результаты запросов."""
+
+    def __init__(self, results: list[dict[int, int] | None]) -> None:
+        self.batches: list[list] = []
+        self._results = results
+
+    async def bulk_write(self, collection_name: str, operations: list) -> dict[int, int] | None:
+        self.batches.append(operations)
+        return self._results.pop(0) if self._results else {}
+
+
+@pytest.mark.parametrize(
+    'query_data, expected_answer',
+    [
+        # операции с одинаковым ключом схлопываются, пакет записывается при закрытии очереди
+        (
+            {
+                'steps': [[('a', InsertOne({'a': 1})), ('b', InsertOne({'b': 1})), ('a', DeleteOne({'a': 1}))]],
+                'results': [],
+            },
+            {
+                'batches': [[DeleteOne({'a': 1}), InsertOne({'b': 1})]],
+                'stats': {'queued': 3, 'coalesced': 1, 'flushed': 2, 'batches': 1, 'retried': 0, 'failed': 0},
+            },
+        ),
+        # повторное добавление существующей записи не считается ошибкой
+        (
+            {
+                'steps': [[('a', InsertOne({'a': 1})), ('b', InsertOne({'b': 1}))]],
+                'results': [{0: 11000, 1: 121}],
+            },
+            {
+                'batches': [[InsertOne({'a': 1}), InsertOne({'b': 1})]],
+                'stats': {'queued': 2, 'coalesced': 0, 'flushed': 1, 'batches': 1, 'retried': 0, 'failed': 1},
+            },
+        ),
+        # неудавшийся пакет повторяется, новая операция с тем же ключом заменяет повторяемую
+        (
+            {
+                'steps': [[('a', InsertOne({'a': 1})), ('b', InsertOne({'b': 1}))], [('a', DeleteOne({'a': 1}))]],
+                'results': [None],
+            },
+            {
+                'batches': [
+                    [InsertOne({'a': 1}), InsertOne({'b': 1})],
+                    [DeleteOne({'a': 1}), InsertOne({'b': 1})],
+                ],
+                'stats': {'queued': 3, 'coalesced': 1, 'flushed': 2, 'batches': 2, 'retried': 2, 'failed': 0},
+            },
+        ),
+        # пакет отбрасывается после WRITE_BEHIND_MAX_RETRIES повторов
+        (
+            {
+                'steps': [[('a', InsertOne({'a': 1}))]],
+                'results': [None, None, None],
+            },
+            {
+                'batches': [[InsertOne({'a': 1})]] * 3,
+                'stats': {'queued': 1, 'coalesced': 0, 'flushed': 0, 'batches': 3, 'retried': 2, 'failed': 1},
+            },
+        ),
+    ],
+)
+async def test_write_behind_queue(monkeypatch: pytest.MonkeyPatch, query_data: dict, expected_answer: dict):
+    monkeypatch.setattr(settings, 'write_behind_max_retries', 2)
+    monkeypatch.setattr(settings, 'write_behind_retry_delay', 0.2)
+    repository = FakeRepository(query_data['results'])
+    queue = WriteBehindQueue(repository, 'film_bookmarks', max_size=10, batch_size=10, flush_interval=0.05)
+    queue.start()
+
+    for step in query_data['steps']:
+        for key, operation in step:
+            await queue.put(key, operation)
+        # первый пакет записывается по истечении flush_interval, следующие операции попадают в повтор
+        await asyncio.sleep(0.1)
+    await queue.close()
+
+    assert repository.batches == expected_answer['batches']
+    assert queue.stats() == {**expected_answer['stats'], 'size': 0}
+    assert not queue.is_running
+
+
+async def test_write_behind_queue_flushes_on_close():
+    repository = FakeRepository([])
+    queue = WriteBehindQueue(repository, 'film_bookmarks', max_size=10, batch_size=10, flush_interval=60)
+    queue.start()
+
+    await queue.put('a', InsertOne({'a': 1}))
+    await queue.put('b', InsertOne({'b': 1}))
+    # пакет не набран и интервал записи не истек, операции записывает закрытие очереди
+    await asyncio.wait_for(queue.close(), timeout=1)
+
+    assert repository.batches == [[InsertOne({'a': 1}), InsertOne({'b': 1})]]
+    assert queue.stats()['flushed'] == 2